@@ -0,0 +1,49 @@
+"""
+Benchmarks for the hot paths of calendall.
+
+Run them from the project directory (where manage.py is) as modules, for
+example:
+
+    $ python -m benchmarks.email_inlining
+
+They use DJANGO_SETTINGS_MODULE (calendall.settings.dev by default).
+"""
+import os
+import statistics
+import time
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "calendall.settings.dev")
+    import django
+    django.setup()
+
+
+def measure(func, number=1000, warmup=10):
+    """Runs func 'number' times and returns the list of timings in seconds"""
+    for i in range(warmup):
+        func()
+
+    timings = []
+    for i in range(number):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def percentile(timings, pct):
+    ordered = sorted(timings)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def report(name, timings):
+    """Prints a line with the stats of the timings in microseconds"""
+    print("{0:<40} n={1:<7} mean={2:>10.1f}us p50={3:>10.1f}us "
+          "p99={4:>10.1f}us".format(name,
+                                    len(timings),
+                                    statistics.mean(timings) * 1e6,
+                                    percentile(timings, 50) * 1e6,
+                                    percentile(timings, 99) * 1e6))
+    return statistics.mean(timings)
@@ -0,0 +1,47 @@
+"""
+Render time of the navbar avatar and of a list of avatars.
+
+    $ python -m benchmarks.avatars [number]
+
+Compares django_gravatar's gravatar_url tag (MD5 and URL built on every
+render) with the core_tags avatar_url tag. No database is needed.
+"""
+import sys
+
+from . import setup_django, measure, report
+
+USERS = 50
+
+
+def main(number=1000):
+    setup_django()
+
+    from django.template import Context, Template
+
+    from profiles.models import CalendallUser
+
+    user = CalendallUser(email="darkknight@gmail.com")
+    users = [CalendallUser(email="user.{0}@gmail.com".format(i))
+             for i in range(USERS)]
+    context = Context({'user': user, 'users': users})
+
+    templates = (
+        ("gravatar_url", Template(
+            "{% load gravatar %}{% gravatar_url user.email 30 %}"),
+         Template("{% load gravatar %}{% for u in users %}"
+                  "{% gravatar_url u.email 30 %}{% endfor %}")),
+        ("avatar_url", Template(
+            "{% load core_tags %}{% avatar_url user 30 %}"),
+         Template("{% load core_tags %}{% for u in users %}"
+                  "{% avatar_url u 30 %}{% endfor %}")),
+    )
+    for name, navbar, avatar_list in templates:
+        report("{0} navbar".format(name),
+               measure(lambda: navbar.render(context), number))
+        report("{0} list of {1}".format(name, USERS),
+               measure(lambda: avatar_list.render(context), number))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 1000)
@@ -0,0 +1,87 @@
+"""
+Throughput of the templated emails, sending one by one with
+send_templated_email against send_templated_emails in one process and in a
+pool of processes. The validation email is used with the pre-inlined
+template (built in a temporary directory) and the dummy email backend.
+
+    $ python -m benchmarks.bulk_email [number] [processes] [stylesheet]
+
+By default 10000 emails, 4 processes and the email-libs stylesheet (needs
+bower install)
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+from . import setup_django
+
+
+def main(number=10000, processes=4, stylesheet=None):
+    setup_django()
+
+    from django.conf import settings
+    from django.test.utils import override_settings
+
+    from core import inliner
+    from core.utils import send_templated_email, send_templated_emails
+    from profiles.models import CalendallUser
+
+    template_name = "profiles/emails/profiles_email_validation"
+    tmp_dir = tempfile.mkdtemp()
+
+    overrides = {
+        'EMAIL_BACKEND': 'django.core.mail.backends.dummy.EmailBackend',
+        'EMAIL_DELIVERY': 'sync',
+        'EMAIL_USE_INLINED_TEMPLATES': True,
+        'EMAIL_INLINED_TEMPLATES_DIR': tmp_dir,
+        'EMAIL_INLINED_TEMPLATES': (template_name + ".html",),
+        'TEMPLATE_DIRS': settings.TEMPLATE_DIRS + (tmp_dir,),
+    }
+    if stylesheet:
+        shutil.copy(stylesheet, os.path.join(tmp_dir, "email.css"))
+        pipeline_css = dict(settings.PIPELINE_CSS)
+        pipeline_css['email-libs'] = {'source_filenames': ("email.css",),
+                                      'output_filename': "email.min.css"}
+        overrides['PIPELINE_CSS'] = pipeline_css
+        overrides['STATICFILES_DIRS'] = settings.STATICFILES_DIRS + (tmp_dir,)
+
+    def batch():
+        for i in range(number):
+            user = CalendallUser(username="user{0}".format(i),
+                                 email="user{0}@calendall.io".format(i))
+            yield {'template_name': template_name,
+                   'context': {'user': user,
+                               'validation_token': uuid.uuid4().hex},
+                   'subject': "Validate your Calendall account",
+                   'sender': settings.EMAIL_NOREPLY,
+                   'receivers': (user.email,)}
+
+    def run(name, func):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        print("{0:<40} {1} emails in {2:.2f}s ({3:.0f} emails/s)".format(
+            name, number, elapsed, number / elapsed))
+
+    try:
+        with override_settings(**overrides):
+            inliner.build_inlined_templates()
+
+            run("send_templated_email (one by one)",
+                lambda: [send_templated_email(**e) for e in batch()])
+            run("send_templated_emails",
+                lambda: send_templated_emails(batch()))
+            run("send_templated_emails ({0} processes)".format(processes),
+                lambda: send_templated_emails(batch(), processes=processes))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 10000,
+         int(args[1]) if len(args) > 1 else 4,
+         args[2] if len(args) > 2 else None)
@@ -0,0 +1,92 @@
+"""
+Requests/sec and latency with new, persistent and pooled connections.
+
+    $ DJANGO_SETTINGS_MODULE=calendall.settings.prod \\
+        python -m benchmarks.db_connections [threads] [requests]
+
+Every thread runs 'requests' requests like a threaded WSGI server: the
+request_started and request_finished signals (that close the connections
+when CONN_MAX_AGE allows it) around a primary key query. It runs against
+a throwaway test database of the configured server, a local PostgreSQL
+with the core.db.postgresql engine to compare the three setups.
+"""
+import statistics
+import sys
+import threading
+import time
+
+from . import setup_django, percentile
+
+
+def main(threads=8, number=500):
+    setup_django()
+
+    from django.core.signals import request_finished, request_started
+    from django.db import connection, connections
+
+    from core.db.backends import close_pools
+    from profiles.models import CalendallUser
+
+    # The pool has half the connections of the persistent setup
+    setups = (
+        ("new connection per request", {'CONN_MAX_AGE': 0, 'POOL_SIZE': 0}),
+        ("persistent", {'CONN_MAX_AGE': 600, 'POOL_SIZE': 0}),
+        ("pool of {0}".format(max(1, threads // 2)),
+         {'CONN_MAX_AGE': 0, 'POOL_SIZE': max(1, threads // 2)}),
+    )
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        user = CalendallUser.objects.create(username="batman",
+                                            email="darkknight@gmail.com")
+        connection.close()
+
+        def request():
+            request_started.send(sender=None)
+            try:
+                CalendallUser.objects.filter(pk=user.pk).exists()
+            finally:
+                request_finished.send(sender=None)
+
+        def worker(timings):
+            try:
+                for i in range(number):
+                    start = time.perf_counter()
+                    request()
+                    timings.append(time.perf_counter() - start)
+            finally:
+                connections['default'].close()
+
+        settings_dict = connections.databases['default']
+        old_settings = dict(settings_dict)
+        for name, setup in setups:
+            settings_dict.update(setup)
+            timings = [[] for i in range(threads)]
+            workers = [threading.Thread(target=worker, args=(t,))
+                       for t in timings]
+
+            start = time.perf_counter()
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            elapsed = time.perf_counter() - start
+            close_pools()
+            settings_dict.clear()
+            settings_dict.update(old_settings)
+
+            timings = [t for thread_timings in timings
+                       for t in thread_timings]
+            print("{0:<30} {1} threads: {2:>8.0f} req/s mean={3:>8.1f}us "
+                  "p99={4:>8.1f}us".format(
+                      name, threads, len(timings) / elapsed,
+                      statistics.mean(timings) * 1e6,
+                      percentile(timings, 99) * 1e6))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(*[int(a) for a in args[:2]])
@@ -0,0 +1,57 @@
+"""
+Compares premailer.transform with core.inliner.transform on the welcome
+email.
+
+    $ python -m benchmarks.email_inlining [number] [stylesheet]
+
+By default uses the email-libs stylesheet (needs bower install)
+"""
+import sys
+from unittest import mock
+
+from . import setup_django, measure, report
+
+
+def main(number=200, stylesheet=None):
+    setup_django()
+
+    from django.conf import settings
+    from django.contrib.staticfiles import finders
+    from django.template.loader import render_to_string
+    import premailer
+
+    from core import inliner
+    from profiles.models import CalendallUser
+
+    if not stylesheet:
+        source = settings.PIPELINE_CSS['email-libs']['source_filenames'][0]
+        stylesheet = finders.find(source)
+        if not stylesheet:
+            sys.exit("'{0}' not found, run bower install".format(source))
+
+    with open(stylesheet) as f:
+        css = f.read()
+
+    # Same as the email rendered with the pipeline tag, without the HTTP
+    # request to load the stylesheet
+    html = render_to_string("profiles/emails/profiles_email_welcome.html",
+                            {'user': CalendallUser(username="batman")})
+    html = html.replace("<head>",
+                        '<head><link rel="stylesheet" href="/email.css">', 1)
+    base_url = "http://" + settings.DOMAIN
+
+    with mock.patch.object(premailer.Premailer, '_load_external',
+                           return_value=css):
+        base = report("premailer.transform",
+                      measure(lambda: premailer.transform(html, base_url),
+                              number))
+        cached = report("core.inliner.transform",
+                        measure(lambda: inliner.transform(html, base_url),
+                                number))
+
+    print("speedup: {0:.1f}x".format(base / cached))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 200, args[1] if len(args) > 1 else None)
@@ -0,0 +1,108 @@
+"""
+Time to first byte, events/second and memory of the iCalendar export.
+
+    $ python -m benchmarks.ics_export [events]
+
+Fills a calendar of a throwaway test database with 'events' events and
+requests its export (calendars.views.CalendarExport) with the test
+client. The streamed response is consumed piece by piece, like the WSGI
+server does, so the peak memory (tracemalloc) should be about the same
+for the whole calendar and for a tenth of it. Then a conditional request
+with the ETag measures the 304.
+"""
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from . import setup_django
+
+DESCRIPTION = ("The public calendar of the Gotham city events, with a long "
+               "description that is folded in several lines. ") * 3
+
+
+def fill(calendar, number):
+    import pytz
+    from calendars.models import Event
+
+    start = datetime(2015, 1, 1, 10, tzinfo=pytz.utc)
+    events = (Event(calendar=calendar, uid="{0}@calendall.io".format(i),
+                    summary="Event {0}".format(i), description=DESCRIPTION,
+                    location="Gotham", start=start + timedelta(hours=i),
+                    end=start + timedelta(hours=i, minutes=90))
+              for i in range(number))
+    batch = []
+    for event in events:
+        batch.append(event)
+        if len(batch) == 500:
+            Event.objects.bulk_create(batch)
+            batch = []
+    Event.objects.bulk_create(batch)
+
+
+def export(client, url, limit=None):
+    """Time to first byte, total time and size of the response"""
+    start = time.perf_counter()
+    response = client.get(url)
+    content = iter(response.streaming_content)
+    size = len(next(content))
+    first = time.perf_counter() - start
+    for piece in content:
+        size += len(piece)
+        if limit and size >= limit:
+            break
+    return first, time.perf_counter() - start, size
+
+
+def main(number=50000):
+    setup_django()
+
+    from django.core.urlresolvers import reverse
+    from django.db import connection
+    from django.test import Client
+
+    from calendars.models import Calendar
+    from profiles.models import CalendallUser
+
+    old_name = connection.settings_dict['NAME']
+    try:
+        connection.creation.create_test_db(verbosity=0)
+        user = CalendallUser.objects.create(username="batman",
+                                            email="darkknight@gmail.com")
+        calendar = Calendar.objects.create(owner=user, name="Gotham")
+        fill(calendar, number)
+        url = reverse("calendars:export",
+                      kwargs={'share_token': calendar.share_token})
+        client = Client()
+
+        first, elapsed, size = export(client, url)
+        print("export {0:>7} events, {1:.1f} MiB".format(number,
+                                                         size / 2 ** 20))
+        print("time to first byte: {0:>8.1f} ms".format(first * 1000))
+        print("total:              {0:>8.0f} events/s".format(
+            number / elapsed))
+
+        # Separately, tracemalloc slows down the export
+        for limit in (size // 10, None):
+            tracemalloc.start()
+            read = export(client, url, limit)[2]
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print("{0:>5.1f} MiB read: peak memory {1:.1f} KiB".format(
+                read / 2 ** 20, peak / 1024))
+
+        etag = client.get(url)['ETag']
+        start = time.perf_counter()
+        for i in range(100):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        elapsed = time.perf_counter() - start
+        print("304:                {0:>8.2f} ms ({1})".format(
+            elapsed * 10, response.status_code))
+    finally:
+        if connection.settings_dict['NAME'] != old_name:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 50000)
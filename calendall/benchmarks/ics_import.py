@@ -0,0 +1,103 @@
+"""
+Events/second and memory of the iCalendar import.
+
+    $ python -m benchmarks.ics_import [events]
+
+Writes a feed of 'events' events to a temporary file, then parses it
+(calendars.ics.EventReader) and imports it (calendars.importer) into a
+throwaway test database. The peak memory (tracemalloc) of parsing the
+whole feed and a tenth of it should be the same.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from . import setup_django
+
+DESCRIPTION = ("The public calendar of the Gotham city events, with a long "
+               "description that is folded in several lines. ") * 3
+
+
+def write_ics(path, number):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n")
+        for i in range(number):
+            description = "DESCRIPTION:{0}".format(DESCRIPTION)
+            folded = "\r\n ".join(description[j:j + 74]
+                                  for j in range(0, len(description), 74))
+            f.write("BEGIN:VEVENT\r\n"
+                    "UID:{0}@calendall.io\r\n"
+                    "DTSTART;TZID=Europe/Madrid:2015{1:02d}{2:02d}T100000\r\n"
+                    "DURATION:PT1H30M\r\n"
+                    "SUMMARY:Event {0}\r\n"
+                    "{3}\r\n"
+                    "LOCATION:Gotham\r\n"
+                    "END:VEVENT\r\n".format(i, i % 12 + 1, i % 28 + 1,
+                                            folded))
+        f.write("END:VCALENDAR\r\n")
+
+
+def parse(path, limit=None):
+    from calendars.ics import EventReader
+    with open(path, encoding="utf-8", newline="") as f:
+        count = 0
+        for event in EventReader(f):
+            count += 1
+            if count == limit:
+                break
+    return count
+
+
+def main(number=50000):
+    setup_django()
+
+    from django.db import connection
+
+    from calendars.importer import import_events
+    from calendars.models import Calendar
+    from profiles.models import CalendallUser
+
+    fd, path = tempfile.mkstemp(suffix=".ics")
+    os.close(fd)
+    old_name = connection.settings_dict['NAME']
+    try:
+        write_ics(path, number)
+        print("{0} events, {1:.1f} MiB".format(
+            number, os.path.getsize(path) / 2 ** 20))
+
+        start = time.perf_counter()
+        count = parse(path)
+        elapsed = time.perf_counter() - start
+        print("parse  {0:>7} events: {1:>8.0f} events/s".format(
+            count, count / elapsed))
+
+        # Separately, tracemalloc slows down the parsing
+        for limit in (number // 10, None):
+            tracemalloc.start()
+            count = parse(path, limit)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print("parse  {0:>7} events: peak memory {1:.1f} KiB".format(
+                count, peak / 1024))
+
+        connection.creation.create_test_db(verbosity=0)
+        user = CalendallUser.objects.create(username="batman",
+                                            email="darkknight@gmail.com")
+        calendar = Calendar.objects.create(owner=user, name="Gotham")
+        with open(path, encoding="utf-8", newline="") as f:
+            start = time.perf_counter()
+            result = import_events(calendar, f)
+            elapsed = time.perf_counter() - start
+        print("import {0:>7} events: {1:>8.0f} events/s".format(
+            result.created, result.created / elapsed))
+    finally:
+        os.unlink(path)
+        if connection.settings_dict['NAME'] != old_name:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 50000)
@@ -0,0 +1,62 @@
+"""
+Time spent by the request thread in a log call.
+
+    $ python -m benchmarks.log_handlers [number]
+
+Compares the synchronous logging.FileHandler with core.logs'
+BackgroundFileHandler (verbose and JSON formatters), and a disabled debug
+call with .format() against the lazy %-style arguments. No database is
+needed.
+"""
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+from . import setup_django, measure, report
+
+
+def main(number=10000):
+    setup_django()
+
+    from core.logs import BackgroundFileHandler, JSONFormatter
+
+    directory = tempfile.mkdtemp()
+    log = logging.getLogger("benchmarks.log_handlers")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    verbose = logging.Formatter(
+        "[%(asctime)s] %(levelname)s [%(name)s:%(lineno)s] %(message)s")
+    user, to = "batman", ["joker@gmail.com"]
+
+    try:
+        handlers = (
+            ("FileHandler", logging.FileHandler(
+                os.path.join(directory, "sync.log")), verbose),
+            ("BackgroundFileHandler", BackgroundFileHandler(
+                os.path.join(directory, "background.log")), verbose),
+            ("BackgroundFileHandler json", BackgroundFileHandler(
+                os.path.join(directory, "json.log")), JSONFormatter()),
+        )
+        for name, handler, formatter in handlers:
+            handler.setFormatter(formatter)
+            log.addHandler(handler)
+            report(name, measure(
+                lambda: log.info("Sent email '%s' to '%s'", user, to),
+                number))
+            log.removeHandler(handler)
+            handler.close()
+
+        report("disabled debug .format()", measure(
+            lambda: log.debug("Sent email '{0}' to '{1}'".format(user, to)),
+            number))
+        report("disabled debug lazy", measure(
+            lambda: log.debug("Sent email '%s' to '%s'", user, to), number))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 10000)
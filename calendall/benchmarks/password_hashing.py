@@ -0,0 +1,43 @@
+"""
+Cost of the password hashing in the signup and the login.
+
+    $ python -m benchmarks.password_hashing [number]
+
+Times make_password (signup) and check_password (login) with every hasher
+of PASSWORD_HASHERS and the costs of the settings. Tune the costs so the
+preferred hasher stays around a few tens of milliseconds in production
+hardware. No database is needed.
+"""
+import sys
+
+from . import setup_django, measure, report
+
+PASSWORD = "I'mBatman123"
+
+
+def main(number=20):
+    setup_django()
+
+    from django.conf import settings
+    from django.contrib.auth.hashers import check_password, make_password
+    from django.utils.module_loading import import_string
+
+    for path in settings.PASSWORD_HASHERS:
+        algorithm = import_string(path).algorithm
+        try:
+            encoded = make_password(PASSWORD, hasher=algorithm)
+        except ValueError as e:
+            # Library not installed
+            print("{0:<40} {1}".format(algorithm, e))
+            continue
+        report("{0} signup".format(algorithm), measure(
+            lambda: make_password(PASSWORD, hasher=algorithm),
+            number, warmup=1))
+        report("{0} login".format(algorithm), measure(
+            lambda: check_password(PASSWORD, encoded),
+            number, warmup=1))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 20)
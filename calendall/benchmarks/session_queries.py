@@ -0,0 +1,86 @@
+"""
+Database queries per request of the session engines.
+
+    $ python -m benchmarks.session_queries [number]
+
+Runs 'number' logged in requests to the settings page and 'number'
+requests that only set the session test cookie with the database, the
+cached database and the core.sessions engines in a throwaway test
+database, and prints the queries per request (all and to django_session)
+and the latency.
+"""
+import sys
+
+from . import setup_django, measure, report
+
+ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'core.sessions',
+)
+
+
+def main(number=200):
+    setup_django()
+
+    from django.conf import settings
+    from django.contrib.sessions.middleware import SessionMiddleware
+    from django.core.cache import caches
+    from django.core.urlresolvers import reverse
+    from django.db import connection
+    from django.http import HttpResponse
+    from django.test import Client, RequestFactory
+    from django.test.utils import CaptureQueriesContext, override_settings
+
+    from profiles.models import CalendallUser
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        user = CalendallUser(username="batman", email="darkknight@gmail.com")
+        user.set_password("I'mBatman123")
+        user.save()
+        url = reverse("profiles:profile_settings")
+        factory = RequestFactory()
+
+        def view(request):
+            request.session.set_test_cookie()
+            return HttpResponse()
+
+        for engine in ENGINES:
+            with override_settings(SESSION_ENGINE=engine):
+                caches['sessions'].clear()
+                client = Client()
+                client.login(username="batman", password="I'mBatman123")
+                session_key = client.session.session_key
+                # Loads the engine when created
+                middleware = SessionMiddleware()
+
+                def settings_page():
+                    client.get(url)
+
+                def session_write():
+                    request = factory.get(url)
+                    request.COOKIES[settings.SESSION_COOKIE_NAME] = session_key
+                    middleware.process_request(request)
+                    middleware.process_response(request, view(request))
+
+                for name, func in (("settings page", settings_page),
+                                   ("session write", session_write)):
+                    with CaptureQueriesContext(connection) as queries:
+                        timings = measure(func, number, warmup=0)
+                    session_queries = [q for q in queries.captured_queries
+                                       if "django_session" in q['sql']]
+                    print("{0} {1}: {2:.2f} queries/request, {3:.2f} to "
+                          "django_session".format(
+                              engine, name, len(queries) / number,
+                              len(session_queries) / number))
+                    report("{0} {1}".format(engine.rsplit('.', 1)[-1],
+                                            name), timings)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 200)
@@ -0,0 +1,73 @@
+"""
+Render time of the profile settings page and of its timezone dropdown.
+
+    $ python -m benchmarks.settings_page [number]
+
+The dropdown is compared with the template loop used before
+core.widgets.SemanticSelect. No database is needed.
+"""
+import sys
+
+from . import setup_django, measure, report
+
+OLD_DROPDOWN = """
+<div class="ui fluid search selection dropdown">
+  <input type="hidden"
+         id="{{ form.timezone.auto_id }}"
+         name="{{ form.timezone.name }}"
+         value="{{ form.timezone.value|default:''}}">
+  <i class="dropdown icon"></i>
+  <div class="default text">{{ form.timezone.help_text }}</div>
+  <div class="menu">
+    {% for timezone, y in form.fields.timezone.choices %}
+        <div class="item" data-value="{{ timezone }}">{{ timezone }}</div>
+    {% endfor %}
+  </div>
+</div>
+"""
+
+
+def main(number=500):
+    setup_django()
+
+    from django.contrib.messages.storage.cookie import CookieStorage
+    from django.core.urlresolvers import reverse
+    from django.template import Context, Template
+    from django.test import RequestFactory
+
+    from profiles.forms import ProfileSettingsForm
+    from profiles.models import CalendallUser
+    from profiles.views import ProfileSettings
+
+    user = CalendallUser(pk=1, username="batman",
+                         email="darkknight@gmail.com",
+                         timezone="Europe/Madrid")
+    factory = RequestFactory()
+    view = ProfileSettings.as_view()
+
+    def render_page():
+        request = factory.get(reverse("profiles:profile_settings"))
+        request.user = user
+        request._messages = CookieStorage(request)
+        view(request).render()
+
+    old_dropdown = Template(OLD_DROPDOWN)
+
+    def render_old_dropdown():
+        old_dropdown.render(Context({'form': ProfileSettingsForm(
+            instance=user)}))
+
+    def render_dropdown():
+        str(ProfileSettingsForm(instance=user)['timezone'])
+
+    before = report("timezone dropdown (template loop)",
+                    measure(render_old_dropdown, number))
+    after = report("timezone dropdown (SemanticSelect)",
+                   measure(render_dropdown, number))
+    print("speedup: {0:.1f}x".format(before / after))
+    report("profile settings page", measure(render_page, number))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 500)
@@ -0,0 +1,107 @@
+"""
+Precompression of the static files at collectstatic time.
+
+    $ python -m benchmarks.static_compression [directory]
+
+Copies the static files of the directory (STATIC_ROOT by default, run
+collectstatic first) with hashed names to a temporary directory and times
+core.storage.PrecompressedStorage.compress with one process, with one per
+CPU and again on a redeploy without changes. Prints the page weight of the
+CSS and JS files without compression, with gzip and with brotli.
+"""
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from . import setup_django
+
+EXTENSIONS = (".css", ".js")
+
+
+def copy_hashed(source, target):
+    """Copies the CSS and JS files with the hash in the name, like
+    CachedStaticFilesStorage
+    """
+    names = []
+    for root, dirs, files in os.walk(source):
+        for filename in files:
+            base, ext = os.path.splitext(filename)
+            if ext not in EXTENSIONS:
+                continue
+            with open(os.path.join(root, filename), "rb") as f:
+                digest = hashlib.md5(f.read()).hexdigest()[:12]
+            directory = os.path.relpath(root, source)
+            name = os.path.normpath(os.path.join(
+                directory, "{0}.{1}{2}".format(base, digest, ext)))
+            os.makedirs(os.path.join(target, directory), exist_ok=True)
+            shutil.copy(os.path.join(root, filename),
+                        os.path.join(target, name))
+            names.append(name.replace(os.sep, "/"))
+    return names
+
+
+def weight(directory, names, suffix=""):
+    """Bytes served, the files without a compressed version are served
+    without compression
+    """
+    total = 0
+    for name in names:
+        path = os.path.join(directory, name)
+        if suffix and os.path.exists(path + suffix):
+            path += suffix
+        total += os.path.getsize(path)
+    return total
+
+
+def main(directory=None):
+    setup_django()
+
+    from django.conf import settings
+    from django.test.utils import override_settings
+
+    from core.static import brotli
+    from core.storage import PrecompressedStorage
+
+    directory = directory or settings.STATIC_ROOT
+    target = tempfile.mkdtemp()
+    try:
+        names = copy_hashed(directory, target)
+        print("{0} CSS and JS files, {1} KiB".format(
+            len(names), weight(target, names) // 1024))
+        storage = PrecompressedStorage(location=target)
+
+        for name, workers in (("1 process", 1),
+                              ("{0} processes".format(os.cpu_count()), None),
+                              ("redeploy without changes", None)):
+            if name != "redeploy without changes":
+                skipped = storage.path(storage.SKIPPED_NAME)
+                if os.path.exists(skipped):
+                    os.unlink(skipped)
+                for path in names:
+                    for suffix in (".gz", ".br"):
+                        if os.path.exists(os.path.join(target,
+                                                       path + suffix)):
+                            os.unlink(os.path.join(target, path + suffix))
+            with override_settings(STATIC_COMPRESS_WORKERS=workers):
+                start = time.perf_counter()
+                written = list(storage.compress(names))
+            print("{0:<40} {1:>8.3f}s {2} files written".format(
+                name, time.perf_counter() - start, len(written)))
+
+        print("page weight: {0} KiB, gzip {1} KiB".format(
+            weight(target, names) // 1024,
+            weight(target, names, ".gz") // 1024), end="")
+        if brotli is not None:
+            print(", brotli {0} KiB".format(
+                weight(target, names, ".br") // 1024), end="")
+        print()
+    finally:
+        shutil.rmtree(target)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(args[0] if args else None)
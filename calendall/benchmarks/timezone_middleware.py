@@ -0,0 +1,93 @@
+"""
+Per request overhead of core.middleware.TimezoneMiddleware, with the
+session and auth middlewares in front of it as in the settings.
+
+    $ python -m benchmarks.timezone_middleware [number]
+
+Sessions are signed cookies here so no database is needed, the logged
+user has the timezone in the session (old) and in the timezone cookie
+(new).
+"""
+import sys
+
+import pytz
+
+from . import setup_django, measure, report
+
+
+class NoopMiddleware(object):
+    def process_request(self, request):
+        pass
+
+
+class OldTimezoneMiddleware(object):
+    """TimezoneMiddleware before the tzinfo cache and the anonymous skip"""
+    def process_request(self, request):
+        from django.utils import timezone
+
+        tzname = request.session.get('user-tz')
+        if tzname:
+            timezone.activate(pytz.timezone(tzname))
+        else:
+            try:
+                user_tz = request.user.timezone
+                request.session['user-tz'] = user_tz
+                timezone.activate(pytz.timezone(user_tz))
+            except AttributeError:
+                timezone.deactivate()
+
+
+def main(number=20000):
+    setup_django()
+
+    from django.conf import settings
+    from django.contrib.auth import SESSION_KEY
+    from django.contrib.auth.middleware import AuthenticationMiddleware
+    from django.core import signing
+    from django.contrib.sessions.middleware import SessionMiddleware
+    from django.test import RequestFactory
+    from django.test.utils import override_settings
+
+    from core.middleware import TimezoneMiddleware, TIMEZONE_COOKIE_SALT
+
+    engine = 'django.contrib.sessions.backends.signed_cookies'
+    with override_settings(SESSION_ENGINE=engine):
+        session_middleware = SessionMiddleware()
+        store = session_middleware.SessionStore()
+        # The old middleware reads the session, the new one the cookie
+        store[SESSION_KEY] = "1"
+        store['user-tz'] = "Europe/Madrid"
+        store.save()
+    signer = signing.get_cookie_signer(
+        salt=settings.TIMEZONE_COOKIE_NAME + TIMEZONE_COOKIE_SALT)
+
+    factory = RequestFactory()
+    auth_middleware = AuthenticationMiddleware()
+
+    def run(middleware, cookies):
+        def request():
+            req = factory.get("/")
+            req.COOKIES.update(cookies)
+            session_middleware.process_request(req)
+            auth_middleware.process_request(req)
+            middleware.process_request(req)
+        return request
+
+    logged = {settings.SESSION_COOKIE_NAME: store.session_key,
+              settings.TIMEZONE_COOKIE_NAME: signer.sign("1:Europe/Madrid")}
+    for name, cookies in (("anonymous", {}), ("logged", logged)):
+        # Request building and the other middlewares, subtracted below
+        base = report("no middleware ({0})".format(name),
+                      measure(run(NoopMiddleware(), cookies), number))
+        before = report("old ({0})".format(name),
+                        measure(run(OldTimezoneMiddleware(), cookies),
+                                number))
+        after = report("new ({0})".format(name),
+                       measure(run(TimezoneMiddleware(), cookies), number))
+        print("overhead: old={0:.1f}us new={1:.1f}us".format(
+            max(before - base, 0) * 1e6, max(after - base, 0) * 1e6))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 20000)
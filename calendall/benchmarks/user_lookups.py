@@ -0,0 +1,88 @@
+"""
+Latency of the registration and login user lookups on a big user table.
+
+    $ python -m benchmarks.user_lookups [users] [number]
+
+Seeds 'users' users (1M by default) in a throwaway test database and
+compares the current lookups (lower(email), lower(username) indexes) with
+the old exact and the iexact ones. Meant to run against PostgreSQL, where
+the query plans are printed too (SQLite gets the same indexes).
+"""
+import sys
+import time
+
+from . import setup_django, measure, report
+
+BATCH_SIZE = 10000
+
+
+def seed(users):
+    from profiles.models import CalendallUser
+
+    start = time.perf_counter()
+    for first in range(0, users, BATCH_SIZE):
+        CalendallUser.objects.bulk_create(
+            CalendallUser(username="user-{0}".format(i),
+                          email="User.{0}@Example.com".format(i),
+                          password="!")
+            for i in range(first, min(first + BATCH_SIZE, users)))
+    print("seeded {0} users in {1:.1f}s".format(
+        users, time.perf_counter() - start))
+
+
+def explain(connection, queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN ANALYZE " + sql, params)
+        for row in cursor.fetchall():
+            print("    " + row[0])
+
+
+def main(users=1000000, number=1000):
+    setup_django()
+
+    from django.db import connection
+
+    from profiles import utils
+    from profiles.models import CalendallUser
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        seed(users)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE profiles_calendalluser")
+
+        middle = users // 2
+        email = "user.{0}@example.com".format(middle)
+        username = "USER-{0}".format(middle)
+        objects = CalendallUser.objects
+
+        lookups = (
+            ("email_exists", lambda: utils.email_exists(email),
+             objects.filter(email__lower=email)),
+            ("username_exists", lambda: utils.username_exists(username),
+             objects.filter(username__lower=username.lower())),
+            ("login email lookup",
+             lambda: objects.get(email__lower=email).username,
+             objects.filter(email__lower=email)),
+            ("old email exact (no index)",
+             lambda: objects.filter(email=email).exists(),
+             objects.filter(email=email)),
+            ("email iexact (no index)",
+             lambda: objects.filter(email__iexact=email).exists(),
+             objects.filter(email__iexact=email)),
+        )
+        for name, func, queryset in lookups:
+            report(name, measure(func, number))
+            if connection.vendor == 'postgresql':
+                explain(connection, queryset)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 1000000,
+         int(args[1]) if len(args) > 1 else 1000)
@@ -36,16 +36,18 @@ THIRD_PARTY_APPS = (
 LOCAL_APPS = (
     'core',
     'profiles',
+    'calendars',
 )
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 # ------------- Middleware stuff -------------
 MIDDLEWARE_CLASSES = (
+    'core.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'profiles.middleware.CachedAuthenticationMiddleware',
     'django.contrib.auth.middleware.SessionAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -59,6 +61,43 @@ DOMAIN = "calendall.io"
 
 # ------------- Database stuff -------------
 DATABASES = None
+# Reads from the replicas, writes to default (see core/routers.py)
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+DATABASE_REPLICAS = ()
+# Always read from default, a session is read right after its write
+DATABASE_PRIMARY_APPS = ('sessions',)
+# After a write the client reads from default (replication lag budget)
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_COOKIE_NAME = "primary-db"
+
+# ------------- Cache & session stuff -------------
+# Logged users cached by profiles.middleware.CachedAuthenticationMiddleware
+USER_CACHE_ALIAS = 'users'
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL = 60 * 5  # Seconds
+# Per process, for development and tests. The production settings point
+# them to memcached, the SHARED_CACHES must be (core/checks.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+    },
+    'users': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'users',
+        'TIMEOUT': USER_CACHE_TTL,
+        'OPTIONS': {'MAX_ENTRIES': USER_CACHE_SIZE},
+    },
+}
+SHARED_CACHES = ('sessions', USER_CACHE_ALIAS)
+# The locmem CACHES are only fine with a single process
+LOCAL_CACHES_ALLOWED = True
+# Sessions cached and stored in the database (see core/sessions.py)
+SESSION_ENGINE = 'core.sessions'
+SESSION_CACHE_ALIAS = 'sessions'
 
 # ------------- I18N & L10N stuff -------------
 LANGUAGE_CODE = 'en-us'
@@ -66,10 +105,22 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_L10N = True
 USE_TZ = True
+TIMEZONE_COOKIE_NAME = "user-tz"
+TIMEZONE_COOKIE_AGE = 60 * 60 * 24 * 365
 
 # ------------- Static & template stuff -------------
 STATIC_URL = '/static/'
-STATICFILES_STORAGE = 'pipeline.storage.PipelineCachedStorage'
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# Hashed names and .gz/.br files (see core/static.py)
+STATICFILES_STORAGE = 'core.storage.PrecompressedStorage'
+STATIC_COMPRESS_PATTERNS = ("*.css", "*.js", "*.svg", "*.html", "*.txt",
+                            "*.json", "*.xml", "*.ttf", "*.eot", "*.otf")
+STATIC_COMPRESS_MIN_SIZE = 256  # Bytes
+STATIC_COMPRESS_WORKERS = None  # One per CPU
+# Serve STATIC_ROOT with core.static.serve_static when there isn't a web
+# server in front, the hashed files are cached forever (immutable)
+STATIC_SERVE = False
+STATIC_MAX_AGE = 60 * 60  # Seconds, the files without hash
 STATICFILES_FINDERS = (
     "django.contrib.staticfiles.finders.FileSystemFinder",
     "django.contrib.staticfiles.finders.AppDirectoriesFinder",
@@ -85,8 +136,12 @@ STATICFILES_DIRS = (
     os.path.join(BASE_DIR, 'static'),
 )
 
+# Build output of the inline_email_templates command
+EMAIL_INLINED_TEMPLATES_DIR = os.path.join(BASE_DIR, 'inlined_templates')
+
 TEMPLATE_DIRS = (
     os.path.join(BASE_DIR, 'templates'),
+    EMAIL_INLINED_TEMPLATES_DIR,
 )
 
 PIPELINE_CSS = {
@@ -133,6 +188,33 @@ TEST_EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
 EMAIL_BACKEND = None
 EMAIL_SUPPORT = "support@calendall.com"
 EMAIL_NOREPLY = "noreply@calendall.com"
+# 'sync' sends in the request, 'queue' stores the email in the outbox and the
+# send_queued_email command sends it
+EMAIL_DELIVERY = "sync"
+EMAIL_QUEUE_WORKERS = 4
+EMAIL_QUEUE_BATCH_SIZE = 100
+EMAIL_QUEUE_POLL_INTERVAL = 5  # Seconds
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+EMAIL_QUEUE_RETRY_DELAY = 60  # Seconds, doubles on each attempt
+# Seconds, emails claimed (sending) for longer are requeued, their worker died
+EMAIL_QUEUE_CLAIM_TIMEOUT = 60 * 10
+# Seconds, max wait between attempts when the email server is down
+EMAIL_QUEUE_MAX_BACKOFF = 60 * 5
+# Max stylesheets & parsed CSS rules kept in memory by core.inliner
+EMAIL_CSS_CACHE_SIZE = 32
+# Email templates with the CSS inlined at build time (collectstatic), if
+# they aren't built the CSS is inlined when sending
+EMAIL_USE_INLINED_TEMPLATES = True
+EMAIL_INLINED_TEMPLATES = (
+    "profiles/emails/profiles_email_welcome.html",
+    "profiles/emails/profiles_email_validation.html",
+)
+# Connections kept open by core.smtp.PooledEmailBackend
+EMAIL_POOL_SIZE = 4
+EMAIL_POOL_IDLE_TIMEOUT = 30  # Seconds
+# Emails rendered and sent (or queued) at once by send_templated_emails
+EMAIL_BATCH_CHUNK_SIZE = 100
+# EMAIL_BACKEND = 'core.smtp.PooledEmailBackend'
 # EMAIL_USE_TLS = True
 # EMAIL_HOST = 'smtp.gmail.com'
 # EMAIL_PORT = 587
@@ -141,12 +223,68 @@ EMAIL_NOREPLY = "noreply@calendall.com"
 
 # ------------- User stuff -------------
 AUTH_USER_MODEL = 'profiles.CalendallUser'
+AUTHENTICATION_BACKENDS = ('profiles.backends.EmailOrUsernameBackend',)
+# Seconds until the account tokens (profiles.models.Token) expire
+TOKEN_LIFETIMES = {
+    'validation': 60 * 60 * 24 * 30,
+    'reset': 60 * 60 * 2,
+}
+
+# The first one hashes the new passwords, the rest only verify the old ones
+# and the users get the first one on their next login
+PASSWORD_HASHERS = (
+    'core.hashers.Argon2PasswordHasher',
+    'core.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptPasswordHasher',
+    'django.contrib.auth.hashers.SHA1PasswordHasher',
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+    'django.contrib.auth.hashers.CryptPasswordHasher',
+)
+# Costs, check them with benchmarks/password_hashing.py (~50ms per hash)
+PASSWORD_ARGON2_TIME_COST = 2
+PASSWORD_ARGON2_MEMORY_COST = 19 * 1024  # KiB
+PASSWORD_ARGON2_PARALLELISM = 1
+PASSWORD_BCRYPT_ROUNDS = 10
+
+# Never validated accounts older than this (seconds), without log ins for
+# as long and without calendars, are deleted by the cleanup_accounts command
+UNVALIDATED_ACCOUNT_MAX_AGE = 60 * 60 * 24 * 60
+CLEANUP_BATCH_SIZE = 1000
+CLEANUP_SLEEP = 0.1
 LOGIN_URL = reverse_lazy("profiles:login")
 LOGOUT_URL = reverse_lazy("profiles:logout")
 LOGIN_REDIRECT_URL = reverse_lazy("profiles:login")
 
 # ------------- Gravatar stuff -------------
 GRAVATAR_DEFAULT_IMAGE = "identicon"
+# Avatars served from a local disk cache by core.views.AvatarProxy instead
+# of linking to Gravatar (see core/avatars.py)
+AVATAR_PROXY = True
+AVATAR_UPSTREAM_URL = "https://secure.gravatar.com/"
+AVATAR_UPSTREAM_TIMEOUT = 3  # Seconds
+AVATAR_CACHE_DIR = os.path.join(BASE_DIR, 'avatar_cache')
+# Kept by the prune_avatars command (cron)
+AVATAR_CACHE_MAX_ENTRIES = 100000
+# Pixels, the ones used by the templates (avatar_url), others are rounded up
+AVATAR_SIZES = (30, 80, 150)
+AVATAR_REVALIDATE_AFTER = 60 * 60 * 24  # Seconds
+AVATAR_ERROR_RETRY_AFTER = 60  # Seconds, after an upstream error
+AVATAR_MAX_AGE = 60 * 60 * 24 * 7  # Browser cache, seconds
+
+# ------------- Calendar stuff -------------
+# iCalendar import (see calendars/importer.py)
+CALENDAR_IMPORT_BATCH_SIZE = 500  # Events per INSERT
+CALENDAR_IMPORT_CHUNK_SIZE = 5000  # Events per transaction
+CALENDAR_IMPORT_TIMEOUT = 30  # Seconds, importing from a URL
+# iCalendar export (see calendars/exporter.py)
+CALENDAR_EXPORT_CHUNK_SIZE = 1000  # Events per query
+CALENDAR_EXPORT_MAX_AGE = 60 * 5  # Seconds
+
+# ------------- Test stuff -------------
+# Adds --parallel to the test command
+TEST_RUNNER = 'core.runner.ParallelDiscoverRunner'
 
 # ------------- Logging stuff -------------
 LOGGING = {
@@ -157,6 +295,11 @@ LOGGING = {
             'format': "[%(asctime)s] %(levelname)s [%(name)s:%(lineno)s] %(message)s",
             'datefmt': "%d/%b/%Y %H:%M:%S"
         },
+        # One JSON object per line, for the log aggregators
+        'json': {
+            '()': 'core.logs.JSONFormatter',
+            'datefmt': "%Y-%m-%dT%H:%M:%S%z",
+        },
         'color': {
             '()': 'colorlog.ColoredFormatter',
             'format': "%(log_color)s[%(asctime)s] %(levelname)s [%(name)s:%(lineno)s] %(message)s",
@@ -171,10 +314,13 @@ LOGGING = {
         }
     },
     'handlers': {
+        # Written from a background thread, rotated every 10MiB
         'file': {
             'level': 'DEBUG',
-            'class': 'logging.FileHandler',
+            'class': 'core.logs.BackgroundFileHandler',
             'filename': 'calendall.log',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
             'formatter': 'verbose'
         },
         'console': {
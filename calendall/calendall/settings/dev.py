@@ -38,6 +38,8 @@ MIDDLEWARE_CLASSES = DEV_MIDDLEWARE + MIDDLEWARE_CLASSES
 # EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = 'test-email-output'
+# Templates are edited in development, inline them always when sending
+EMAIL_USE_INLINED_TEMPLATES = False
 
 
 # In Docker the IP changes, Accept always except ajax, with thi method we don't
@@ -0,0 +1,71 @@
+import os
+
+from .base import *
+
+
+DOMAIN = os.getenv("CALENDALL_DOMAIN", "calendall.io")
+SECRET_KEY = os.getenv("CALENDALL_SECRET_KEY")
+ALLOWED_HOSTS = [DOMAIN]
+
+# ------------- Database stuff -------------
+# Persistent connections, checked before their first use in a request
+# (see core/db/backends.py). With a threaded WSGI server set
+# CALENDALL_DB_POOL_SIZE to share that many connections between the
+# threads instead of keeping one per thread
+DB_POOL_SIZE = int(os.getenv("CALENDALL_DB_POOL_SIZE", 0))
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'core.db.postgresql',
+        'NAME': os.getenv("CALENDALL_DB_NAME", "calendall"),
+        'USER': os.getenv("CALENDALL_DB_USER", "calendall"),
+        'PASSWORD': os.getenv("CALENDALL_DB_PASSWORD", ""),
+        'HOST': os.getenv("CALENDALL_DB_HOST", "localhost"),
+        'PORT': os.getenv("CALENDALL_DB_PORT", "5432"),
+        # Seconds, under the server idle timeout
+        'CONN_MAX_AGE': 0 if DB_POOL_SIZE else 600,
+        'CONN_HEALTH_CHECKS': True,
+        'POOL_SIZE': DB_POOL_SIZE,
+        'POOL_TIMEOUT': 10,
+    }
+}
+
+# Read-only replicas of default (see core/routers.py), comma separated
+# hosts in CALENDALL_DB_REPLICA_HOSTS
+for number, host in enumerate(
+        filter(None, os.getenv("CALENDALL_DB_REPLICA_HOSTS", "").split(","))):
+    DATABASES['replica{0}'.format(number)] = dict(
+        DATABASES['default'], HOST=host.strip(), TEST={'MIRROR': 'default'})
+DATABASE_REPLICAS = tuple(alias for alias in sorted(DATABASES)
+                          if alias != 'default')
+
+# ------------- Cache stuff -------------
+# Shared by every process: a logout or a password change must end the
+# session (core/sessions.py) and drop the cached user (profiles/cache.py)
+# in all the workers. Comma separated host:port in
+# CALENDALL_MEMCACHED_LOCATIONS
+MEMCACHED_LOCATIONS = os.getenv("CALENDALL_MEMCACHED_LOCATIONS",
+                                "localhost:11211").split(",")
+CACHES = {
+    alias: {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': [location.strip() for location in MEMCACHED_LOCATIONS],
+        'KEY_PREFIX': alias,
+        'TIMEOUT': CACHES[alias].get('TIMEOUT', 300),
+    } for alias in CACHES
+}
+LOCAL_CACHES_ALLOWED = False
+
+# ------------- Template stuff -------------
+# Compiled once per process, the parents of the templates (extends) too
+TEMPLATE_LOADERS = (
+    ('django.template.loaders.cached.Loader', (
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    )),
+)
+
+# ------------- Logging stuff -------------
+LOGGING['handlers']['file']['filename'] = os.getenv(
+    "CALENDALL_LOG_FILE", "calendall.log")
+LOGGING['handlers']['file']['formatter'] = 'json'
@@ -0,0 +1,14 @@
+from .ci import *
+
+# Fast settings for the test suite, the production hashing and email
+# aren't what the tests check:
+#
+#     $ python manage.py test --settings=calendall.settings.test --parallel=4
+
+# Hashing with the production costs is most of the suite time, the rest of
+# the hashers are kept to test them (core.test_hashers)
+PASSWORD_HASHERS = (
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+) + PASSWORD_HASHERS
+
+EMAIL_BACKEND = TEST_EMAIL_BACKEND
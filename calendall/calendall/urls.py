@@ -4,18 +4,30 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
 
+from calendars import urls as calendar_urls
+from core import urls as core_urls
+from core.static import serve_static
 from profiles import urls as profile_urls
 
 
 urlpatterns = patterns('',
     url(r'^$', TemplateView.as_view(template_name='base.html')),
     url(r'^p/', include(profile_urls, namespace="profiles")),
+    url(r'^c/', include(core_urls, namespace="core")),
+    url(r'^cal/', include(calendar_urls, namespace="calendars")),
     url(r'^admin/', include(admin.site.urls)),
 )
 
 # In production static stuff should be server by http server
 # static handles automatically if the DEBUG is True
-urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+if settings.STATIC_SERVE:
+    urlpatterns += patterns('',
+        url(r'^{0}(?P<path>.*)$'.format(settings.STATIC_URL.lstrip('/')),
+            serve_static, {'document_root': settings.STATIC_ROOT}),
+    )
+else:
+    urlpatterns += static(settings.STATIC_URL,
+                          document_root=settings.STATIC_ROOT)
 
 if settings.DEBUG:
     import debug_toolbar
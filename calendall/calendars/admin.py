@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from .models import Calendar, Event
+
+
+class CalendarAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "owner", "timezone", "updated")
+    raw_id_fields = ("owner",)
+    readonly_fields = ("share_token",)
+
+
+class EventAdmin(admin.ModelAdmin):
+    list_display = ("id", "summary", "calendar", "start", "end", "all_day")
+    raw_id_fields = ("calendar",)
+
+admin.site.register(Calendar, CalendarAdmin)
+admin.site.register(Event, EventAdmin)
@@ -0,0 +1,92 @@
+"""
+Export of a calendar as an iCalendar file.
+
+iter_calendar() yields the document in pieces for StreamingHttpResponse.
+The events are read in CALENDAR_EXPORT_CHUNK_SIZE rows by primary key
+ranges, so neither the rows nor the document are ever in memory whole
+(the iterator() of Django 1.7 on psycopg2 fetches the whole result set).
+"""
+from django.conf import settings
+
+from core.middleware import get_tzinfo
+from .ics import content_line, escape_text, format_date, format_datetime
+from .models import Event
+
+PRODID = "-//Calendall//Calendall//EN"
+
+EXPORT_FIELDS = ("pk", "uid", "summary", "description", "location", "url",
+                 "start", "end", "all_day", "rrule", "updated")
+TEXT_FIELDS = (
+    ("SUMMARY", "summary"),
+    ("DESCRIPTION", "description"),
+    ("LOCATION", "location"),
+)
+
+
+def get_version(calendar):
+    """ETag of the export, Calendar.updated changes with every event"""
+    return '"{0}-{1:.6f}"'.format(calendar.pk, calendar.updated.timestamp())
+
+
+def iter_rows(queryset, chunk_size):
+    """Dicts of EXPORT_FIELDS of the queryset, by primary key ranges"""
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk).order_by("pk")
+                    .values(*EXPORT_FIELDS)[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1]['pk']
+
+
+def format_event(row, tz):
+    lines = [
+        "BEGIN:VEVENT\r\n",
+        content_line("UID", row['uid'] or "{0}@{1}".format(row['pk'],
+                                                             settings.DOMAIN)),
+        content_line("DTSTAMP", format_datetime(row['updated'])),
+    ]
+    if row['all_day']:
+        lines.append(content_line("DTSTART;VALUE=DATE",
+                                  format_date(row['start'], tz)))
+        if row['end']:
+            lines.append(content_line("DTEND;VALUE=DATE",
+                                      format_date(row['end'], tz)))
+    else:
+        lines.append(content_line("DTSTART", format_datetime(row['start'])))
+        if row['end']:
+            lines.append(content_line("DTEND", format_datetime(row['end'])))
+    for name, field in TEXT_FIELDS:
+        if row[field]:
+            lines.append(content_line(name, escape_text(row[field])))
+    if row['url']:
+        lines.append(content_line("URL", row['url']))
+    if row['rrule']:
+        lines.append(content_line("RRULE", row['rrule']))
+    lines.append("END:VEVENT\r\n")
+    return "".join(lines)
+
+
+def iter_calendar(calendar, chunk_size=None):
+    """Pieces of the iCalendar document of the calendar"""
+    chunk_size = chunk_size or settings.CALENDAR_EXPORT_CHUNK_SIZE
+    tz = get_tzinfo(calendar.timezone)
+    yield "".join((
+        "BEGIN:VCALENDAR\r\n",
+        "VERSION:2.0\r\n",
+        content_line("PRODID", PRODID),
+        "CALSCALE:GREGORIAN\r\n",
+        content_line("X-WR-CALNAME", escape_text(calendar.name)),
+        content_line("X-WR-TIMEZONE", calendar.timezone),
+    ))
+
+    events = []
+    rows = iter_rows(Event.objects.filter(calendar=calendar), chunk_size)
+    for row in rows:
+        events.append(format_event(row, tz))
+        if len(events) == chunk_size:
+            yield "".join(events)
+            events = []
+    events.append("END:VCALENDAR\r\n")
+    yield "".join(events)
@@ -0,0 +1,267 @@
+"""
+Streaming iCalendar (RFC 5545) parser and writer.
+
+EventReader reads the lines of an .ics file (any iterable of lines, like
+an open file or an HTTP response wrapped in io.TextIOWrapper) and yields
+the VEVENTs one by one as dicts of calendars.models.Event fields. Only the
+properties of the current event are kept so the memory doesn't depend on
+the size of the file.
+
+    with open(path, encoding="utf-8", newline="") as f:
+        for event in EventReader(f, default_tz=pytz.timezone(tzname)):
+            ...
+
+The invalid events (no DTSTART, bad dates, malformed lines) are skipped
+and counted in EventReader.skipped. Recurrence rules are kept as text.
+
+content_line() and the format_* functions write the lines of the export
+(see calendars/exporter.py).
+"""
+from datetime import datetime, timedelta
+import logging
+import re
+
+import pytz
+
+from core.middleware import get_tzinfo
+
+log = logging.getLogger(__name__)
+
+# Properties of the events, the rest are ignored
+EVENT_PROPERTIES = frozenset((
+    "UID", "SUMMARY", "DESCRIPTION", "LOCATION", "URL", "DTSTART", "DTEND",
+    "DURATION", "RRULE",
+))
+TEXT_PROPERTIES = (
+    ("UID", "uid"),
+    ("SUMMARY", "summary"),
+    ("DESCRIPTION", "description"),
+    ("LOCATION", "location"),
+    ("URL", "url"),
+    ("RRULE", "rrule"),
+)
+
+TEXT_ESCAPE_RE = re.compile(r"\\(.)")
+TEXT_ESCAPES = {"n": "\n", "N": "\n"}
+TEXT_SPECIAL_RE = re.compile(r"[\\;,\n]")
+TEXT_ESCAPED = {"\\": "\\\\", ";": "\\;", ",": "\\,", "\n": "\\n"}
+# Octets per line, without the line break
+LINE_LENGTH = 75
+DURATION_RE = re.compile(
+    r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?"
+    r"(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+
+
+class ICSError(ValueError):
+    pass
+
+
+def unfold(lines):
+    """Yields (line number, logical line) of the physical lines
+
+    The folded lines (continued in the next lines starting with a space or a
+    tab) are joined and the line breaks removed.
+    """
+    current = None
+    start = 0
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if current is not None and line[:1] in (" ", "\t"):
+            current.append(line[1:])
+            continue
+        if current is not None:
+            yield start, "".join(current)
+        current, start = ([line], number) if line else (None, 0)
+    if current is not None:
+        yield start, "".join(current)
+
+
+def _split_quoted(line):
+    # The separators inside the quoted parameter values don't count
+    parts = []
+    quoted = False
+    start = 0
+    for i, c in enumerate(line):
+        if c == '"':
+            quoted = not quoted
+        elif not quoted and c in ";:":
+            parts.append(line[start:i])
+            start = i + 1
+            if c == ":":
+                return parts, line[start:]
+    raise ICSError("no value")
+
+
+def parse_line(line):
+    """Returns (NAME, {PARAM: value}, value) of a content line"""
+    head, sep, value = line.partition(":")
+    if not sep:
+        raise ICSError("no value")
+    if '"' in head:
+        parts, value = _split_quoted(line)
+    else:
+        parts = head.split(";")
+
+    params = {}
+    for param in parts[1:]:
+        key, sep, param_value = param.partition("=")
+        if not sep:
+            raise ICSError("bad parameter '{0}'".format(param))
+        params[key.upper()] = param_value.strip('"')
+    return parts[0].upper(), params, value
+
+
+def unescape_text(value):
+    return TEXT_ESCAPE_RE.sub(
+        lambda m: TEXT_ESCAPES.get(m.group(1), m.group(1)), value)
+
+
+def get_timezone(tzid, default_tz):
+    """pytz timezone of a TZID, default_tz if it is unknown"""
+    # Some producers prefix the Olson name, like /mozilla.org/.../Europe/Paris
+    for name in (tzid, "/".join(tzid.split("/")[-2:]),
+                 tzid.rpartition("/")[2]):
+        try:
+            return get_tzinfo(name)
+        except pytz.UnknownTimeZoneError:
+            continue
+    return default_tz
+
+
+def parse_date(params, value, default_tz):
+    """Returns (aware datetime, all day) of a DATE or DATE-TIME value"""
+    value = value.strip()
+    try:
+        if params.get("VALUE") == "DATE" or len(value) == 8:
+            date = datetime(int(value[:4]), int(value[4:6]), int(value[6:8]))
+            return default_tz.localize(date), True
+        if len(value) not in (15, 16) or value[8] != "T":
+            raise ValueError()
+        date = datetime(int(value[:4]), int(value[4:6]), int(value[6:8]),
+                        int(value[9:11]), int(value[11:13]),
+                        int(value[13:15]))
+    except ValueError:
+        raise ICSError("bad date '{0}'".format(value))
+
+    if value.endswith("Z"):
+        return date.replace(tzinfo=pytz.utc), False
+    tz = default_tz
+    if "TZID" in params:
+        tz = get_timezone(params["TZID"], default_tz)
+    return tz.localize(date), False
+
+
+def parse_duration(value):
+    match = DURATION_RE.match(value.strip())
+    if match is None or not any(match.groups()[1:]):
+        raise ICSError("bad duration '{0}'".format(value))
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(weeks=int(weeks or 0), days=int(days or 0),
+                         hours=int(hours or 0), minutes=int(minutes or 0),
+                         seconds=int(seconds or 0))
+    return -duration if sign == "-" else duration
+
+
+def build_event(properties, default_tz):
+    """Event fields of the VEVENT properties ({NAME: (params, value)})"""
+    if "DTSTART" not in properties:
+        raise ICSError("no DTSTART")
+    start, all_day = parse_date(*properties["DTSTART"],
+                                default_tz=default_tz)
+    end = None
+    if "DTEND" in properties:
+        end = parse_date(*properties["DTEND"], default_tz=default_tz)[0]
+    elif "DURATION" in properties:
+        end = start + parse_duration(properties["DURATION"][1])
+
+    event = {'start': start, 'end': end, 'all_day': all_day}
+    for name, field in TEXT_PROPERTIES:
+        if name in properties:
+            event[field] = unescape_text(properties[name][1])
+    return event
+
+
+class EventReader(object):
+    """Iterable of the events of the iCalendar lines"""
+
+    def __init__(self, lines, default_tz=pytz.utc):
+        self.lines = lines
+        self.default_tz = default_tz
+        self.skipped = 0
+
+    def __iter__(self):
+        components = []
+        # {NAME: (params, value)} of the current event, None out of events
+        properties = None
+        error = None
+        start = 0
+        for number, line in unfold(self.lines):
+            try:
+                name, params, value = parse_line(line)
+            except ICSError as e:
+                if properties is not None and error is None:
+                    error = "line {0}: {1}".format(number, e)
+                continue
+
+            if name == "BEGIN":
+                components.append(value.upper())
+                if components[-1] == "VEVENT" and properties is None:
+                    properties, error, start = {}, None, number
+            elif name == "END":
+                component = components.pop() if components else None
+                if (component == "VEVENT" and properties is not None and
+                        "VEVENT" not in components):
+                    event = self.end_event(properties, error, start)
+                    properties = None
+                    if event is not None:
+                        yield event
+            elif (properties is not None and components[-1] == "VEVENT" and
+                    name in EVENT_PROPERTIES and name not in properties):
+                properties[name] = (params, value)
+
+    def end_event(self, properties, error, start):
+        if error is None:
+            try:
+                return build_event(properties, self.default_tz)
+            except ICSError as e:
+                error = str(e)
+        self.skipped += 1
+        log.warning("Skipped the event at line %d: %s", start, error)
+        return None
+
+
+def escape_text(value):
+    return TEXT_SPECIAL_RE.sub(lambda m: TEXT_ESCAPED[m.group(0)],
+                                 value.replace("\r\n", "\n"))
+
+
+def content_line(name, value):
+    """The line ending in CRLF, folded every LINE_LENGTH octets"""
+    line = "{0}:{1}".format(name, value)
+    data = line.encode("utf-8")
+    if len(data) <= LINE_LENGTH:
+        return line + "\r\n"
+
+    parts = []
+    limit = LINE_LENGTH
+    while len(data) > limit:
+        cut = limit
+        # Don't split a UTF-8 character
+        while data[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(data[:cut])
+        data = data[cut:]
+        # The leading space of the continuation lines counts
+        limit = LINE_LENGTH - 1
+    parts.append(data)
+    return b"\r\n ".join(parts).decode("utf-8") + "\r\n"
+
+
+def format_datetime(value):
+    """UTC DATE-TIME value"""
+    return value.astimezone(pytz.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def format_date(value, tz):
+    """DATE value, the day in the timezone"""
+    return value.astimezone(tz).strftime("%Y%m%d")
@@ -0,0 +1,141 @@
+"""
+Import of iCalendar files into a calendar.
+
+The events are read with calendars.ics.EventReader and written with
+bulk_create, CALENDAR_IMPORT_BATCH_SIZE events per query and
+CALENDAR_IMPORT_CHUNK_SIZE events per transaction. Only a chunk of events
+is in memory at once.
+"""
+from io import TextIOWrapper
+from itertools import islice
+import logging
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import AutoField, CharField, Max
+from django.utils import timezone
+
+from core.middleware import get_tzinfo
+from .ics import EventReader
+from .models import Calendar, Event
+
+log = logging.getLogger(__name__)
+
+# pks per DELETE of the events of a failed replace, under the SQLite limit
+DELETE_BATCH_SIZE = 500
+
+
+class ImportResult(object):
+
+    def __init__(self, created=0, skipped=0):
+        self.created = created
+        self.skipped = skipped
+
+    def __repr__(self):
+        return "<ImportResult created={0} skipped={1}>".format(
+            self.created, self.skipped)
+
+
+def _max_lengths():
+    return {f.name: f.max_length for f in Event._meta.concrete_fields
+            if isinstance(f, CharField) and f.max_length}
+
+
+def _truncate(fields, max_lengths):
+    for name, value in fields.items():
+        if name in max_lengths and len(value) > max_lengths[name]:
+            fields[name] = value[:max_lengths[name]]
+    return fields
+
+
+def _batch_size(batch_size, using, objs):
+    # Django 1.7 doesn't limit the given batch size to what the database
+    # supports (999 variables in a SQLite query)
+    fields = [f for f in Event._meta.concrete_fields
+              if not isinstance(f, AutoField)]
+    supported = connections[using].ops.bulk_batch_size(fields, objs)
+    return max(1, min(batch_size, supported))
+
+
+def _create_chunk(calendar, objs, batch_size, using, track):
+    """Inserts the events in a transaction. With 'track' returns their pks
+    (bulk_create doesn't set them)
+    """
+    with transaction.atomic(using=using):
+        if not track:
+            Event.objects.using(using).bulk_create(
+                objs, _batch_size(batch_size, using, objs))
+            return []
+        # The calendar is locked (Event.save updates it too), the events
+        # inserted into it after the max pk are these
+        list(Calendar.objects.using(using).select_for_update()
+             .filter(pk=calendar.pk).values_list("pk", flat=True))
+        events = Event.objects.using(using).filter(calendar=calendar)
+        last_pk = events.aggregate(pk__max=Max('pk'))['pk__max'] or 0
+        Event.objects.using(using).bulk_create(
+            objs, _batch_size(batch_size, using, objs))
+        return list(events.filter(pk__gt=last_pk)
+                    .values_list("pk", flat=True))
+
+
+def import_events(calendar, lines, batch_size=None, chunk_size=None,
+                  replace=False):
+    """Imports the events of the iCalendar lines into the calendar
+
+    With 'replace' the events the calendar had are deleted after the last
+    chunk is imported, and on an error the events created by the import
+    are deleted instead. The replace isn't atomic: every chunk is
+    committed, meanwhile the calendar has the old and the new events.
+    Returns an ImportResult.
+    """
+    batch_size = batch_size or settings.CALENDAR_IMPORT_BATCH_SIZE
+    chunk_size = chunk_size or settings.CALENDAR_IMPORT_CHUNK_SIZE
+    using = router.db_for_write(Event)
+    max_lengths = _max_lengths()
+
+    reader = EventReader(lines, default_tz=get_tzinfo(calendar.timezone))
+    events = iter(reader)
+    chunks = iter(lambda: list(islice(events, chunk_size)), [])
+    result = ImportResult()
+    # The new events have greater pks than the old ones
+    old_events = calendar.events.using(using)
+    old_max = old_events.aggregate(pk__max=Max('pk'))['pk__max'] or 0
+    old_events = old_events.filter(pk__lte=old_max)
+    created_pks = []
+    try:
+        for chunk in chunks:
+            objs = [Event(calendar=calendar,
+                          **_truncate(fields, max_lengths))
+                    for fields in chunk]
+            created_pks.extend(
+                _create_chunk(calendar, objs, batch_size, using, replace))
+            result.created += len(objs)
+            log.debug("Imported %d events into calendar %s", result.created,
+                      calendar.pk)
+    except BaseException:
+        if created_pks:
+            log.warning("Import into calendar %s failed, deleting its %d "
+                        "events", calendar.pk, len(created_pks))
+            created = calendar.events.using(using)
+            for i in range(0, len(created_pks), DELETE_BATCH_SIZE):
+                created.filter(
+                    pk__in=created_pks[i:i + DELETE_BATCH_SIZE]).delete()
+        raise
+    if replace:
+        old_events.delete()
+
+    result.skipped = reader.skipped
+    Calendar.objects.filter(pk=calendar.pk).update(updated=timezone.now())
+    log.info("Imported %d events into calendar %s, %d skipped",
+             result.created, calendar.pk, result.skipped)
+    return result
+
+
+def open_ics(source):
+    """Text file of a path or an http(s) URL, read line by line"""
+    if source.startswith(("http://", "https://")):
+        response = urlopen(source, timeout=settings.CALENDAR_IMPORT_TIMEOUT)
+        return TextIOWrapper(response, encoding="utf-8", errors="replace",
+                             newline="")
+    return open(source, encoding="utf-8", errors="replace", newline="")
@@ -0,0 +1,55 @@
+from optparse import make_option
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from calendars.importer import import_events, open_ics
+from calendars.models import Calendar
+
+
+class Command(BaseCommand):
+    args = "<calendar id> <path or url>"
+    help = "Imports the events of an iCalendar (.ics) file into a calendar"
+
+    option_list = BaseCommand.option_list + (
+        make_option('--batch',
+                    type='int',
+                    dest='batch',
+                    default=settings.CALENDAR_IMPORT_BATCH_SIZE,
+                    help='Events inserted per query'),
+        make_option('--chunk',
+                    type='int',
+                    dest='chunk',
+                    default=settings.CALENDAR_IMPORT_CHUNK_SIZE,
+                    help='Events inserted per transaction'),
+        make_option('--replace',
+                    action='store_true',
+                    dest='replace',
+                    default=False,
+                    help='Replace the events of the calendar'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 2:
+            raise CommandError("Usage: import_ics {0}".format(self.args))
+        try:
+            calendar = Calendar.objects.get(pk=args[0])
+        except (Calendar.DoesNotExist, ValueError):
+            raise CommandError("Calendar '{0}' not found".format(args[0]))
+
+        start = time.perf_counter()
+        try:
+            with open_ics(args[1]) as lines:
+                result = import_events(calendar, lines,
+                                       batch_size=options['batch'],
+                                       chunk_size=options['chunk'],
+                                       replace=options['replace'])
+        except OSError as e:
+            raise CommandError("Error reading '{0}': {1}".format(args[1], e))
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write("{0} events imported, {1} skipped in {2:.1f}s "
+                          "({3:.0f} events/s)".format(
+                              result.created, result.skipped, elapsed,
+                              result.created / elapsed if elapsed else 0))
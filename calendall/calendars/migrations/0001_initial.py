@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.conf import settings
+import core.timezones
+import core.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Calendar',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('name', models.CharField(verbose_name='name', max_length=100)),
+                ('description', models.TextField(verbose_name='description', blank=True)),
+                ('timezone', core.timezones.TimezoneField(verbose_name='timezone', max_length=40, default='UTC', validators=[core.validators.validate_timezone])),
+                ('created', models.DateTimeField(verbose_name='created', auto_now_add=True)),
+                ('updated', models.DateTimeField(verbose_name='updated', auto_now=True)),
+                ('owner', models.ForeignKey(related_name='calendars', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+            },
+            bases=(models.Model,),
+        ),
+        migrations.CreateModel(
+            name='Event',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('uid', models.CharField(verbose_name='uid', max_length=255, blank=True)),
+                ('summary', models.CharField(verbose_name='summary', max_length=255, blank=True)),
+                ('description', models.TextField(verbose_name='description', blank=True)),
+                ('location', models.CharField(verbose_name='location', max_length=255, blank=True)),
+                ('url', models.URLField(verbose_name='url', max_length=255, blank=True)),
+                ('start', models.DateTimeField(verbose_name='start')),
+                ('end', models.DateTimeField(verbose_name='end', blank=True, null=True)),
+                ('all_day', models.BooleanField(verbose_name='all day', default=False)),
+                ('rrule', models.CharField(verbose_name='recurrence rule', max_length=255, blank=True)),
+                ('updated', models.DateTimeField(verbose_name='updated', auto_now=True)),
+                ('calendar', models.ForeignKey(related_name='events', to='calendars.Calendar')),
+            ],
+            options={
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterIndexTogether(
+            name='event',
+            index_together=set([('calendar', 'start')]),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import uuid
+
+from django.db import models, migrations
+import calendars.models
+
+
+def set_share_tokens(apps, schema_editor):
+    """A different token for every existing calendar"""
+    Calendar = apps.get_model("calendars", "Calendar")
+    for pk in Calendar.objects.values_list("pk", flat=True).iterator():
+        Calendar.objects.filter(pk=pk).update(share_token=uuid.uuid4().hex)
+
+
+def noop(apps, schema_editor):
+    """The column is removed"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendars', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendar',
+            name='share_token',
+            field=models.CharField(verbose_name='share token', max_length=32, null=True, editable=False),
+            preserve_default=True,
+        ),
+        migrations.RunPython(set_share_tokens, noop),
+        migrations.AlterField(
+            model_name='calendar',
+            name='share_token',
+            field=models.CharField(verbose_name='share token', max_length=32, unique=True, editable=False, default=calendars.models.make_share_token),
+            preserve_default=True,
+        ),
+    ]
@@ -0,0 +1,73 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+from django.utils.encoding import python_2_unicode_compatible
+
+from core.timezones import TimezoneField
+from core.validators import validate_timezone
+
+
+def make_share_token():
+    return uuid.uuid4().hex
+
+
+@python_2_unicode_compatible
+class Calendar(models.Model):
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL,
+                              related_name="calendars")
+    name = models.CharField(_("name"), max_length=100)
+    description = models.TextField(_("description"), blank=True)
+    # Of the events without timezone (floating)
+    timezone = TimezoneField(_("timezone"),
+                             default='UTC',
+                             validators=[validate_timezone])
+    created = models.DateTimeField(_("created"), auto_now_add=True)
+    # Of the calendar or any of its events
+    updated = models.DateTimeField(_("updated"), auto_now=True)
+    # Unguessable key of the export URL, anyone with it can read the events
+    share_token = models.CharField(_("share token"), max_length=32,
+                                   unique=True, editable=False,
+                                   default=make_share_token)
+
+    def __str__(self):
+        return self.name
+
+
+@python_2_unicode_compatible
+class Event(models.Model):
+    calendar = models.ForeignKey(Calendar, related_name="events")
+    # iCalendar UID, the instances of a recurring event share it
+    uid = models.CharField(_("uid"), max_length=255, blank=True)
+    summary = models.CharField(_("summary"), max_length=255, blank=True)
+    description = models.TextField(_("description"), blank=True)
+    location = models.CharField(_("location"), max_length=255, blank=True)
+    url = models.URLField(_("url"), max_length=255, blank=True)
+    start = models.DateTimeField(_("start"))
+    end = models.DateTimeField(_("end"), null=True, blank=True)
+    all_day = models.BooleanField(_("all day"), default=False)
+    # iCalendar RRULE value
+    rrule = models.CharField(_("recurrence rule"), max_length=255,
+                             blank=True)
+    updated = models.DateTimeField(_("updated"), auto_now=True)
+
+    class Meta:
+        index_together = (("calendar", "start"),)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.touch_calendar()
+
+    def delete(self, *args, **kwargs):
+        super().delete(*args, **kwargs)
+        self.touch_calendar()
+
+    def touch_calendar(self):
+        # Calendar.updated is the version of the export (ETag)
+        Calendar.objects.filter(pk=self.calendar_id).update(
+            updated=timezone.now())
+
+    def __str__(self):
+        return self.summary or self.uid
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytz
+from django.conf import settings
+from django.test import TestCase
+
+from profiles.models import CalendallUser
+from .exporter import get_version, iter_calendar, iter_rows
+from .ics import EventReader
+from .models import Calendar, Event
+
+MADRID = pytz.timezone("Europe/Madrid")
+
+
+class ExporterTestCase(TestCase):
+
+    def setUp(self):
+        user = CalendallUser.objects.create(username="batman",
+                                            email="darkknight@gmail.com")
+        self.calendar = Calendar.objects.create(owner=user, name="Gotham",
+                                                timezone="Europe/Madrid")
+
+    def add_event(self, **kwargs):
+        kwargs.setdefault("start", MADRID.localize(datetime(2015, 1, 17, 10)))
+        return Event.objects.create(calendar=self.calendar, **kwargs)
+
+    def export(self, chunk_size=None):
+        return "".join(iter_calendar(self.calendar, chunk_size))
+
+    def test_roundtrip(self):
+        start = MADRID.localize(datetime(2015, 1, 17, 10))
+        self.add_event(uid="1@calendall.io", summary="Gotham meetup, again",
+                       description="Batman; Robin\nin the Batcave. " * 5,
+                       location="Batcave", url="http://calendall.io",
+                       start=start, end=start + timedelta(hours=2),
+                       rrule="FREQ=WEEKLY;COUNT=4")
+        joker = self.add_event(summary="Joker day", all_day=True,
+                               start=MADRID.localize(datetime(2015, 1, 20)),
+                               end=MADRID.localize(datetime(2015, 1, 21)))
+
+        document = self.export()
+        self.assertTrue(document.startswith("BEGIN:VCALENDAR\r\n"))
+        self.assertTrue(document.endswith("END:VCALENDAR\r\n"))
+        self.assertIn("X-WR-TIMEZONE:Europe/Madrid\r\n", document)
+        for line in document.split("\r\n"):
+            self.assertLessEqual(len(line.encode("utf-8")), 75)
+
+        timed, all_day = EventReader(document.splitlines(True),
+                                     default_tz=MADRID)
+        self.assertEqual(timed['uid'], "1@calendall.io")
+        self.assertEqual(timed['summary'], "Gotham meetup, again")
+        self.assertEqual(timed['description'],
+                         "Batman; Robin\nin the Batcave. " * 5)
+        self.assertEqual(timed['url'], "http://calendall.io")
+        self.assertEqual(timed['rrule'], "FREQ=WEEKLY;COUNT=4")
+        self.assertEqual((timed['start'], timed['end']),
+                         (start, start + timedelta(hours=2)))
+
+        # Without UID, from the primary key
+        self.assertEqual(all_day['uid'],
+                         "{0}@{1}".format(joker.pk, settings.DOMAIN))
+        self.assertTrue(all_day['all_day'])
+        self.assertEqual(all_day['start'],
+                         MADRID.localize(datetime(2015, 1, 20)))
+
+    def test_chunks(self):
+        for i in range(7):
+            self.add_event(summary="Event {0}".format(i))
+        events = Event.objects.filter(calendar=self.calendar)
+
+        with self.assertNumQueries(3):
+            rows = list(iter_rows(events, 3))
+        self.assertEqual([r['summary'] for r in rows],
+                         ["Event {0}".format(i) for i in range(7)])
+
+        # The header, 3 + 3 events and the last event with the end
+        pieces = list(iter_calendar(self.calendar, 3))
+        self.assertEqual(len(pieces), 4)
+        self.assertEqual(pieces[1].count("BEGIN:VEVENT"), 3)
+        self.assertEqual(self.export(), self.export(chunk_size=100))
+
+    def test_version(self):
+        version = get_version(self.calendar)
+        event = self.add_event(summary="Joker day")
+        self.assertNotEqual(get_version(Calendar.objects.get()), version)
+
+        version = get_version(Calendar.objects.get())
+        event.delete()
+        self.assertNotEqual(get_version(Calendar.objects.get()), version)
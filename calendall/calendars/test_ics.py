@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta
+
+import pytz
+from django.test import SimpleTestCase
+
+from .ics import (EventReader, ICSError, content_line, escape_text,
+                  parse_duration, parse_line, unescape_text, unfold)
+
+MADRID = pytz.timezone("Europe/Madrid")
+
+ICS = """BEGIN:VCALENDAR\r
+VERSION:2.0\r
+PRODID:-//Calendall//Tests//EN\r
+BEGIN:VTIMEZONE\r
+TZID:Europe/Madrid\r
+BEGIN:STANDARD\r
+DTSTART:19701025T030000\r
+END:STANDARD\r
+END:VTIMEZONE\r
+BEGIN:VEVENT\r
+UID:1@calendall.io\r
+DTSTART;TZID=Europe/Madrid:20150117T100000\r
+DTEND;TZID=Europe/Madrid:20150117T120000\r
+SUMMARY:Gotham meetup\\, again\r
+DESCRIPTION:Batman and Robin\\nin the Batcave. A long description tha\r
+ t is folded\r
+LOCATION;ALTREP="http://example.com/a;b:c":Batcave\r
+RRULE:FREQ=WEEKLY;COUNT=4\r
+BEGIN:VALARM\r
+DESCRIPTION:Alarm\r
+TRIGGER:-PT15M\r
+END:VALARM\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:2@calendall.io\r
+DTSTART;VALUE=DATE:20150120\r
+DTEND;VALUE=DATE:20150121\r
+SUMMARY:Joker day\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:3@calendall.io\r
+DTSTART:20150121T100000Z\r
+DURATION:PT1H30M\r
+SUMMARY:UTC\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:4@calendall.io\r
+DTSTART:20150122T100000\r
+SUMMARY:Floating\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:no-start@calendall.io\r
+SUMMARY:Invalid\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:bad-date@calendall.io\r
+DTSTART:2015-01-22\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+
+class ICSParsingTestCase(SimpleTestCase):
+
+    def test_unfold(self):
+        lines = ["A:1\r\n", "B:2\r\n", " 3\r\n", "\t4\n", "\r\n", "C:5"]
+        self.assertEqual(list(unfold(lines)),
+                         [(1, "A:1"), (2, "B:234"), (6, "C:5")])
+
+    def test_parse_line(self):
+        self.assertEqual(parse_line("DTSTART;TZID=Europe/Madrid:20150117"),
+                         ("DTSTART", {'TZID': "Europe/Madrid"}, "20150117"))
+        self.assertEqual(
+            parse_line('location;ALTREP="http://a;b:c":Batcave: 1'),
+            ("LOCATION", {'ALTREP': "http://a;b:c"}, "Batcave: 1"))
+        for line in ("NOVALUE", 'A;B="x:y', "A;B:c"):
+            with self.assertRaises(ICSError):
+                parse_line(line)
+
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration("PT1H30M"),
+                         timedelta(hours=1, minutes=30))
+        self.assertEqual(parse_duration("P1W2D"), timedelta(days=9))
+        self.assertEqual(parse_duration("-PT15M"), timedelta(minutes=-15))
+        for value in ("P", "1H", "PT"):
+            with self.assertRaises(ICSError):
+                parse_duration(value)
+
+    def test_escape_text(self):
+        value = "Batman; Robin, \\o/\r\nBatcave"
+        self.assertEqual(escape_text(value),
+                         "Batman\\; Robin\\, \\\\o/\\nBatcave")
+        self.assertEqual(unescape_text(escape_text(value)),
+                         value.replace("\r\n", "\n"))
+
+    def test_content_line(self):
+        self.assertEqual(content_line("SUMMARY", "Joker"),
+                         "SUMMARY:Joker\r\n")
+
+        value = "ñ" * 100
+        line = content_line("DESCRIPTION", value)
+        self.assertTrue(line.endswith("\r\n"))
+        folded = line[:-2].split("\r\n")
+        self.assertGreater(len(folded), 1)
+        for part in folded:
+            self.assertLessEqual(len(part.encode("utf-8")), 75)
+        self.assertEqual(list(unfold(line.splitlines(True))),
+                         [(1, "DESCRIPTION:" + value)])
+
+
+class EventReaderTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.reader = EventReader(ICS.splitlines(True), default_tz=MADRID)
+        self.events = list(self.reader)
+
+    def test_events(self):
+        self.assertEqual([e['uid'] for e in self.events],
+                         ["1@calendall.io", "2@calendall.io",
+                          "3@calendall.io", "4@calendall.io"])
+        self.assertEqual(self.reader.skipped, 2)
+
+        event = self.events[0]
+        self.assertEqual(event['summary'], "Gotham meetup, again")
+        self.assertEqual(event['description'],
+                         "Batman and Robin\nin the Batcave. A long "
+                         "description that is folded")
+        self.assertEqual(event['location'], "Batcave")
+        self.assertEqual(event['rrule'], "FREQ=WEEKLY;COUNT=4")
+        self.assertFalse(event['all_day'])
+
+    def test_dates(self):
+        timed, all_day, utc, floating = self.events
+        self.assertEqual(timed['start'],
+                         MADRID.localize(datetime(2015, 1, 17, 10)))
+        self.assertEqual(timed['end'] - timed['start'], timedelta(hours=2))
+
+        self.assertTrue(all_day['all_day'])
+        self.assertEqual(all_day['start'],
+                         MADRID.localize(datetime(2015, 1, 20)))
+        self.assertEqual(all_day['end'] - all_day['start'],
+                         timedelta(days=1))
+
+        self.assertEqual(utc['start'],
+                         datetime(2015, 1, 21, 10, tzinfo=pytz.utc))
+        self.assertEqual(utc['end'] - utc['start'],
+                         timedelta(hours=1, minutes=30))
+
+        # Without timezone, in the timezone of the calendar
+        self.assertEqual(floating['start'],
+                         MADRID.localize(datetime(2015, 1, 22, 10)))
+        self.assertIsNone(floating['end'])
+
+    def test_generator(self):
+        def lines():
+            yield "BEGIN:VCALENDAR\r\n"
+            for i in range(3):
+                yield "BEGIN:VEVENT\r\n"
+                yield "DTSTART:20150101T000000Z\r\n"
+                yield "END:VEVENT\r\n"
+            # Unfolding reads a line ahead
+            yield "END:VCALENDAR\r\n"
+            raise AssertionError("Read past the end of the third event")
+
+        events = iter(EventReader(lines()))
+        for i in range(3):
+            self.assertEqual(next(events)['start'].year, 2015)
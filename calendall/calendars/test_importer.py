@@ -0,0 +1,141 @@
+from datetime import datetime
+import os
+import shutil
+import tempfile
+
+import pytz
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.six import StringIO
+
+from profiles.models import CalendallUser
+from .importer import import_events
+from .models import Calendar, Event
+
+
+def make_ics(number, start=0):
+    yield "BEGIN:VCALENDAR\r\n"
+    for i in range(start, start + number):
+        yield "BEGIN:VEVENT\r\n"
+        yield "UID:{0}@calendall.io\r\n".format(i)
+        yield "DTSTART:20150101T{0:02d}0000\r\n".format(i % 24)
+        yield "SUMMARY:Event {0}\r\n".format(i)
+        yield "END:VEVENT\r\n"
+    yield "END:VCALENDAR\r\n"
+
+
+class ImportEventsTestCase(TestCase):
+
+    def setUp(self):
+        user = CalendallUser.objects.create(username="batman",
+                                            email="darkknight@gmail.com")
+        self.calendar = Calendar.objects.create(owner=user, name="Gotham",
+                                                timezone="Europe/Madrid")
+
+    def test_import(self):
+        result = import_events(self.calendar, make_ics(3))
+        self.assertEqual((result.created, result.skipped), (3, 0))
+
+        events = self.calendar.events.order_by("pk")
+        self.assertEqual([e.summary for e in events],
+                         ["Event 0", "Event 1", "Event 2"])
+        # In the timezone of the calendar
+        self.assertEqual(events[1].start, pytz.timezone(
+            "Europe/Madrid").localize(datetime(2015, 1, 1, 1)))
+
+    def test_batches_and_chunks(self):
+        with CaptureQueriesContext(connection) as queries:
+            result = import_events(self.calendar, make_ics(25),
+                                   batch_size=4, chunk_size=10)
+        self.assertEqual(result.created, 25)
+        self.assertEqual(self.calendar.events.count(), 25)
+
+        sql = [q['sql'] for q in queries.captured_queries]
+        inserts = [s for s in sql if "INSERT INTO" in s]
+        # 10 + 10 + 5 events, 4 per INSERT
+        self.assertEqual(len(inserts), 3 + 3 + 2)
+        # A transaction (savepoint in the test) per chunk
+        self.assertEqual(len([s for s in sql if "SAVEPOINT" in s and
+                              "RELEASE" not in s]), 3)
+
+    def test_replace(self):
+        import_events(self.calendar, make_ics(5))
+        result = import_events(self.calendar, make_ics(2, start=10),
+                               replace=True)
+        self.assertEqual(result.created, 2)
+        self.assertEqual(
+            sorted(self.calendar.events.values_list("uid", flat=True)),
+            ["10@calendall.io", "11@calendall.io"])
+
+    def test_replace_error(self):
+        import_events(self.calendar, make_ics(5))
+
+        def broken_ics():
+            lines = make_ics(5, start=10)
+            for i in range(1 + 4 * 3 + 2):  # Three events and a half
+                yield next(lines)
+            raise OSError("Connection reset")
+
+        with self.assertRaises(OSError):
+            import_events(self.calendar, broken_ics(), chunk_size=1,
+                          replace=True)
+        self.assertEqual(
+            sorted(self.calendar.events.values_list("uid", flat=True)),
+            ["{0}@calendall.io".format(i) for i in range(5)])
+
+    def test_replace_error_keeps_other_events(self):
+        other = Calendar.objects.create(owner=self.calendar.owner,
+                                        name="Arkham")
+
+        def broken_ics():
+            lines = make_ics(3, start=10)
+            for i in range(1 + 4 * 2):
+                yield next(lines)
+            # Created meanwhile, after the imported events
+            for calendar in (self.calendar, other):
+                Event.objects.create(calendar=calendar, uid="added",
+                                     start=datetime(2015, 1, 1,
+                                                    tzinfo=pytz.utc))
+            yield next(lines)
+            raise OSError("Connection reset")
+
+        with self.assertRaises(OSError):
+            import_events(self.calendar, broken_ics(), chunk_size=1,
+                          replace=True)
+        self.assertEqual(
+            list(self.calendar.events.values_list("uid", flat=True)),
+            ["added"])
+        self.assertEqual(other.events.count(), 1)
+
+    def test_truncate(self):
+        lines = ["BEGIN:VEVENT\r\n", "DTSTART:20150101\r\n",
+                 "SUMMARY:{0}\r\n".format("x" * 300), "END:VEVENT\r\n"]
+        import_events(self.calendar, lines)
+        self.assertEqual(len(Event.objects.get().summary), 255)
+
+    def test_updates_calendar(self):
+        updated = self.calendar.updated
+        import_events(self.calendar, make_ics(1))
+        self.assertGreater(Calendar.objects.get().updated, updated)
+
+
+class ImportICSCommandTestCase(TestCase):
+
+    def setUp(self):
+        user = CalendallUser.objects.create(username="batman",
+                                            email="darkknight@gmail.com")
+        self.calendar = Calendar.objects.create(owner=user, name="Gotham")
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, "gotham.ics")
+        with open(self.path, "w", newline="") as f:
+            f.writelines(make_ics(7))
+
+    def test_import_file(self):
+        out = StringIO()
+        call_command("import_ics", str(self.calendar.pk), self.path,
+                     chunk=3, stdout=out)
+        self.assertIn("7 events imported, 0 skipped", out.getvalue())
+        self.assertEqual(self.calendar.events.count(), 7)
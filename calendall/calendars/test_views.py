@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import pytz
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+
+from profiles.models import CalendallUser
+from .ics import EventReader
+from .models import Calendar, Event
+
+
+class CalendarExportTestCase(TestCase):
+
+    def setUp(self):
+        user = CalendallUser.objects.create(username="batman",
+                                            email="darkknight@gmail.com")
+        self.calendar = Calendar.objects.create(owner=user, name="Gotham")
+        self.event = Event.objects.create(
+            calendar=self.calendar, summary="Joker day",
+            start=datetime(2015, 1, 20, 10, tzinfo=pytz.utc))
+        self.url = reverse("calendars:export",
+                           kwargs={'share_token': self.calendar.share_token})
+
+    def test_export(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'],
+                         "text/calendar; charset=utf-8")
+        self.assertIn('filename="calendar-{0}.ics"'.format(self.calendar.pk),
+                      response['Content-Disposition'])
+        self.assertIn("public", response['Cache-Control'])
+
+        content = b"".join(response.streaming_content).decode("utf-8")
+        events = list(EventReader(content.splitlines(True)))
+        self.assertEqual([e['summary'] for e in events], ["Joker day"])
+
+    def test_not_found(self):
+        url = reverse("calendars:export",
+                      kwargs={'share_token': "0" * 32})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        # Not by the pk
+        url = "/cal/{0}.ics".format(self.calendar.pk)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_share_tokens(self):
+        other = Calendar.objects.create(owner=self.calendar.owner,
+                                        name="Arkham")
+        self.assertRegex(other.share_token, "^[0-9a-f]{32}$")
+        self.assertNotEqual(other.share_token, self.calendar.share_token)
+
+    def test_not_modified(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+
+        # Only the calendar is read
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        self.event.summary = "Joker night"
+        self.event.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn(b"Joker night", b"".join(response.streaming_content))
@@ -0,0 +1,8 @@
+from django.conf.urls import patterns, url
+
+from . import views
+
+urlpatterns = patterns('',
+    url(r'^(?P<share_token>[0-9a-f]{32})\.ics$',
+        views.CalendarExport.as_view(), name="export"),
+)
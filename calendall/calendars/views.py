@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.generic import View
+
+from core.views import NotModifiedMixin
+from .exporter import get_version, iter_calendar
+from .models import Calendar
+
+
+class CalendarExport(NotModifiedMixin, View):
+    """Streams the calendar as an iCalendar file (see calendars.exporter)
+
+    The calendars are found by their share token, not the sequential pk,
+    only the users given the URL can read them. The ETag and Last-Modified
+    are the version of the calendar, so a client polling an unchanged
+    calendar gets a 304 without any event read.
+    """
+
+    def get(self, request, share_token):
+        calendar = get_object_or_404(Calendar, share_token=share_token)
+        etag = get_version(calendar)
+        last_modified = http_date(calendar.updated.timestamp())
+
+        if self.not_modified(request, etag, last_modified):
+            response = HttpResponseNotModified()
+        else:
+            response = StreamingHttpResponse(
+                iter_calendar(calendar),
+                content_type="text/calendar; charset=utf-8")
+            response['Content-Disposition'] = \
+                'attachment; filename="calendar-{0}.ics"'.format(calendar.pk)
+        response['ETag'] = etag
+        response['Last-Modified'] = last_modified
+        patch_cache_control(response, public=True,
+                            max_age=settings.CALENDAR_EXPORT_MAX_AGE)
+        return response
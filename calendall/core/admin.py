@@ -1,3 +1,12 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import QueuedEmail
+
+
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "recipients", "status", "attempts",
+                    "next_attempt", "created", "sent")
+    list_filter = ("status",)
+    readonly_fields = ("last_error",)
+
+admin.site.register(QueuedEmail, QueuedEmailAdmin)
@@ -0,0 +1,19 @@
+from django.apps import AppConfig
+from django.core import checks
+from django.db.models import CharField
+from pipeline.signals import css_compressed
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        from .checks import check_shared_caches
+        checks.register()(check_shared_caches)
+
+        from .lookups import Lower
+        CharField.register_lookup(Lower)
+
+        from .inliner import inline_templates_on_compress
+        css_compressed.connect(inline_templates_on_compress,
+                               dispatch_uid="inline_email_templates")
@@ -0,0 +1,257 @@
+"""
+Avatar URLs of the users (Gravatar) and the avatar proxy.
+
+The URL of an email and size is built once per process: the navbar renders
+the avatar of the logged user on every page and the public calendar pages
+render lists of them.
+
+With AVATAR_PROXY the URLs point to core.views.AvatarProxy, which serves the
+images from a disk cache in AVATAR_CACHE_DIR keyed by the Gravatar hash of
+the email and the size. Only the AVATAR_SIZES are served, and the
+prune_avatars command (cron) keeps at most AVATAR_CACHE_MAX_ENTRIES avatars
+(the least recently written are removed). Cached images are revalidated upstream (ETag and
+Last-Modified) after AVATAR_REVALIDATE_AFTER seconds; the users without a
+Gravatar, or when the upstream is down and nothing is cached, get an
+identicon generated here. After an upstream error the stale avatar or the
+identicon is cached for AVATAR_ERROR_RETRY_AFTER seconds, so the requests
+don't wait for the upstream timeout again.
+"""
+import functools
+import hashlib
+from http.client import HTTPException
+import json
+import logging
+import os
+import tempfile
+import time
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.urlresolvers import reverse
+from django.utils.html import escape
+from django_gravatar.helpers import (GRAVATAR_DEFAULT_SIZE,
+                                     calculate_gravatar_hash,
+                                     get_gravatar_url)
+
+log = logging.getLogger(__name__)
+
+# (email, size) URLs kept
+AVATAR_CACHE_SIZE = 4096
+
+IDENTICON_GRID = 5
+
+
+@functools.lru_cache(maxsize=AVATAR_CACHE_SIZE)
+def _get_avatar_url(email, size):
+    return escape(get_gravatar_url(email, size=size))
+
+
+@functools.lru_cache(maxsize=AVATAR_CACHE_SIZE)
+def _get_proxy_url(email, size):
+    return reverse("core:avatar",
+                   kwargs={'email_hash': calculate_gravatar_hash(email),
+                           'size': size})
+
+
+def proxy_size(size):
+    """The smallest of the AVATAR_SIZES that fits the size"""
+    sizes = sorted(settings.AVATAR_SIZES)
+    return next((s for s in sizes if s >= size), sizes[-1])
+
+
+def get_avatar_url(user_or_email, size=GRAVATAR_DEFAULT_SIZE):
+    """Escaped avatar URL of the user (or email)"""
+    email = getattr(user_or_email, 'email', user_or_email) or ''
+    # Gravatar hashes the normalized email, all the variants share the URL
+    email = email.strip().lower()
+    if settings.AVATAR_PROXY:
+        return _get_proxy_url(email, proxy_size(int(size)))
+    return _get_avatar_url(email, int(size))
+
+
+def get_avatar_urls(users_or_emails, size=GRAVATAR_DEFAULT_SIZE):
+    """Avatar URLs of a list of users (or emails), in the same order"""
+    return [get_avatar_url(u, size) for u in users_or_emails]
+
+
+class Avatar(object):
+    """An avatar image, 'digest' is the hash of the content"""
+
+    def __init__(self, content, content_type, last_modified=None,
+                 etag=None, fetched=None, max_age=None):
+        self.content = content
+        self.content_type = content_type
+        self.last_modified = last_modified
+        # Upstream ETag, to revalidate
+        self.etag = etag
+        self.fetched = fetched or time.time()
+        # Seconds, AVATAR_REVALIDATE_AFTER if None
+        self.max_age = max_age
+        self.digest = hashlib.sha1(content).hexdigest()
+
+    def is_fresh(self):
+        max_age = self.max_age
+        if max_age is None:
+            max_age = settings.AVATAR_REVALIDATE_AFTER
+        return time.time() - self.fetched < max_age
+
+
+class AvatarCache(object):
+    """Avatars stored in a directory
+
+    Every avatar is a pair of files named by the Gravatar hash and the
+    size: the image and its metadata (JSON), both written atomically.
+    prune() (the prune_avatars command) bounds it to 'max_entries' avatars.
+    """
+
+    def __init__(self, directory=None, max_entries=None):
+        self.directory = directory or settings.AVATAR_CACHE_DIR
+        self.max_entries = max_entries or settings.AVATAR_CACHE_MAX_ENTRIES
+
+    def path(self, email_hash, size):
+        return os.path.join(self.directory, email_hash[:2],
+                            "{0}-{1}".format(email_hash, size))
+
+    def get(self, email_hash, size):
+        path = self.path(email_hash, size)
+        try:
+            with open(path + ".json") as f:
+                meta = json.load(f)
+            with open(path, "rb") as f:
+                content = f.read()
+        except (OSError, ValueError):
+            return None
+        return Avatar(content, **meta)
+
+    def set(self, email_hash, size, avatar):
+        path = self.path(email_hash, size)
+        meta = {
+            'content_type': avatar.content_type,
+            'last_modified': avatar.last_modified,
+            'etag': avatar.etag,
+            'fetched': avatar.fetched,
+            'max_age': avatar.max_age,
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write(path, avatar.content)
+        self._write(path + ".json", json.dumps(meta).encode("utf-8"))
+
+    def prune(self):
+        """Removes the least recently written avatars over max_entries,
+        down to 90% of it. Returns the number of removed avatars
+        """
+        entries = []
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        entries.append((os.stat(path).st_mtime,
+                                        path[:-len(".json")]))
+                    except OSError:
+                        pass
+        if len(entries) <= self.max_entries:
+            return 0
+
+        entries.sort()
+        removed = entries[:len(entries) - self.max_entries * 9 // 10]
+        for mtime, path in removed:
+            for name in (path + ".json", path):
+                try:
+                    os.unlink(name)
+                except OSError:
+                    pass
+        log.info("Avatar cache pruned, %d avatars removed", len(removed))
+        return len(removed)
+
+    def _write(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def fetch_avatar(email_hash, size, cached=None):
+    """Gets the avatar from the upstream, revalidating the cached one
+
+    Returns the cached avatar if it didn't change and None if the user has
+    no Gravatar. Raises OSError or HTTPException if the upstream fails.
+    """
+    url = "{0}avatar/{1}.jpg?{2}".format(
+        settings.AVATAR_UPSTREAM_URL, email_hash,
+        urlencode({'s': size, 'd': '404'}))
+    request = Request(url)
+    if cached is not None:
+        if cached.etag:
+            request.add_header("If-None-Match", cached.etag)
+        if cached.last_modified:
+            request.add_header("If-Modified-Since", cached.last_modified)
+
+    try:
+        with urlopen(request,
+                     timeout=settings.AVATAR_UPSTREAM_TIMEOUT) as response:
+            return Avatar(response.read(),
+                          response.headers.get("Content-Type", "image/jpeg"),
+                          response.headers.get("Last-Modified"),
+                          response.headers.get("ETag"))
+    except HTTPError as e:
+        if e.code == 304 and cached is not None:
+            cached.fetched = time.time()
+            cached.max_age = None
+            return cached
+        if e.code == 404:
+            return None
+        raise
+
+
+def make_identicon(email_hash, size):
+    """SVG identicon of the hash, symmetric 5x5 grid like Gravatar's"""
+    digest = bytes.fromhex(email_hash)
+    color = "#{0:02x}{1:02x}{2:02x}".format(*digest[-3:])
+    half = (IDENTICON_GRID + 1) // 2
+    cells = []
+    for i in range(IDENTICON_GRID * half):
+        if digest[i % len(digest)] % 2:
+            continue
+        x, y = divmod(i, IDENTICON_GRID)
+        for column in sorted({x, IDENTICON_GRID - 1 - x}):
+            cells.append('<rect x="{0}" y="{1}" width="1" height="1"/>'
+                         .format(column, y))
+    svg = ('<svg xmlns="http://www.w3.org/2000/svg" width="{0}" '
+           'height="{0}" viewBox="0 0 {1} {1}" shape-rendering="crispEdges">'
+           '<rect width="{1}" height="{1}" fill="#f0f0f0"/>'
+           '<g fill="{2}">{3}</g></svg>').format(
+               size, IDENTICON_GRID, color, "".join(cells))
+    return Avatar(svg.encode("ascii"), "image/svg+xml")
+
+
+def get_avatar(email_hash, size, cache=None):
+    """Cached avatar, revalidated if it isn't fresh"""
+    cache = cache or AvatarCache()
+    cached = cache.get(email_hash, size)
+    if cached is not None and cached.is_fresh():
+        return cached
+
+    try:
+        avatar = fetch_avatar(email_hash, size, cached)
+    except (OSError, HTTPException) as e:
+        log.warning("Error fetching the avatar %s: %s", email_hash, e)
+        # Stale is better than nothing, retried after a while instead of
+        # waiting for the upstream on every request
+        avatar = cached or make_identicon(email_hash, size)
+        avatar.fetched = time.time()
+        avatar.max_age = settings.AVATAR_ERROR_RETRY_AFTER
+    else:
+        if avatar is None:
+            avatar = make_identicon(email_hash, size)
+    try:
+        cache.set(email_hash, size, avatar)
+    except OSError as e:
+        log.warning("Error caching the avatar %s: %s", email_hash, e)
+    return avatar
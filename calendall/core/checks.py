@@ -0,0 +1,26 @@
+"""
+System checks of the settings (manage.py check, runserver, migrate...),
+registered by core.apps.CoreConfig.
+"""
+from django.conf import settings
+from django.core import checks
+
+
+def check_shared_caches(app_configs, **kwargs):
+    """The SHARED_CACHES can't be per process (locmem), a logout or a
+    password change would still be valid in the other processes. Only with
+    LOCAL_CACHES_ALLOWED, for one process (development and the tests)
+    """
+    if settings.LOCAL_CACHES_ALLOWED:
+        return []
+    errors = []
+    for alias in settings.SHARED_CACHES:
+        backend = settings.CACHES[alias]['BACKEND']
+        if backend.endswith(".LocMemCache"):
+            errors.append(checks.Error(
+                "The '{0}' cache needs to be shared by all the processes, "
+                "not {1}".format(alias, backend),
+                hint="Point it to memcached, or set LOCAL_CACHES_ALLOWED "
+                     "with a single process",
+                id='core.E001'))
+    return errors
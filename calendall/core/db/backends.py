@@ -0,0 +1,193 @@
+"""
+Database wrapper mixins for persistent and pooled connections.
+
+Extra keys of the DATABASES entries:
+
+    CONN_HEALTH_CHECKS  check a persistent connection (CONN_MAX_AGE) with
+                        is_usable() before its first use in a request and
+                        reconnect if the server closed it
+    POOL_SIZE           share up to POOL_SIZE connections between the
+                        threads of the process, a closed connection goes
+                        back to the pool. Use it with CONN_MAX_AGE = 0
+    POOL_TIMEOUT        seconds to wait for a free connection of the pool
+
+Django keeps a connection per thread, with a threaded WSGI server and
+persistent connections every idle thread holds one.
+"""
+from collections import deque
+import functools
+import logging
+import os
+import threading
+
+log = logging.getLogger(__name__)
+
+DEFAULT_POOL_TIMEOUT = 10  # Seconds
+
+# (pid, alias, database name): ConnectionPool, the connections aren't shared
+# with the forked processes and the test database gets its own pool
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool(object):
+    """Up to 'size' connections, the last returned is reused first"""
+
+    def __init__(self, size, timeout=DEFAULT_POOL_TIMEOUT):
+        self.size = size
+        self.timeout = timeout
+        self.idle = deque()
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(size)
+
+    def get(self, connect):
+        """Returns (connection, reused), connect() opens a new connection
+
+        The connection is None if there isn't a free one after the timeout.
+        """
+        if not self.slots.acquire(timeout=self.timeout):
+            return None, False
+        try:
+            with self.lock:
+                if self.idle:
+                    return self.idle.pop(), True
+            return connect(), False
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def put(self, connection):
+        """Returns the connection to the pool"""
+        with self.lock:
+            self.idle.append(connection)
+        self.slots.release()
+
+    def discard(self, connection):
+        """Closes a connection taken from the pool"""
+        try:
+            connection.close()
+        except Exception:
+            log.debug("Error closing a discarded connection", exc_info=True)
+        finally:
+            self.slots.release()
+
+    def close(self):
+        """Closes the idle connections"""
+        with self.lock:
+            idle = list(self.idle)
+            self.idle.clear()
+        for connection in idle:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+def get_pool(alias, name, size, timeout):
+    key = (os.getpid(), alias, name)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(size, timeout)
+        return pool
+
+
+def close_pools():
+    """Closes the idle connections of the pools of this process"""
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [p for key, p in _pools.items() if key[0] == pid]
+    for pool in pools:
+        pool.close()
+
+
+class HealthCheckMixin(object):
+    """Checks the persistent connection before its first use in a request"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        # Runs when a request starts and finishes
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (self.connection is not None and not self.health_check_done and
+                self.settings_dict.get('CONN_HEALTH_CHECKS')):
+            self.health_check_done = True
+            if not self.in_atomic_block and not self.is_usable():
+                log.info("Database connection '%s' unusable, reconnecting",
+                         self.alias)
+                self.close()
+        super().ensure_connection()
+
+
+class PoolMixin(object):
+    """Takes the connections from a pool and returns them when closed"""
+
+    pool = None
+
+    def get_new_connection(self, conn_params):
+        size = self.settings_dict.get('POOL_SIZE')
+        if not size:
+            self.pool = None
+            return super().get_new_connection(conn_params)
+
+        pool = self.pool = get_pool(
+            self.alias, self.settings_dict['NAME'], size,
+            self.settings_dict.get('POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT))
+        connect = functools.partial(super().get_new_connection, conn_params)
+        while True:
+            connection, reused = pool.get(connect)
+            if connection is None:
+                raise self.Database.OperationalError(
+                    "No free connection in the pool of '{0}' after {1}s"
+                    .format(self.alias, pool.timeout))
+            if not reused:
+                return connection
+            if self.pooled_connection_usable(connection):
+                self.init_pooled_connection(connection)
+                return connection
+            log.info("Pooled connection of '%s' unusable, discarded",
+                     self.alias)
+            pool.discard(connection)
+
+    def pooled_connection_usable(self, connection):
+        if not self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            return True
+        # is_usable() checks self.connection
+        self.connection = connection
+        try:
+            return self.is_usable()
+        finally:
+            self.connection = None
+
+    def init_pooled_connection(self, connection):
+        """Sets the wrapper state that get_new_connection sets"""
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+
+        connection = self.connection
+        # Don't return a connection with a transaction or a changed
+        # autocommit, or after an error if it doesn't work
+        reusable = (not self.in_atomic_block and
+                    self.autocommit == self.settings_dict['AUTOCOMMIT'] and
+                    (not self.errors_occurred or self.is_usable()))
+        if reusable:
+            try:
+                connection.rollback()
+            except self.Database.Error:
+                reusable = False
+        if reusable:
+            pool.put(connection)
+        else:
+            pool.discard(connection)
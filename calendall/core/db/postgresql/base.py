@@ -0,0 +1,20 @@
+"""
+PostgreSQL backend with health checks and the optional connection pool.
+
+    'ENGINE': 'core.db.postgresql',
+
+See core/db/backends.py for the extra DATABASES keys.
+"""
+from django.db.backends.postgresql_psycopg2 import base
+from psycopg2.extensions import ISOLATION_LEVEL_READ_COMMITTED
+
+from ..backends import HealthCheckMixin, PoolMixin
+
+
+class DatabaseWrapper(HealthCheckMixin, PoolMixin, base.DatabaseWrapper):
+    """postgresql_psycopg2 wrapper with the health checks and the pool"""
+
+    def init_pooled_connection(self, connection):
+        # Set by get_new_connection, before the autocommit
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', ISOLATION_LEVEL_READ_COMMITTED)
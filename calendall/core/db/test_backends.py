@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.db import OperationalError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase
+
+from .backends import HealthCheckMixin, PoolMixin, close_pools
+
+
+class TestDatabaseWrapper(HealthCheckMixin, PoolMixin, DatabaseWrapper):
+    pass
+
+
+class BackendTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.addCleanup(close_pools)
+        self.wrappers = []
+
+    def wrapper(self, **settings):
+        settings_dict = dict(connection.settings_dict,
+                             ENGINE='django.db.backends.sqlite3',
+                             NAME=os.path.join(self.dir, "test.sqlite3"),
+                             CONN_MAX_AGE=None, **settings)
+        wrapper = TestDatabaseWrapper(settings_dict, alias="test")
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def start_request(self, wrapper):
+        # request_started and request_finished
+        wrapper.close_if_unusable_or_obsolete()
+
+
+class HealthCheckTestCase(BackendTestCase):
+
+    def test_usable(self):
+        wrapper = self.wrapper(CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+
+        self.start_request(wrapper)
+        with mock.patch.object(wrapper, 'is_usable',
+                               return_value=True) as is_usable:
+            wrapper.cursor()
+            wrapper.cursor()
+        self.assertEqual(is_usable.call_count, 1)
+        self.assertIs(wrapper.connection, raw)
+
+    def test_unusable(self):
+        wrapper = self.wrapper(CONN_HEALTH_CHECKS=True)
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+
+        self.start_request(wrapper)
+        with mock.patch.object(wrapper, 'is_usable', return_value=False):
+            wrapper.cursor().execute("SELECT 1")
+        self.assertIsNot(wrapper.connection, raw)
+
+    def test_disabled(self):
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        self.start_request(wrapper)
+        with mock.patch.object(wrapper, 'is_usable') as is_usable:
+            wrapper.cursor()
+        self.assertFalse(is_usable.called)
+
+
+class PoolTestCase(BackendTestCase):
+
+    def test_reuse(self):
+        first = self.wrapper(POOL_SIZE=2)
+        first.ensure_connection()
+        raw = first.connection
+        first.close()
+        self.assertEqual(list(first.pool.idle), [raw])
+
+        # Another thread's wrapper
+        second = self.wrapper(POOL_SIZE=2)
+        second.cursor().execute("SELECT 1")
+        self.assertIs(second.connection, raw)
+        self.assertEqual(len(second.pool.idle), 0)
+
+        third = self.wrapper(POOL_SIZE=2)
+        third.ensure_connection()
+        self.assertIsNot(third.connection, raw)
+
+    def test_timeout(self):
+        first = self.wrapper(POOL_SIZE=1, POOL_TIMEOUT=0.01)
+        first.ensure_connection()
+        with self.assertRaises(OperationalError):
+            self.wrapper(POOL_SIZE=1, POOL_TIMEOUT=0.01).ensure_connection()
+
+        first.close()
+        self.wrapper(POOL_SIZE=1, POOL_TIMEOUT=0.01).ensure_connection()
+
+    def test_discard_changed_autocommit(self):
+        wrapper = self.wrapper(POOL_SIZE=1)
+        wrapper.ensure_connection()
+        wrapper.set_autocommit(False)
+        wrapper.close()
+        self.assertEqual(len(wrapper.pool.idle), 0)
+        # The slot is free
+        self.wrapper(POOL_SIZE=1, POOL_TIMEOUT=0.01).ensure_connection()
+
+    def test_discard_unusable(self):
+        first = self.wrapper(POOL_SIZE=1, CONN_HEALTH_CHECKS=True)
+        first.ensure_connection()
+        raw = first.connection
+        first.close()
+
+        second = self.wrapper(POOL_SIZE=1, CONN_HEALTH_CHECKS=True)
+        with mock.patch.object(second, 'is_usable', return_value=False):
+            second.ensure_connection()
+        self.assertIsNot(second.connection, raw)
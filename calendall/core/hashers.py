@@ -0,0 +1,102 @@
+"""
+Password hashers tuned from the settings.
+
+The passwords hashed with old algorithms or costs are rehashed by
+User.check_password on the next log in, before login() stores the session
+auth hash (it depends on the stored password).
+
+    $ python -m benchmarks.password_hashing
+
+helps to choose the costs (PASSWORD_ARGON2_* and PASSWORD_BCRYPT_ROUNDS).
+"""
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.encoding import force_bytes
+from django.utils.translation import ugettext_noop as _
+
+
+class Argon2PasswordHasher(hashers.BasePasswordHasher):
+    """Argon2id with the argon2-cffi library
+
+    Same encoded format than the Argon2 hasher of newer Django versions:
+    argon2$argon2id$v=19$m=65536,t=2,p=2$salt$hash
+    """
+    algorithm = "argon2"
+    library = "argon2"
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+    def encode(self, password, salt):
+        argon2 = self._load_library()
+        data = argon2.low_level.hash_secret(
+            force_bytes(password),
+            force_bytes(salt),
+            time_cost=self.time_cost,
+            memory_cost=self.memory_cost,
+            parallelism=self.parallelism,
+            hash_len=argon2.DEFAULT_HASH_LENGTH,
+            type=argon2.low_level.Type.ID)
+        return self.algorithm + data.decode("ascii")
+
+    def verify(self, password, encoded):
+        argon2 = self._load_library()
+        algorithm, rest = encoded.split("$", 1)
+        assert algorithm == self.algorithm
+        try:
+            return argon2.low_level.verify_secret(
+                force_bytes("$" + rest),
+                force_bytes(password),
+                type=argon2.low_level.Type.ID)
+        except argon2.exceptions.VerificationError:
+            return False
+
+    def _decode(self, encoded):
+        # argon2$argon2id$v=19$m=65536,t=2,p=2$salt$hash
+        algorithm, variety, version, params, salt, data = encoded.split("$")
+        params = dict(p.split("=") for p in params.split(","))
+        return variety, version, params, salt, data
+
+    def safe_summary(self, encoded):
+        variety, version, params, salt, data = self._decode(encoded)
+        return OrderedDict([
+            (_('algorithm'), self.algorithm),
+            (_('variety'), variety),
+            (_('version'), version),
+            (_('memory cost'), params['m']),
+            (_('time cost'), params['t']),
+            (_('parallelism'), params['p']),
+            (_('salt'), hashers.mask_hash(salt)),
+            (_('hash'), hashers.mask_hash(data)),
+        ])
+
+    def must_update(self, encoded):
+        variety, version, params, salt, data = self._decode(encoded)
+        return (variety != "argon2id" or
+                int(params['m']) != self.memory_cost or
+                int(params['t']) != self.time_cost or
+                int(params['p']) != self.parallelism)
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """Django's bcrypt_sha256 with the rounds from the settings"""
+
+    @property
+    def rounds(self):
+        return settings.PASSWORD_BCRYPT_ROUNDS
+
+    def must_update(self, encoded):
+        # bcrypt_sha256$$2b$12$salthash
+        rounds = encoded.split("$")[3]
+        return int(rounds) != self.rounds
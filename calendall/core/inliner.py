@@ -0,0 +1,239 @@
+"""
+Premailer with per process caches for the CSS inlining of the emails.
+
+The stylesheets only change on deploys so they are loaded once per url, and
+the parsed selector rules are stored by the hash of the stylesheet content,
+this way each email only pays for applying the rules to the rendered body.
+"""
+from urllib.parse import urljoin
+import functools
+import hashlib
+import logging
+import os
+import re
+import threading
+import types
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import ImproperlyConfigured
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template.base import (tag_re, BLOCK_TAG_START, COMMENT_TAG_START,
+                                  VARIABLE_TAG_START)
+from django.template.loader import find_template_loader
+import premailer
+from premailer import premailer as premailer_module
+
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_external_cache = {}
+_rules_cache = {}
+
+# Premailer parses the old and the new style with cssutils for every element
+# and rule applied (most of the inlining time) and the result only depends on
+# the arguments, the same elements and rules repeat on every email
+_merge_styles = functools.lru_cache(maxsize=4096)(
+    premailer_module.merge_styles)
+
+
+def _with_cached_merge_styles(function):
+    """Copy of a premailer function calling our cached merge_styles, the
+    premailer module is left untouched for the rest of its callers
+    """
+    namespace = dict(function.__globals__, merge_styles=_merge_styles)
+    copy = types.FunctionType(function.__code__, namespace,
+                              function.__name__, function.__defaults__,
+                              function.__closure__)
+    return functools.update_wrapper(copy, function)
+
+
+def _store(cache, key, value):
+    with _lock:
+        if len(cache) >= settings.EMAIL_CSS_CACHE_SIZE:
+            cache.clear()
+        cache[key] = value
+
+
+def clear_cache():
+    with _lock:
+        _external_cache.clear()
+        _rules_cache.clear()
+    _merge_styles.cache_clear()
+
+
+class CachedPremailer(premailer.Premailer):
+
+    transform = _with_cached_merge_styles(premailer.Premailer.transform)
+
+    def _load_external(self, url):
+        css_body = _external_cache.get(url)
+        if css_body is None:
+            css_body = super()._load_external(url)
+            _store(_external_cache, url, css_body)
+        return css_body
+
+    def _parse_style_rules(self, css_body, ruleset_index):
+        if not css_body:
+            return [], []
+
+        key = (hashlib.sha1(css_body.encode("utf-8")).hexdigest(),
+               ruleset_index,
+               self.exclude_pseudoclasses,
+               self.include_star_selectors,
+               self.disable_validation)
+
+        cached = _rules_cache.get(key)
+        if cached is None:
+            cached = super()._parse_style_rules(css_body, ruleset_index)
+            _store(_rules_cache, key, cached)
+
+        # Premailer extends the returned lists, don't share ours
+        rules, leftover = cached
+        return list(rules), list(leftover)
+
+
+def transform(html, base_url=None):
+    """Drop-in replacement of premailer.transform"""
+    return CachedPremailer(html, base_url=base_url).transform()
+
+
+# ------------- Pre-inlined templates -------------
+# The email templates are inlined at build time (see inline_email_templates
+# command), the template tags are protected with placeholders while premailer
+# processes the static HTML and restored afterwards
+
+INLINED_TEMPLATES_PREFIX = "inlined/"
+EMAIL_CSS_PACKAGE = "email-libs"
+
+_extends_re = re.compile(r"""{%\s*extends\s+["']([^"']+)["']\s*%}""")
+_block_re = re.compile(
+    r"{%\s*block\s+(\w+)\s*%}(.*?){%\s*endblock(?:\s+\w+)?\s*%}", re.DOTALL)
+_load_re = re.compile(r"{%\s*load\s+[^%]+%}")
+_stylesheet_re = re.compile(r"""{%\s*stylesheet\s+["']([^"']+)["']\s*%}""")
+_placeholder_re = re.compile(r"calendalltpl(\d+)x")
+_url_attr_re = re.compile(r'\b(href|src)="([^"]*)"')
+
+
+def _template_source(template_name):
+    for loader_name in settings.TEMPLATE_LOADERS:
+        loader = find_template_loader(loader_name)
+        try:
+            return loader.load_template_source(template_name)[0]
+        except (TemplateDoesNotExist, AttributeError):
+            pass
+    raise TemplateDoesNotExist(template_name)
+
+
+def _flatten_template(template_name):
+    """Returns the template source with the parents blocks replaced"""
+    source = _template_source(template_name)
+    extends = _extends_re.search(source)
+    if not extends:
+        return source
+
+    if "block.super" in source:
+        raise TemplateSyntaxError(
+            "{0}: block.super can't be inlined".format(template_name))
+
+    blocks = dict(_block_re.findall(source))
+    parent = _flatten_template(extends.group(1))
+    parent = _block_re.sub(lambda m: blocks.get(m.group(1), m.group(2)),
+                           parent)
+    # Child libraries need to be loaded too
+    return "".join(_load_re.findall(source)) + parent
+
+
+def _package_css(package_name):
+    """Returns the source CSS of a pipeline package"""
+    css = []
+    for path in settings.PIPELINE_CSS[package_name]['source_filenames']:
+        found = finders.find(path)
+        if not found:
+            raise ImproperlyConfigured(
+                "'{0}' stylesheet not found".format(path))
+        with open(found, encoding="utf-8") as f:
+            css.append(f.read())
+    return "\n".join(css)
+
+
+def inline_template(template_name):
+    """Returns the source of an HTML template with the CSS of its pipeline
+    stylesheets inlined, the template tags and variables are kept
+    """
+    source = _flatten_template(template_name)
+
+    css = [_package_css(name) for name in _stylesheet_re.findall(source)]
+    source = _stylesheet_re.sub("", source)
+
+    loads = []
+    tokens = []
+    html = []
+    for bit in tag_re.split(source):
+        if bit.startswith(COMMENT_TAG_START):
+            continue
+        elif _load_re.match(bit):
+            loads.append(bit)
+        elif bit.startswith((BLOCK_TAG_START, VARIABLE_TAG_START)):
+            html.append("calendalltpl{0}x".format(len(tokens)))
+            tokens.append(bit)
+        else:
+            html.append(bit)
+
+    # Links are made absolute when the email is rendered (absolute_urls)
+    html = premailer.Premailer("".join(html), css_text=css).transform()
+    html = _placeholder_re.sub(lambda m: tokens[int(m.group(1))], html)
+
+    return "\n".join(loads) + "\n" + html
+
+
+def inlined_template_name(template_name):
+    """Returns the name of the pre-inlined template or None if not built"""
+    if not settings.EMAIL_USE_INLINED_TEMPLATES:
+        return None
+
+    name = INLINED_TEMPLATES_PREFIX + template_name
+    if os.path.exists(os.path.join(settings.EMAIL_INLINED_TEMPLATES_DIR,
+                                   name)):
+        return name
+    return None
+
+
+def build_inlined_templates():
+    """Writes the pre-inlined version of the email templates, returns the
+    written paths
+    """
+    paths = []
+    for template_name in settings.EMAIL_INLINED_TEMPLATES:
+        path = os.path.join(settings.EMAIL_INLINED_TEMPLATES_DIR,
+                            INLINED_TEMPLATES_PREFIX + template_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(inline_template(template_name))
+        paths.append(path)
+    return paths
+
+
+def inline_templates_on_compress(sender, package, **kwargs):
+    """Rebuilds the inlined templates when collectstatic compresses the email
+    stylesheet (django-pipeline css_compressed signal)
+    """
+    email_css = settings.PIPELINE_CSS.get(EMAIL_CSS_PACKAGE, {})
+    if package.output_filename == email_css.get('output_filename'):
+        for path in build_inlined_templates():
+            log.info("Inlined email template '%s'", path)
+
+
+def absolute_urls(html, base_url):
+    """Makes the links absolute like premailer does with base_url"""
+    if not base_url.endswith("/"):
+        base_url += "/"
+
+    def absolute(match):
+        attr, url = match.groups()
+        if attr == "src" and url.startswith("cid:"):
+            return match.group(0)
+        return '{0}="{1}"'.format(attr, urljoin(base_url, url.lstrip("/")))
+
+    return _url_attr_re.sub(absolute, html)
@@ -0,0 +1,115 @@
+"""
+Logging handlers and formatters.
+
+BackgroundFileHandler is a QueueHandler: the request threads only put the
+records in a queue and a QueueListener thread writes them to a rotating
+file, so logging never blocks on the disk. The message is merged with its
+arguments (and the traceback formatted) before queueing because the
+arguments could change before the listener writes them.
+
+    'file': {
+        'class': 'core.logs.BackgroundFileHandler',
+        'filename': 'calendall.log',
+        'maxBytes': 10 * 1024 * 1024,
+        'backupCount': 5,
+        'formatter': 'json',
+    }
+"""
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import os
+import queue
+import threading
+
+# Attributes of every LogRecord, the rest come from 'extra'
+RECORD_ATTRS = frozenset(logging.LogRecord(
+    "", logging.INFO, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+
+class BackgroundFileHandler(QueueHandler):
+    """RotatingFileHandler writing from a background thread"""
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding=None,
+                 delay=False):
+        self.target = RotatingFileHandler(filename, maxBytes=maxBytes,
+                                          backupCount=backupCount,
+                                          encoding=encoding, delay=delay)
+        self._start_lock = threading.Lock()
+        self._pid = None
+        self.listener = None
+        super().__init__(None)
+        self._start()
+
+    def _start(self):
+        with self._start_lock:
+            # A forked process (parallel tests, process pools) doesn't have
+            # the listener thread of its parent
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.Queue()
+            self.listener = QueueListener(self.queue, self.target)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def setFormatter(self, fmt):
+        # The listener formats the records
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            formatter = self.formatter or logging.Formatter()
+            record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        super().emit(record)
+
+    def flush(self):
+        """Waits until the queued records are written"""
+        # The listener marks every written record as done, the thread keeps
+        # running for the concurrent flushes and emits
+        with self._start_lock:
+            if self.listener is not None and self._pid == os.getpid():
+                self.queue.join()
+        self.target.flush()
+
+    def close(self):
+        with self._start_lock:
+            if self.listener is not None and self._pid == os.getpid():
+                self.listener.stop()
+            self.listener = None
+        self.target.close()
+        super().close()
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, for the log aggregators
+
+    The 'extra' attributes of the record are added to the object.
+    """
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'location': "{0}:{1}".format(record.module, record.lineno),
+            'process': record.process,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRS:
+                data[key] = value
+        return json.dumps(data, default=str)
@@ -0,0 +1,18 @@
+from django.db.models import Transform
+
+
+class Lower(Transform):
+    """field__lower='value' generates LOWER(field) = 'value'
+
+    Unlike iexact (UPPER(field::text) on PostgreSQL) it matches the
+    lower(field) functional indexes. The value needs to be lowercase.
+    """
+    lookup_name = 'lower'
+
+    def as_sql(self, qn, connection):
+        lhs, params = qn.compile(self.lhs)
+        return "LOWER(%s)" % lhs, params
+
+    def relabeled_clone(self, relabels):
+        return self.__class__(self.lhs.relabeled_clone(relabels),
+                              self.init_lookups)
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core.inliner import build_inlined_templates
+
+
+class Command(BaseCommand):
+    help = ("Writes the email templates with the CSS inlined, collectstatic "
+            "runs it when the email stylesheet is compressed")
+
+    def handle(self, *args, **options):
+        for path in build_inlined_templates():
+            self.stdout.write("Inlined '{0}'".format(path))
@@ -0,0 +1,24 @@
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.avatars import AvatarCache
+
+
+class Command(BaseCommand):
+    help = ("Removes the least recently written avatars of the proxy cache "
+            "over the max entries, run it periodically (cron)")
+
+    option_list = BaseCommand.option_list + (
+        make_option('--max-entries',
+                    type='int',
+                    dest='max_entries',
+                    default=settings.AVATAR_CACHE_MAX_ENTRIES,
+                    help='Avatars kept in the cache'),
+    )
+
+    def handle(self, *args, **options):
+        cache = AvatarCache(max_entries=max(options['max_entries'], 1))
+        removed = cache.prune()
+        self.stdout.write("{0} avatars removed".format(removed))
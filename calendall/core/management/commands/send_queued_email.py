@@ -0,0 +1,133 @@
+from concurrent.futures import ThreadPoolExecutor
+from optparse import make_option
+import logging
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.models import QueuedEmail
+
+
+log = logging.getLogger(__name__)
+
+
+def deliver_emails(emails):
+    """Sends a list of queued emails reusing the same backend connection.
+    Returns the final status of each one
+    """
+    statuses = []
+    mail_connection = get_connection()
+    # Before claiming, if the server is down the emails stay pending
+    mail_connection.open()
+    try:
+        for email in emails:
+            if email.claim():
+                statuses.append(email.deliver(mail_connection))
+    finally:
+        mail_connection.close()
+    return statuses
+
+
+def deliver_chunk(emails):
+    """Thread entry point, each thread has its own database connection"""
+    try:
+        return deliver_emails(emails)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Sends the emails stored in the outbox queue"
+
+    option_list = BaseCommand.option_list + (
+        make_option('--workers',
+                    type='int',
+                    dest='workers',
+                    default=settings.EMAIL_QUEUE_WORKERS,
+                    help='Number of sender threads'),
+        make_option('--batch',
+                    type='int',
+                    dest='batch',
+                    default=settings.EMAIL_QUEUE_BATCH_SIZE,
+                    help='Max emails retrieved from the queue on each pass'),
+        make_option('--forever',
+                    action='store_true',
+                    dest='forever',
+                    default=False,
+                    help='Keep polling the queue instead of exiting'),
+        make_option('--sleep',
+                    type='float',
+                    dest='sleep',
+                    default=settings.EMAIL_QUEUE_POLL_INTERVAL,
+                    help='Seconds between polls when --forever is set'),
+    )
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        backoff = options['sleep']
+
+        while True:
+            try:
+                statuses = self.process_batch(options['batch'], workers)
+            except OSError as e:
+                # Connecting to the email server (smtplib and socket errors)
+                if not options['forever']:
+                    raise CommandError(
+                        "Can't connect to the email server: {0}".format(e))
+                log.error("Can't connect to the email server, retrying in "
+                          "%ss: %s", backoff, e)
+                time.sleep(backoff)
+                backoff = min(max(backoff * 2, 1),
+                              settings.EMAIL_QUEUE_MAX_BACKOFF)
+                continue
+            backoff = options['sleep']
+            self.report(statuses)
+
+            if not options['forever']:
+                break
+            if not statuses:
+                time.sleep(options['sleep'])
+
+    def process_batch(self, batch_size, workers):
+        requeued = QueuedEmail.objects.requeue_stale(
+            settings.EMAIL_QUEUE_CLAIM_TIMEOUT)
+        if requeued:
+            log.warning("%s stale emails returned to the queue", requeued)
+
+        emails = list(QueuedEmail.objects.due()[:batch_size])
+        if not emails:
+            return []
+
+        # Split the batch in one chunk per worker
+        chunks = [emails[i::workers] for i in range(workers)]
+        chunks = [c for c in chunks if c]
+
+        if len(chunks) == 1:
+            # Don't use threads, for example on tests
+            return deliver_emails(emails)
+
+        statuses = []
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            for result in executor.map(deliver_chunk, chunks):
+                statuses.extend(result)
+        return statuses
+
+    def report(self, statuses):
+        sent = statuses.count(QueuedEmail.STATUS_SENT)
+        retried = statuses.count(QueuedEmail.STATUS_PENDING)
+        failed = statuses.count(QueuedEmail.STATUS_FAILED)
+
+        backlog = QueuedEmail.objects.backlog()
+        pending = backlog.count()
+        oldest = backlog.order_by("created").values_list("created",
+                                                         flat=True).first()
+        age = (timezone.now() - oldest).total_seconds() if oldest else 0
+
+        msg = ("sent: {0}, retried: {1}, failed: {2}, backlog: {3} "
+               "(oldest {4:.0f}s)").format(sent, retried, failed, pending, age)
+        log.info(msg)
+        self.stdout.write(msg)
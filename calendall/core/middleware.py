@@ -1,17 +1,118 @@
+import functools
+
 import pytz
 
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core import signing
 from django.utils import timezone
 
+from . import routers
+
+# There are ~600 zone names, this holds all of them
+TZINFO_CACHE_SIZE = 1024
+
+TIMEZONE_COOKIE_SALT = "core.middleware.timezone"
+
+
+@functools.lru_cache(maxsize=TZINFO_CACHE_SIZE)
+def get_tzinfo(tzname):
+    """Process wide cached pytz.timezone"""
+    return pytz.timezone(tzname)
+
+
+@functools.lru_cache(maxsize=TZINFO_CACHE_SIZE)
+def unsign_timezone_cookie(value):
+    """Cached signature check of the timezone cookie, the expiration is
+    left to the browser
+    """
+    signer = signing.get_cookie_signer(
+        salt=settings.TIMEZONE_COOKIE_NAME + TIMEZONE_COOKIE_SALT)
+    return signer.unsign(value)
+
+
+def set_user_timezone(request, tzname):
+    """Activates the timezone and sends it in the timezone cookie"""
+    timezone.activate(get_tzinfo(tzname))
+    request.timezone_cookie = tzname
+
 
 class TimezoneMiddleware(object):
+    """Activates the timezone of the logged user
+
+    The timezone is kept in a signed cookie bound to the user id so the
+    session is never written and the user is only loaded when the cookie
+    is missing.
+    """
+
     def process_request(self, request):
-        tzname = request.session.get('user-tz')
+        request.timezone_cookie = None
+
+        # Without a session cookie there is no logged user, don't load the
+        # session or the user
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            timezone.deactivate()
+            return
+
+        user_id = request.session.get(SESSION_KEY)
+        if user_id is None:
+            timezone.deactivate()
+            return
+
+        tzname = self.read_cookie(request, user_id)
+        if tzname:
+            timezone.activate(get_tzinfo(tzname))
+            return
+
+        try:
+            set_user_timezone(request, request.user.timezone)
+        except AttributeError:
+            timezone.deactivate()
+
+    def process_response(self, request, response):
+        tzname = getattr(request, 'timezone_cookie', None)
         if tzname:
-            timezone.activate(pytz.timezone(tzname))
-        else:
-            try:
-                user_tz = request.user.timezone
-                request.session['user-tz'] = user_tz
-                timezone.activate(pytz.timezone(user_tz))
-            except AttributeError:
-                timezone.deactivate()
+            user_id = request.session.get(SESSION_KEY)
+            if user_id is not None:
+                response.set_signed_cookie(
+                    settings.TIMEZONE_COOKIE_NAME,
+                    "{0}:{1}".format(user_id, tzname),
+                    salt=TIMEZONE_COOKIE_SALT,
+                    max_age=settings.TIMEZONE_COOKIE_AGE,
+                    httponly=True)
+        return response
+
+    def read_cookie(self, request, user_id):
+        value = request.COOKIES.get(settings.TIMEZONE_COOKIE_NAME)
+        if not value:
+            return None
+        try:
+            value = unsign_timezone_cookie(value)
+        except signing.BadSignature:
+            return None
+        cookie_user, _, tzname = value.partition(":")
+        # The cookie of another user (logged out or switched)
+        if cookie_user != str(user_id) or tzname not in pytz.all_timezones_set:
+            return None
+        return tzname
+
+
+class ReplicaPinningMiddleware(object):
+    """Pins the requests to the primary database after a write of the
+    client, see core/routers.py
+
+    Goes first so it runs before any query and sees the writes of the other
+    middlewares.
+    """
+
+    def process_request(self, request):
+        routers.unpin()
+        if settings.REPLICA_PIN_COOKIE_NAME in request.COOKIES:
+            routers.pin_to_primary()
+
+    def process_response(self, request, response):
+        if settings.DATABASE_REPLICAS and routers.wrote():
+            response.set_cookie(settings.REPLICA_PIN_COOKIE_NAME, "1",
+                                max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True)
+        return response
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedEmail',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('subject', models.CharField(verbose_name='Subject', max_length=255)),
+                ('body', models.TextField(verbose_name='Text body')),
+                ('html_body', models.TextField(verbose_name='HTML body', blank=True)),
+                ('from_email', models.CharField(verbose_name='Sender', max_length=254)),
+                ('recipients', models.TextField(verbose_name='Recipients')),
+                ('status', models.CharField(verbose_name='Status', max_length=10, default='pending', choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')])),
+                ('attempts', models.PositiveIntegerField(verbose_name='Attempts', default=0)),
+                ('next_attempt', models.DateTimeField(verbose_name='Next attempt', default=django.utils.timezone.now)),
+                ('last_error', models.TextField(verbose_name='Last error', blank=True)),
+                ('created', models.DateTimeField(verbose_name='Created', auto_now_add=True)),
+                ('sent', models.DateTimeField(verbose_name='Sent', blank=True, null=True)),
+            ],
+            options={
+                'ordering': ('next_attempt',),
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterIndexTogether(
+            name='queuedemail',
+            index_together=set([('status', 'next_attempt')]),
+        ),
+    ]
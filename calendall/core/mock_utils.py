@@ -5,3 +5,52 @@ def local_url_loader(*args, **kwargs):
     with open(args[0].lstrip('/'), 'r') as f:
         result = f.read()
     return result
+
+
+class UpstreamStandIn(object):
+    """Local HTTP server standing in for an upstream (Gravatar) in tests
+
+    'responses' maps the paths to (status, headers, body), the received
+    requests are kept in 'requests' as (path, headers).
+
+        with UpstreamStandIn({'/avatar/x.jpg': (200, {}, b'...')}) as up:
+            urlopen(up.url + 'avatar/x.jpg')
+    """
+
+    def __init__(self, responses=None):
+        self.responses = responses or {}
+        self.requests = []
+
+    def __enter__(self):
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+        import threading
+
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                stand_in.requests.append((self.path, dict(self.headers)))
+                status, headers, body = stand_in.responses.get(
+                    path, (404, {}, b''))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = "http://127.0.0.1:{0}/".format(self.server.server_port)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
@@ -1,3 +1,142 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.encoding import python_2_unicode_compatible
+from django.utils.translation import ugettext_lazy as _
+
+
+class QueuedEmailManager(models.Manager):
+
+    def _from_message(self, message):
+        html_body = ""
+        for content, mimetype in getattr(message, 'alternatives', ()):
+            if mimetype == "text/html":
+                html_body = content
+
+        return self.model(subject=message.subject,
+                          body=message.body,
+                          html_body=html_body,
+                          from_email=message.from_email,
+                          recipients="\n".join(message.recipients()))
+
+    def enqueue(self, message):
+        """Stores an already rendered email message to be sent by a worker"""
+        email = self._from_message(message)
+        email.save()
+        return email
+
+    def enqueue_many(self, messages):
+        """Stores the messages in one query"""
+        return self.bulk_create([self._from_message(m) for m in messages])
+
+    def due(self):
+        """Returns the pending emails that need to be sent now"""
+        return self.filter(status=QueuedEmail.STATUS_PENDING,
+                           next_attempt__lte=timezone.now())
+
+    def backlog(self):
+        return self.filter(status=QueuedEmail.STATUS_PENDING)
+
+    def requeue_stale(self, timeout):
+        """Returns to the queue the emails claimed more than 'timeout'
+        seconds ago, their worker died before sending them. The ones
+        without claim time too (claimed before it was recorded)
+        """
+        stale = timezone.now() - timedelta(seconds=timeout)
+        return self.filter(Q(claimed__lt=stale) | Q(claimed__isnull=True),
+                           status=QueuedEmail.STATUS_SENDING).update(
+                               status=QueuedEmail.STATUS_PENDING)
+
+
+@python_2_unicode_compatible
+class QueuedEmail(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _("Pending")),
+        (STATUS_SENDING, _("Sending")),
+        (STATUS_SENT, _("Sent")),
+        (STATUS_FAILED, _("Failed")),
+    )
+
+    subject = models.CharField(_("Subject"), max_length=255)
+    body = models.TextField(_("Text body"))
+    html_body = models.TextField(_("HTML body"), blank=True)
+    from_email = models.CharField(_("Sender"), max_length=254)
+    # One recipient per line
+    recipients = models.TextField(_("Recipients"))
+
+    status = models.CharField(_("Status"),
+                              max_length=10,
+                              choices=STATUS_CHOICES,
+                              default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(_("Attempts"), default=0)
+    next_attempt = models.DateTimeField(_("Next attempt"),
+                                        default=timezone.now)
+    last_error = models.TextField(_("Last error"), blank=True)
+    created = models.DateTimeField(_("Created"), auto_now_add=True)
+    claimed = models.DateTimeField(_("Claimed"), null=True, blank=True)
+    sent = models.DateTimeField(_("Sent"), null=True, blank=True)
+
+    objects = QueuedEmailManager()
+
+    class Meta:
+        index_together = (("status", "next_attempt"),)
+        ordering = ("next_attempt",)
+
+    def __str__(self):
+        return self.subject
+
+    def claim(self):
+        """Marks the email as being sent, returns False if other worker
+        already has it
+        """
+        now = timezone.now()
+        claimed = QueuedEmail.objects.filter(
+            pk=self.pk, status=self.STATUS_PENDING).update(
+                status=self.STATUS_SENDING, claimed=now)
+        if claimed:
+            self.status = self.STATUS_SENDING
+            self.claimed = now
+        return bool(claimed)
+
+    def as_message(self, connection=None):
+        message = EmailMultiAlternatives(subject=self.subject,
+                                         body=self.body,
+                                         from_email=self.from_email,
+                                         to=self.recipients.splitlines(),
+                                         connection=connection)
+        if self.html_body:
+            message.attach_alternative(self.html_body, "text/html")
+        return message
+
+    def deliver(self, connection=None):
+        """Sends the email, on error will be rescheduled with an exponential
+        backoff until the max attempts are reached. Returns the final status
+        """
+        self.attempts += 1
+        try:
+            self.as_message(connection).send()
+        except Exception as e:
+            self.last_error = str(e)
+            if self.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+                self.status = self.STATUS_FAILED
+            else:
+                delay = (settings.EMAIL_QUEUE_RETRY_DELAY *
+                         2 ** (self.attempts - 1))
+                self.status = self.STATUS_PENDING
+                self.next_attempt = timezone.now() + timedelta(seconds=delay)
+        else:
+            self.status = self.STATUS_SENT
+            self.sent = timezone.now()
+            self.last_error = ""
 
-# Create your models here.
+        self.save()
+        return self.status
@@ -0,0 +1,72 @@
+"""
+Database router sending the reads to the replicas.
+
+    DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+    DATABASE_REPLICAS = ('replica',)
+
+The writes go to the default (primary) database and the reads to a random
+replica of DATABASE_REPLICAS, except the models of DATABASE_PRIMARY_APPS.
+After a write the thread reads from the primary (read-your-writes) until
+the next request. core.middleware.ReplicaPinningMiddleware sends a cookie
+that pins the next requests of the client for REPLICA_PIN_SECONDS, the
+replication lag budget, so the page after a redirect sees the write.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+
+def pin_to_primary():
+    """Reads from the primary database until unpin()"""
+    _state.pinned = True
+
+
+def unpin():
+    _state.pinned = False
+    _state.wrote = False
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def wrote():
+    """True if the thread wrote since the last unpin()"""
+    return getattr(_state, 'wrote', False)
+
+
+def _replicated(model):
+    return model._meta.app_label not in settings.DATABASE_PRIMARY_APPS
+
+
+class ReplicaRouter(object):
+    """Writes to the primary database, reads from the replicas"""
+
+    def db_for_read(self, model, **hints):
+        if (not settings.DATABASE_REPLICAS or is_pinned() or
+                not _replicated(model)):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        if _replicated(model):
+            _state.wrote = True
+            pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # All the databases have the same data
+        databases = {DEFAULT_DB_ALIAS}.union(settings.DATABASE_REPLICAS)
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, model):
+        # Replicated from the primary
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
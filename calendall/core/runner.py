@@ -0,0 +1,180 @@
+"""
+Test runner that shards the test cases across processes.
+
+    $ python manage.py test --parallel=4
+
+Every worker is a forked process with its own test databases (the test
+database name gets the worker number as suffix, in memory SQLite databases
+are already private to each process). The test cases of a class stay in
+the same worker so setUpClass runs once.
+"""
+from collections import OrderedDict
+import io
+import multiprocessing
+from optparse import make_option
+import os
+import time
+import unittest
+
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+
+def iter_tests(suite):
+    """Flattens the suite keeping the order"""
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from iter_tests(test)
+        else:
+            yield test
+
+
+def shard_suite(suite, shards):
+    """Splits the suite in 'shards' suites balanced by number of tests
+
+    The tests of the same class go to the same shard and every shard keeps
+    the order of the suite (the Django runner order).
+    """
+    tests = list(iter_tests(suite))
+    classes = OrderedDict()
+    for test in tests:
+        classes.setdefault(type(test), []).append(test)
+
+    sizes = [0] * shards
+    shard_of = {}
+    # Biggest classes first, into the smallest shard
+    for cls, cls_tests in sorted(classes.items(),
+                                 key=lambda item: -len(item[1])):
+        shard = sizes.index(min(sizes))
+        shard_of[cls] = shard
+        sizes[shard] += len(cls_tests)
+
+    suites = [type(suite)() for i in range(shards)]
+    for test in tests:
+        suites[shard_of[type(test)]].addTest(test)
+    return [s for s in suites if s.countTestCases()]
+
+
+def _format_test(test, err):
+    return "{0}\n{1}: {2}\n{3}\n{4}".format(
+        unittest.TextTestResult.separator1,
+        err[0], test, unittest.TextTestResult.separator2, err[1])
+
+
+class ParallelDiscoverRunner(DiscoverRunner):
+    """DiscoverRunner with the --parallel option"""
+
+    option_list = DiscoverRunner.option_list + (
+        make_option('--parallel', action='store', dest='parallel',
+                    type='int', default=1,
+                    help='Number of processes to run the tests, 0 for one '
+                         'per CPU. Defaults to 1 (no sharding).'),
+    )
+
+    def __init__(self, parallel=1, **kwargs):
+        super().__init__(**kwargs)
+        self.parallel = parallel if parallel > 0 else os.cpu_count()
+
+    def run_tests(self, test_labels, extra_tests=None, **kwargs):
+        if self.parallel == 1:
+            return super().run_tests(test_labels, extra_tests, **kwargs)
+
+        suite = self.build_suite(test_labels, extra_tests)
+        shards = shard_suite(suite, self.parallel)
+
+        # Don't share the parent connections with the children
+        for connection in connections.all():
+            connection.close()
+
+        start = time.perf_counter()
+        workers = []
+        for number, shard in enumerate(shards):
+            reader, writer = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=self.run_worker, args=(number, shard, writer))
+            process.start()
+            writer.close()
+            workers.append((number, process, reader))
+
+        return self.report(workers, start)
+
+    def run_worker(self, number, suite, pipe):
+        """Runs a shard in a worker and sends the result to the parent"""
+        stream = io.StringIO()
+        try:
+            for connection in connections.all():
+                self.set_worker_database(connection, number)
+            self.setup_test_environment()
+            old_config = self.setup_databases()
+            start = time.perf_counter()
+            result = unittest.TextTestRunner(
+                stream=stream, verbosity=self.verbosity,
+                failfast=self.failfast).run(suite)
+            elapsed = time.perf_counter() - start
+            self.teardown_databases(old_config)
+            self.teardown_test_environment()
+
+            pipe.send({
+                'run': result.testsRun,
+                'elapsed': elapsed,
+                'failures': [_format_test(t, ('FAIL', e))
+                             for t, e in result.failures],
+                'errors': [_format_test(t, ('ERROR', e))
+                           for t, e in result.errors],
+                'skipped': len(result.skipped),
+                'output': stream.getvalue() if self.verbosity > 1 else '',
+            })
+        except BaseException as e:
+            pipe.send({'crash': "{0}: {1}\n{2}".format(
+                type(e).__name__, e, stream.getvalue())})
+        finally:
+            pipe.close()
+
+    def set_worker_database(self, connection, number):
+        test_settings = connection.settings_dict['TEST']
+        name = connection.creation._get_test_db_name()
+        # In memory SQLite, private to the process
+        if name == ':memory:' or test_settings.get('MIRROR'):
+            return
+        test_settings['NAME'] = "{0}_{1}".format(name, number)
+
+    def report(self, workers, start):
+        run = failures = errors = skipped = 0
+        details = []
+        for number, process, reader in workers:
+            try:
+                result = reader.recv()
+            except EOFError:
+                result = {'crash': "exit code {0}".format(process.exitcode)}
+            process.join()
+
+            if 'crash' in result:
+                errors += 1
+                details.append("worker {0} crashed: {1}".format(
+                    number, result['crash']))
+                continue
+            print("worker {0}: {1} tests in {2:.3f}s".format(
+                number, result['run'], result['elapsed']))
+            if result['output']:
+                print(result['output'])
+            run += result['run']
+            failures += len(result['failures'])
+            errors += len(result['errors'])
+            skipped += result['skipped']
+            details.extend(result['errors'] + result['failures'])
+
+        elapsed = time.perf_counter() - start
+        for detail in details:
+            print(detail)
+        print(unittest.TextTestResult.separator2)
+        print("Ran {0} tests in {1:.3f}s with {2} processes\n".format(
+            run, elapsed, len(workers)))
+        status = []
+        for name, count in (("failures", failures), ("errors", errors),
+                            ("skipped", skipped)):
+            if count:
+                status.append("{0}={1}".format(name, count))
+        print("{0}{1}".format("FAILED" if failures or errors else "OK",
+                              " ({0})".format(", ".join(status))
+                              if status else ""))
+        return failures + errors
@@ -0,0 +1,24 @@
+"""
+Cached database sessions.
+
+    SESSION_ENGINE = 'core.sessions'
+
+Sessions are read from the SESSION_CACHE_ALIAS cache (locmem in the tests,
+a memcached protocol server in production, it must be shared by all the
+processes, see core.checks) and only hit the database on a cache miss or a
+change. A flushed session (logout) isn't saved again as a new empty one.
+"""
+from django.contrib.sessions.backends import cached_db
+
+
+class SessionStore(cached_db.SessionStore):
+    """cached_db session store without the empty sessions of the logouts"""
+
+    def flush(self):
+        # Django 1.7.2 creates a new session here, saved by SessionMiddleware
+        # because it's modified. Without key nor changes nothing is saved,
+        # a later change gets a new key
+        self.clear()
+        self.delete(self.session_key)
+        self._session_key = None
+        self.modified = False
@@ -0,0 +1,150 @@
+"""
+SMTP email backend with a process wide pool of live connections.
+
+Opening a SMTP connection means TCP + TLS handshakes and the login, the pool
+keeps them open and shares them between the backend instances and threads.
+Connections idle more than EMAIL_POOL_IDLE_TIMEOUT seconds are discarded
+(the servers close them), a connection closed by the server while sending
+is replaced once and the ones that failed otherwise are discarded.
+
+    EMAIL_BACKEND = 'core.smtp.PooledEmailBackend'
+"""
+import collections
+import smtplib
+import ssl
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail.backends import smtp
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _quit(connection):
+    try:
+        connection.quit()
+    except (ssl.SSLError, smtplib.SMTPException, OSError):
+        connection.close()
+
+
+class SMTPConnectionPool(object):
+
+    def __init__(self, connect, size, idle_timeout):
+        self.connect = connect
+        self.idle_timeout = idle_timeout
+        self._idle = collections.deque()  # (connection, last used)
+        self._lock = threading.Lock()
+        # Bounds the connections in use + idle
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        """Returns a live connection, waits if all of them are in use"""
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    connection, last_used = self._idle.pop()
+
+                if time.monotonic() - last_used < self.idle_timeout:
+                    return connection
+                _quit(connection)
+
+            return self.connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, discard=False):
+        if discard:
+            _quit(connection)
+        else:
+            with self._lock:
+                self._idle.append((connection, time.monotonic()))
+        self._slots.release()
+
+    def close(self):
+        """Closes the idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, collections.deque()
+        for connection, last_used in idle:
+            _quit(connection)
+
+
+def get_pool(backend):
+    key = (backend.host, backend.port, backend.username, backend.use_tls,
+           backend.use_ssl)
+
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SMTPConnectionPool(
+                connect=backend.new_connection,
+                size=settings.EMAIL_POOL_SIZE,
+                idle_timeout=settings.EMAIL_POOL_IDLE_TIMEOUT)
+        return _pools[key]
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+class PooledEmailBackend(smtp.EmailBackend):
+
+    def new_connection(self):
+        """Opens a new SMTP connection (handshake, TLS & login)"""
+        backend = smtp.EmailBackend(host=self.host,
+                                    port=self.port,
+                                    username=self.username,
+                                    password=self.password,
+                                    use_tls=self.use_tls,
+                                    use_ssl=self.use_ssl,
+                                    timeout=self.timeout)
+        backend.open()
+        return backend.connection
+
+    def open(self):
+        if self.connection:
+            return False
+        try:
+            self.connection = get_pool(self).acquire()
+            return True
+        except (smtplib.SMTPException, OSError):
+            if not self.fail_silently:
+                raise
+
+    def close(self, discard=False):
+        """Returns the connection to the pool instead of closing it"""
+        if self.connection is None:
+            return
+        connection, self.connection = self.connection, None
+        get_pool(self).release(connection, discard)
+
+    def _send(self, email_message):
+        fail_silently, self.fail_silently = self.fail_silently, False
+        try:
+            try:
+                # After a discarded connection
+                self.open()
+                return super()._send(email_message)
+            except smtplib.SMTPServerDisconnected:
+                # The server closed the pooled connection, retry once with
+                # a new one
+                self.close(discard=True)
+                self.open()
+                return super()._send(email_message)
+        except (smtplib.SMTPException, OSError):
+            # The state of the connection is unknown, not back to the pool
+            self.close(discard=True)
+            if not fail_silently:
+                raise
+            return False
+        finally:
+            self.fail_silently = fail_silently
@@ -0,0 +1,215 @@
+"""
+Precompressed static files, and their serving without a web server in front
+(STATIC_SERVE).
+
+The hashed names have the hash of the content so the files already
+compressed by a previous deploy are skipped. Kept apart from core.storage:
+importing the pipeline storage (on the URLs import or the test discovery)
+freezes its DEBUG dependent settings.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import gzip
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.utils import matches_patterns
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+log = logging.getLogger(__name__)
+
+# Precompressed siblings (Content-Encoding, extension), preferred first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# Names with the content hash of CachedStaticFilesStorage (name.hash.ext)
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{12}\.[^/.]+$")
+# Immutable files are cached a year (the max of HTTP/1.1)
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def compress_file(path, min_size):
+    """Writes the .gz and .br files of the path, only if they are smaller
+
+    Returns the written paths and the extensions skipped because they
+    weren't smaller.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    if len(content) < min_size:
+        return [], []
+
+    compressed = [(".gz", gzip.compress(content, compresslevel=9))]
+    if brotli is not None:
+        compressed.append((".br", brotli.compress(content)))
+
+    written = []
+    skipped = []
+    for extension, data in compressed:
+        if len(data) >= len(content):
+            skipped.append(extension)
+            continue
+        compressed_path = path + extension
+        tmp_path = compressed_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, compressed_path)
+        written.append(compressed_path)
+    return written, skipped
+
+
+class PrecompressMixin(object):
+    """Storage mixin writing the compressed files after the post process
+
+    The extensions not written because the compressed file wasn't smaller
+    are recorded in SKIPPED_NAME, so the next deploys don't compress the
+    file again (the hashed name changes with the content).
+    """
+    SKIPPED_NAME = "precompress-skipped.json"
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if isinstance(hashed_name, str) and hashed_name != name:
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+        for name in self.compress(hashed_names):
+            yield name, name, True
+
+    def compress(self, names):
+        """Compresses the files not compressed yet, yields the new names"""
+        skipped = self.read_skipped()
+        pending = [name for name in sorted(names)
+                   if matches_patterns(name, settings.STATIC_COMPRESS_PATTERNS)
+                   and not self.is_compressed(name, skipped.get(name, ()))]
+        log.debug("Compressing %d static files, %d already compressed",
+                  len(pending), len(names) - len(pending))
+        if not pending:
+            return
+
+        location = os.path.abspath(self.location)
+        with ProcessPoolExecutor(settings.STATIC_COMPRESS_WORKERS) as pool:
+            results = pool.map(compress_file,
+                               [self.path(name) for name in pending],
+                               [settings.STATIC_COMPRESS_MIN_SIZE] *
+                               len(pending))
+            for name, (written, skipped_extensions) in zip(pending, results):
+                if skipped_extensions:
+                    skipped[name] = skipped_extensions
+                for path in written:
+                    yield os.path.relpath(path, location).replace(os.sep,
+                                                                  "/")
+        self.write_skipped(skipped)
+
+    def read_skipped(self):
+        """{hashed name: extensions not worth writing} of the past deploys"""
+        try:
+            with open(self.path(self.SKIPPED_NAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_skipped(self, skipped):
+        path = self.path(self.SKIPPED_NAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(skipped, f, indent=0, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def is_compressed(self, name, skipped=()):
+        # Small files are never compressed, the rest only if the compressed
+        # files are missing and weren't skipped before
+        path = self.path(name)
+        if os.path.getsize(path) < settings.STATIC_COMPRESS_MIN_SIZE:
+            return True
+        extensions = [".gz"]
+        if brotli is not None:
+            extensions.append(".br")
+        return all(extension in skipped or os.path.exists(path + extension)
+                   for extension in extensions)
+
+
+def parse_accept_encoding(header):
+    """Dict of the codings of an Accept-Encoding header and their q values
+
+    The invalid q values are 0, as not acceptable.
+    """
+    accepted = {}
+    for coding in header.split(","):
+        name, *params = coding.split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def serve_static(request, path, document_root=None):
+    """Serves the collected static files and their compressed versions
+
+    For deployments without a web server in front (STATIC_SERVE), the
+    hashed files never change so they are cached by the browsers forever.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = safe_join(document_root or settings.STATIC_ROOT, path)
+    except ValueError:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+
+    content_type, _ = mimetypes.guess_type(fullpath)
+    accepted = parse_accept_encoding(
+        request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    encoding = None
+    for name, extension in ENCODINGS:
+        if accepted.get(name, accepted.get('*', 0)) > 0 and \
+                os.path.isfile(fullpath + extension):
+            encoding = name
+            fullpath += extension
+            break
+
+    stat = os.stat(fullpath)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              stat.st_mtime, stat.st_size):
+        response = HttpResponseNotModified()
+    else:
+        with open(fullpath, 'rb') as f:
+            response = HttpResponse(
+                f.read(), content_type=content_type or
+                'application/octet-stream')
+        response['Content-Length'] = stat.st_size
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if HASHED_NAME_RE.search(path):
+        patch_cache_control(response, public=True,
+                            max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True,
+                            max_age=settings.STATIC_MAX_AGE)
+    return response
@@ -0,0 +1,15 @@
+"""
+Static files storage with precompressed (gzip and brotli) files.
+
+collectstatic writes a .gz (and .br with the brotli package) sibling of
+every hashed file matching STATIC_COMPRESS_PATTERNS, in parallel across
+STATIC_COMPRESS_WORKERS processes (see core.static.PrecompressMixin).
+core.static.serve_static serves them when there is no web server in front.
+"""
+from pipeline.storage import PipelineCachedStorage
+
+from .static import PrecompressMixin
+
+
+class PrecompressedStorage(PrecompressMixin, PipelineCachedStorage):
+    """PipelineCachedStorage writing the compressed files"""
@@ -1,6 +1,9 @@
 from django import template
 from django.contrib.messages import constants
 from django.utils.translation import ugettext_lazy as _
+from django_gravatar.helpers import GRAVATAR_DEFAULT_SIZE
+
+from core.avatars import get_avatar_url
 
 
 register = template.Library()
@@ -47,3 +50,9 @@ def message_css_class(value):
     }
 
     return classes[value.level]
+
+
+@register.simple_tag
+def avatar_url(user_or_email, size=GRAVATAR_DEFAULT_SIZE):
+    """Returns the cached avatar URL of a user or email"""
+    return get_avatar_url(user_or_email, size)
@@ -0,0 +1,181 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from django.utils.six import StringIO
+from django_gravatar.helpers import calculate_gravatar_hash
+
+from . import avatars
+from .mock_utils import UpstreamStandIn
+
+EMAIL_HASH = calculate_gravatar_hash("batman@gmail.com")
+AVATAR_PATH = "/avatar/{0}.jpg".format(EMAIL_HASH)
+JPEG = b"\xff\xd8\xff\xe0 batman"
+LAST_MODIFIED = "Wed, 14 Oct 2026 10:00:00 GMT"
+
+
+@override_settings(AVATAR_PROXY=False)
+class AvatarURLsTestCase(SimpleTestCase):
+
+    def setUp(self):
+        avatars._get_avatar_url.cache_clear()
+
+    def test_cached(self):
+        with mock.patch.object(avatars, 'get_gravatar_url',
+                               wraps=avatars.get_gravatar_url) as build:
+            urls = avatars.get_avatar_urls(["batman@gmail.com",
+                                            "Batman@gmail.com",
+                                            "robin@gmail.com",
+                                            "batman@gmail.com"], 30)
+        self.assertEqual(build.call_count, 2)
+        self.assertEqual(urls[0], urls[1])
+        self.assertEqual(urls[0], urls[3])
+        self.assertNotEqual(urls[0], urls[2])
+        self.assertIn("s=30", urls[0])
+
+    def test_no_email(self):
+        self.assertEqual(avatars.get_avatar_url(None, 30),
+                         avatars.get_avatar_url("", 30))
+
+    def test_proxy_url(self):
+        with self.settings(AVATAR_PROXY=True):
+            self.assertEqual(avatars.get_avatar_url(" Batman@gmail.com", 30),
+                             "/c/avatar/{0}/30".format(EMAIL_HASH))
+            # Rounded up to the served sizes
+            self.assertEqual(avatars.get_avatar_url("batman@gmail.com", 31),
+                             "/c/avatar/{0}/80".format(EMAIL_HASH))
+            self.assertEqual(avatars.get_avatar_url("batman@gmail.com", 512),
+                             "/c/avatar/{0}/150".format(EMAIL_HASH))
+
+
+class AvatarProxyTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.url = reverse("core:avatar", args=(EMAIL_HASH, 30))
+
+    def get(self, upstream, **headers):
+        with self.settings(AVATAR_UPSTREAM_URL=upstream.url,
+                           AVATAR_CACHE_DIR=self.directory):
+            return self.client.get(self.url, **headers)
+
+    def test_fetch_and_cache(self):
+        responses = {AVATAR_PATH: (200, {'Content-Type': "image/jpeg",
+                                         'ETag': '"v1"',
+                                         'Last-Modified': LAST_MODIFIED},
+                                   JPEG)}
+        with UpstreamStandIn(responses) as upstream:
+            response = self.get(upstream)
+            self.assertEqual(response.content, JPEG)
+            self.assertEqual(response['Content-Type'], "image/jpeg")
+            self.assertEqual(response['Last-Modified'], LAST_MODIFIED)
+            self.assertIn("max-age=", response['Cache-Control'])
+            self.assertIn("public", response['Cache-Control'])
+            self.assertIn("s=30", upstream.requests[0][0])
+
+            # From the disk cache
+            response = self.get(upstream)
+            self.assertEqual(response.content, JPEG)
+            self.assertEqual(len(upstream.requests), 1)
+
+            # Browser revalidation
+            response = self.get(upstream,
+                                HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+            response = self.get(upstream,
+                                HTTP_IF_MODIFIED_SINCE=LAST_MODIFIED)
+            self.assertEqual(response.status_code, 304)
+
+    def test_upstream_revalidation(self):
+        responses = {AVATAR_PATH: (200, {'ETag': '"v1"',
+                                         'Last-Modified': LAST_MODIFIED},
+                                   JPEG)}
+        with UpstreamStandIn(responses) as upstream:
+            self.get(upstream)
+            responses[AVATAR_PATH] = (304, {}, b"")
+            with self.settings(AVATAR_REVALIDATE_AFTER=0):
+                response = self.get(upstream)
+
+        self.assertEqual(response.content, JPEG)
+        headers = upstream.requests[1][1]
+        self.assertEqual(headers['If-None-Match'], '"v1"')
+        self.assertEqual(headers['If-Modified-Since'], LAST_MODIFIED)
+
+    def test_identicon_without_gravatar(self):
+        with UpstreamStandIn() as upstream:
+            response = self.get(upstream)
+        self.assertEqual(response['Content-Type'], "image/svg+xml")
+        self.assertIn(b'width="30"', response.content)
+        self.assertEqual(response.content,
+                         avatars.make_identicon(EMAIL_HASH, 30).content)
+
+    def test_upstream_down(self):
+        responses = {AVATAR_PATH: (200, {}, JPEG)}
+        with UpstreamStandIn(responses) as upstream:
+            self.get(upstream)
+        responses[AVATAR_PATH] = (500, {}, b"")
+
+        # Stale avatar
+        with UpstreamStandIn(responses) as upstream, \
+                self.settings(AVATAR_REVALIDATE_AFTER=0):
+            response = self.get(upstream)
+        self.assertEqual(response.content, JPEG)
+
+        # Nothing cached
+        shutil.rmtree(os.path.join(self.directory, EMAIL_HASH[:2]))
+        with UpstreamStandIn(responses) as upstream:
+            response = self.get(upstream)
+            self.assertEqual(response['Content-Type'], "image/svg+xml")
+            self.assertEqual(len(upstream.requests), 1)
+
+            # The identicon is cached for a while, no upstream wait
+            response = self.get(upstream)
+            self.assertEqual(response['Content-Type'], "image/svg+xml")
+            self.assertEqual(len(upstream.requests), 1)
+
+            # And retried after it
+            responses[AVATAR_PATH] = (200, {}, JPEG)
+            later = time.time() + 61
+            with mock.patch.object(avatars.time, 'time', return_value=later):
+                response = self.get(upstream)
+            self.assertEqual(response.content, JPEG)
+            self.assertEqual(len(upstream.requests), 2)
+
+    def test_wrong_size(self):
+        for size in (0, 31, 2048):
+            response = self.client.get(reverse("core:avatar",
+                                               args=(EMAIL_HASH, size)))
+            self.assertEqual(response.status_code, 404)
+
+    def test_prune(self):
+        cache = avatars.AvatarCache(self.directory, max_entries=10)
+        for i in range(12):
+            email_hash = "{0:032x}".format(i)
+            cache.set(email_hash, 30, avatars.make_identicon(email_hash, 30))
+            path = cache.path(email_hash, 30)
+            os.utime(path + ".json", (i, i))
+        self.assertEqual(cache.prune(), 3)
+
+        self.assertIsNone(cache.get("{0:032x}".format(2), 30))
+        self.assertIsNotNone(cache.get("{0:032x}".format(3), 30))
+        self.assertFalse(os.path.exists(cache.path("{0:032x}".format(0), 30)))
+        self.assertEqual(cache.prune(), 0)
+
+    def test_prune_command(self):
+        cache = avatars.AvatarCache(self.directory)
+        for size in (30, 80, 150):
+            cache.set(EMAIL_HASH, size, avatars.make_identicon(EMAIL_HASH,
+                                                               size))
+        out = StringIO()
+        with self.settings(AVATAR_CACHE_DIR=self.directory):
+            call_command('prune_avatars', max_entries=2, stdout=out)
+        self.assertEqual(out.getvalue().strip(), "2 avatars removed")
+        self.assertEqual(len(os.listdir(os.path.dirname(
+            cache.path(EMAIL_HASH, 30)))), 2)
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core import checks
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from .checks import check_shared_caches
+
+MEMCACHED = 'django.core.cache.backends.memcached.MemcachedCache'
+
+
+class SharedCachesCheckTestCase(SimpleTestCase):
+
+    def caches(self, **backends):
+        caches = {alias: dict(config) for alias, config
+                  in settings.CACHES.items()}
+        for alias, backend in backends.items():
+            caches[alias]['BACKEND'] = backend
+        return caches
+
+    def test_local_caches_allowed(self):
+        with self.settings(LOCAL_CACHES_ALLOWED=True):
+            self.assertEqual(check_shared_caches(None), [])
+
+    @override_settings(LOCAL_CACHES_ALLOWED=False)
+    def test_local_cache(self):
+        errors = check_shared_caches(None)
+        self.assertEqual([e.id for e in errors],
+                         ['core.E001'] * len(settings.SHARED_CACHES))
+        self.assertIn("'sessions'", errors[0].msg)
+        self.assertIn("'users'", errors[1].msg)
+        self.assertIn('core.E001', [e.id for e in checks.run_checks()])
+
+        with self.settings(CACHES=self.caches(**{
+                alias: MEMCACHED for alias in settings.SHARED_CACHES})):
+            self.assertEqual(check_shared_caches(None), [])
@@ -0,0 +1,76 @@
+from django.contrib.auth.hashers import (check_password, get_hasher,
+                                         identify_hasher, make_password)
+from django.core.urlresolvers import reverse
+from django.test import Client, TestCase
+from django.test.utils import override_settings
+
+from . import hashers
+from profiles.models import CalendallUser
+
+# Cheap costs for the tests, and the production preferred hasher (the test
+# settings prefer MD5)
+TEST_COSTS = {
+    'PASSWORD_HASHERS': (
+        'core.hashers.Argon2PasswordHasher',
+        'core.hashers.BCryptSHA256PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    ),
+    'PASSWORD_ARGON2_TIME_COST': 1,
+    'PASSWORD_ARGON2_MEMORY_COST': 8,
+    'PASSWORD_ARGON2_PARALLELISM': 1,
+    'PASSWORD_BCRYPT_ROUNDS': 4,
+}
+
+
+@override_settings(**TEST_COSTS)
+class HashersTestCase(TestCase):
+
+    def test_argon2(self):
+        encoded = make_password("I'mBatman123", hasher="argon2")
+        self.assertTrue(
+            encoded.startswith("argon2$argon2id$v=19$m=8,t=1,p=1$"))
+        self.assertTrue(check_password("I'mBatman123", encoded))
+        self.assertFalse(check_password("I'mRobin123", encoded))
+
+        hasher = get_hasher("argon2")
+        self.assertFalse(hasher.must_update(encoded))
+        with self.settings(PASSWORD_ARGON2_TIME_COST=2):
+            self.assertTrue(hasher.must_update(encoded))
+        self.assertEqual(hasher.safe_summary(encoded)['time cost'], "1")
+
+    def test_bcrypt_rounds(self):
+        encoded = make_password("I'mBatman123", hasher="bcrypt_sha256")
+        self.assertIn("$04$", encoded)
+        self.assertTrue(check_password("I'mBatman123", encoded))
+
+        hasher = get_hasher("bcrypt_sha256")
+        self.assertIsInstance(hasher, hashers.BCryptSHA256PasswordHasher)
+        self.assertFalse(hasher.must_update(encoded))
+        with self.settings(PASSWORD_BCRYPT_ROUNDS=5):
+            self.assertTrue(hasher.must_update(encoded))
+
+    def test_rehash_on_login(self):
+        user = CalendallUser(username="batman")
+        user.password = make_password("I'mBatman123", hasher="pbkdf2_sha256")
+        user.save()
+
+        self.assertTrue(user.check_password("I'mBatman123"))
+        user = CalendallUser.objects.get(pk=user.pk)
+        self.assertEqual(identify_hasher(user.password).algorithm, "argon2")
+
+        self.assertFalse(user.check_password("I'mRobin123"))
+
+    @override_settings(DEBUG=True)
+    def test_rehash_keeps_session(self):
+        user = CalendallUser(username="batman", email="darkknight@gmail.com")
+        user.password = make_password("I'mBatman123", hasher="pbkdf2_sha256")
+        user.save()
+
+        c = Client()
+        self.assertTrue(c.login(username="batman", password="I'mBatman123"))
+        user = CalendallUser.objects.get(pk=user.pk)
+        self.assertEqual(identify_hasher(user.password).algorithm, "argon2")
+
+        # The session has the auth hash of the rehashed password
+        response = c.get(reverse("profiles:profile_settings"))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,178 @@
+from unittest import mock
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.core import mail
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.template.loader import render_to_string
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils.six import StringIO
+import premailer
+from premailer import premailer as premailer_module
+
+from . import inliner
+from .utils import send_templated_email
+from profiles.models import CalendallUser
+
+
+CSS = """
+p { color: red; font-size: 12px }
+.footer { color: blue }
+a:hover { color: green }
+@media only screen and (max-width: 640px) { p { font-size: 10px } }
+"""
+
+HTML = """
+<html>
+<head><link rel="stylesheet" href="/static/css/email.css"></head>
+<body>
+  <p>I'm Batman</p>
+  <p class="footer"><a href="heroes/dark-knight">batman</a></p>
+</body>
+</html>
+"""
+
+
+def css_loader(*args, **kwargs):
+    return CSS
+
+
+@mock.patch.object(premailer.Premailer, '_load_external',
+                   side_effect=css_loader)
+@override_settings(EMAIL_CSS_CACHE_SIZE=32)
+class CachedPremailerTestCase(TestCase):
+
+    def setUp(self):
+        inliner.clear_cache()
+        self.base_url = "http://calendall.io"
+
+    def test_same_result_as_premailer(self, mock_method):
+        expected = premailer.transform(HTML, base_url=self.base_url)
+
+        # First time fills the cache, second one uses it
+        for i in range(2):
+            self.assertEqual(inliner.transform(HTML, base_url=self.base_url),
+                             expected)
+
+    def test_stylesheet_loaded_and_parsed_once(self, mock_method):
+        with mock.patch.object(premailer.Premailer, '_parse_style_rules',
+                               autospec=True,
+                               side_effect=premailer.Premailer._parse_style_rules) as parse:
+            for i in range(5):
+                inliner.transform(HTML, base_url=self.base_url)
+
+            self.assertEqual(mock_method.call_count, 1)
+            self.assertEqual(parse.call_count, 1)
+
+    def test_cache_bounded(self, mock_method):
+        with self.settings(EMAIL_CSS_CACHE_SIZE=2):
+            for i in range(5):
+                html = HTML.replace("email.css", "email{0}.css".format(i))
+                inliner.transform(html, base_url=self.base_url)
+                self.assertLessEqual(len(inliner._external_cache), 2)
+
+    def test_premailer_untouched(self, mock_method):
+        inliner.transform(HTML, base_url=self.base_url)
+        self.assertGreater(inliner._merge_styles.cache_info().currsize, 0)
+        # Only our subclass uses the cached merge_styles
+        self.assertFalse(hasattr(premailer_module.merge_styles,
+                                 "cache_info"))
+
+
+@override_settings(DEBUG=True, PIPELINE_CSS={
+    'email-libs': {
+        'source_filenames': ('css/style.css',),
+        'output_filename': 'css/email-libs.min.css',
+    }
+})
+class InlinedTemplatesTestCase(TestCase):
+
+    def setUp(self):
+        self.template_name = "profiles/emails/profiles_email_validation.html"
+
+    def test_inline_template(self):
+        result = inliner.inline_template(self.template_name)
+
+        # Static CSS inlined, template stuff untouched
+        self.assertIn('style="', result)
+        self.assertNotIn("class=", result)
+        self.assertNotIn("stylesheet", result)
+        self.assertIn("{% load i18n %}", result)
+        self.assertIn('{% trans "Validate" %}', result)
+        self.assertIn('href="{% url "profiles:validate" user.username '
+                      'validation_token %}"', result)
+
+    def test_build_and_render(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.settings(EMAIL_INLINED_TEMPLATES_DIR=tmp_dir,
+                               TEMPLATE_DIRS=settings.TEMPLATE_DIRS + (tmp_dir,),
+                               EMAIL_INLINED_TEMPLATES=(self.template_name,)):
+                self.assertIsNone(
+                    inliner.inlined_template_name(self.template_name))
+
+                call_command('inline_email_templates', stdout=StringIO())
+
+                name = inliner.inlined_template_name(self.template_name)
+                self.assertEqual(name, "inlined/" + self.template_name)
+
+                user = CalendallUser(username="batman")
+                token = uuid.uuid4().hex
+                html = inliner.absolute_urls(
+                    render_to_string(name, {'user': user,
+                                            'validation_token': token}),
+                    "http://calendall.io")
+
+                url = "http://calendall.io" + reverse(
+                    "profiles:validate", args=(user.username, token))
+                self.assertIn('href="{0}"'.format(url), html)
+                self.assertIn("batman verify your Calendall account", html)
+
+                with self.settings(EMAIL_USE_INLINED_TEMPLATES=False):
+                    self.assertIsNone(
+                        inliner.inlined_template_name(self.template_name))
+
+    def test_build_on_pipeline_compress(self):
+        # pipeline.conf uses DEBUG when imported, import it with DEBUG=True
+        # like in the templates
+        from pipeline.packager import Packager
+        from pipeline.signals import css_compressed
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.settings(EMAIL_INLINED_TEMPLATES_DIR=tmp_dir,
+                               EMAIL_INLINED_TEMPLATES=(self.template_name,)):
+                packager = Packager()
+                package = packager.package_for('css', 'email-libs')
+                css_compressed.send(sender=packager, package=package)
+
+                self.assertIsNotNone(
+                    inliner.inlined_template_name(self.template_name))
+
+    @mock.patch.object(inliner, 'transform')
+    def test_send_email_skips_inliner(self, mock_method):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.settings(EMAIL_INLINED_TEMPLATES_DIR=tmp_dir,
+                               TEMPLATE_DIRS=settings.TEMPLATE_DIRS + (tmp_dir,),
+                               EMAIL_INLINED_TEMPLATES=(self.template_name,),
+                               EMAIL_BACKEND=settings.TEST_EMAIL_BACKEND):
+                inliner.build_inlined_templates()
+                send_templated_email(
+                    "profiles/emails/profiles_email_validation",
+                    {'user': CalendallUser(username="batman"),
+                     'validation_token': uuid.uuid4().hex},
+                    "Validate", "batman@gmail.com", ("robin@gmail.com",))
+
+        self.assertFalse(mock_method.called)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('style="', mail.outbox[0].alternatives[0][0])
+
+    def test_absolute_urls(self):
+        html = ('<a href="/p/login">login</a><a href="">home</a>'
+                '<img src="cid:logo"><a href="https://gravatar.com">g</a>')
+        self.assertEqual(
+            inliner.absolute_urls(html, "http://calendall.io"),
+            '<a href="http://calendall.io/p/login">login</a>'
+            '<a href="http://calendall.io/">home</a>'
+            '<img src="cid:logo"><a href="https://gravatar.com">g</a>')
@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+from django.test import SimpleTestCase
+
+from .logs import BackgroundFileHandler, JSONFormatter
+
+
+class BackgroundFileHandlerTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, "test.log")
+        self.log = logging.getLogger("core.test_logs")
+        self.log.propagate = False
+        self.log.setLevel(logging.DEBUG)
+        self.addCleanup(setattr, self.log, 'propagate', True)
+
+    def add_handler(self, handler, formatter=None):
+        handler.setFormatter(
+            formatter or logging.Formatter("%(levelname)s %(message)s"))
+        self.log.addHandler(handler)
+        self.addCleanup(handler.close)
+        self.addCleanup(self.log.removeHandler, handler)
+        return handler
+
+    def read(self, path=None):
+        with open(path or self.path) as f:
+            return f.read().splitlines()
+
+    def test_background_write(self):
+        handler = self.add_handler(BackgroundFileHandler(self.path))
+        self.log.info("User '%s' validated", "batman")
+        self.assertNotEqual(handler.listener._thread, None)
+        self.assertNotEqual(handler.listener._thread,
+                            threading.current_thread())
+        handler.flush()
+        self.assertEqual(self.read(), ["INFO User 'batman' validated"])
+
+    def test_arguments_merged_before_queueing(self):
+        handler = self.add_handler(BackgroundFileHandler(self.path))
+        users = ["batman"]
+        self.log.info("Users %s", users)
+        users.append("joker")
+        handler.flush()
+        self.assertEqual(self.read(), ["INFO Users ['batman']"])
+
+    def test_exception(self):
+        handler = self.add_handler(BackgroundFileHandler(self.path))
+        try:
+            raise ValueError("Joker")
+        except ValueError:
+            self.log.exception("Error")
+        handler.flush()
+        lines = self.read()
+        self.assertEqual(lines[0], "ERROR Error")
+        self.assertEqual(lines[-1], "ValueError: Joker")
+
+    def test_rotation(self):
+        handler = self.add_handler(
+            BackgroundFileHandler(self.path, maxBytes=100, backupCount=2))
+        for i in range(10):
+            self.log.info("%d%s", i, "x" * 40)
+        handler.flush()
+        self.assertEqual(sorted(os.listdir(self.dir)),
+                         ["test.log", "test.log.1", "test.log.2"])
+        self.assertEqual(self.read()[-1], "INFO 9" + "x" * 40)
+
+    def test_concurrent_flush(self):
+        handler = self.add_handler(BackgroundFileHandler(self.path))
+        listener = handler.listener
+
+        def log_and_flush(name):
+            for i in range(50):
+                self.log.info("%s %d", name, i)
+                handler.flush()
+
+        threads = [threading.Thread(target=log_and_flush, args=(name,))
+                   for name in ("batman", "robin", "joker", "bane")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIs(handler.listener, listener)
+        self.assertEqual(len(self.read()), 200)
+        handler.close()
+        handler.flush()
+
+    def test_close_writes_pending(self):
+        handler = self.add_handler(BackgroundFileHandler(self.path))
+        for i in range(100):
+            self.log.debug("%d", i)
+        handler.close()
+        self.assertEqual(len(self.read()), 100)
+
+    def test_json(self):
+        handler = self.add_handler(BackgroundFileHandler(self.path),
+                                   JSONFormatter())
+        self.log.warning("Invalid timezone: '%s'", "Gotham",
+                         extra={'user': "batman"})
+        try:
+            raise ValueError("Joker")
+        except ValueError:
+            self.log.exception("Error")
+        handler.flush()
+
+        first, second = [json.loads(l) for l in self.read()]
+        self.assertEqual(first['level'], "WARNING")
+        self.assertEqual(first['logger'], "core.test_logs")
+        self.assertEqual(first['message'], "Invalid timezone: 'Gotham'")
+        self.assertEqual(first['user'], "batman")
+        self.assertNotIn('exception', first)
+        self.assertIn("ValueError: Joker", second['exception'])
@@ -0,0 +1,19 @@
+from django.test import TestCase
+
+from profiles.models import CalendallUser
+
+
+class LowerLookupTestCase(TestCase):
+
+    def test_lower(self):
+        CalendallUser(username="Batman", email="DarkKnight@gmail.com").save()
+
+        query = CalendallUser.objects.filter(
+            email__lower="darkknight@gmail.com")
+        self.assertIn('LOWER("profiles_calendalluser"."email") =',
+                      str(query.query))
+        self.assertEqual(query.count(), 1)
+        self.assertTrue(CalendallUser.objects.filter(
+            username__lower="batman").exists())
+        self.assertFalse(CalendallUser.objects.filter(
+            username__lower="Batman").exists())
@@ -1,9 +1,11 @@
 from django.conf import settings
 from django.core.urlresolvers import reverse
-from django.test import Client, TestCase
-from django.test.utils import override_settings
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.utils import timezone
 
+from core.middleware import TimezoneMiddleware, get_tzinfo
 from profiles.models import CalendallUser
 
 
@@ -29,26 +31,79 @@ class TestTimezoneMiddleware(TestCase):
         self.assertEqual(timezone.get_current_timezone_name(),
                          settings.TIME_ZONE)
 
-    def test_timezone_middleware_logged_from_session(self):
+    def test_timezone_middleware_logged_from_database(self):
+        tz = "Europe/Amsterdam"
+        self.user.timezone = tz
+        self.user.save()
         c = Client()
         c.login(username=self.data['username'],
                 password=self.data['password'])
-        tz = "Europe/Madrid"
-        session = c.session
-        session["user-tz"] = tz
-        session.save()
-        c.get(self.url)
+        response = c.get(self.url)
         self.assertEqual(timezone.get_current_timezone_name(), tz)
+        self.assertIn(settings.TIMEZONE_COOKIE_NAME, response.cookies)
 
-    def test_timezone_middleware_logged_from_database(self):
+    def test_timezone_middleware_logged_from_cookie(self):
         c = Client()
         c.login(username=self.data['username'],
                 password=self.data['password'])
+        c.get(self.url)
 
-        tz = "Europe/Amsterdam"
+        # Next requests don't check the database
+        tz = "Europe/Madrid"
         self.user.timezone = tz
         self.user.save()
-        c.session["user-tz"] = tz
-        c.session.save()
+        response = c.get(self.url)
+        self.assertEqual(timezone.get_current_timezone_name(),
+                         settings.TIME_ZONE)
+        self.assertNotIn(settings.TIMEZONE_COOKIE_NAME, response.cookies)
+
+    def test_timezone_middleware_cookie_other_user(self):
+        c = Client()
+        c.login(username=self.data['username'],
+                password=self.data['password'])
         c.get(self.url)
-        self.assertEqual(timezone.get_current_timezone_name(), tz)
+
+        robin = CalendallUser(username="robin", email="robin@gmail.com",
+                              timezone="Europe/Madrid")
+        robin.set_password(self.data['password'])
+        robin.save()
+        c.login(username="robin", password=self.data['password'])
+        c.get(self.url)
+        self.assertEqual(timezone.get_current_timezone_name(),
+                         "Europe/Madrid")
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_timezone_middleware_no_session_writes(self):
+        c = Client()
+        with self.assertNumQueries(0):
+            c.get(reverse("profiles:login"))
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, c.cookies)
+
+        c.login(username=self.data['username'],
+                password=self.data['password'])
+        c.get(self.url)
+
+        # Session load, the user is cached (profiles.cache)
+        with CaptureQueriesContext(connection) as queries:
+            response = c.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        for query in queries.captured_queries:
+            self.assertRegex(query['sql'], r"^(QUERY = ')?SELECT ")
+
+    def test_timezone_middleware_anonymous_skips_session_and_user(self):
+        timezone.activate(get_tzinfo("Europe/Madrid"))
+        # No session or user attributes, accessing them would fail
+        request = RequestFactory().get(self.url)
+        TimezoneMiddleware().process_request(request)
+        self.assertEqual(timezone.get_current_timezone_name(),
+                         settings.TIME_ZONE)
+
+    def test_tzinfo_cache(self):
+        get_tzinfo.cache_clear()
+        get_tzinfo("Europe/Madrid")
+        get_tzinfo("Europe/Madrid")
+        info = get_tzinfo.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+        self.assertIs(get_tzinfo("Europe/Madrid"),
+                      get_tzinfo("Europe/Madrid"))
@@ -0,0 +1,146 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from .models import QueuedEmail
+
+
+@override_settings(EMAIL_BACKEND=settings.TEST_EMAIL_BACKEND,
+                   EMAIL_QUEUE_MAX_ATTEMPTS=3,
+                   EMAIL_QUEUE_RETRY_DELAY=60)
+class QueuedEmailTestCase(TestCase):
+
+    def setUp(self):
+        self.messages = []
+        for i in range(3):
+            m = EmailMultiAlternatives(subject="Gotham news {0}".format(i),
+                                       body="The joker escaped",
+                                       from_email="batman@gmail.com",
+                                       to=("robin@gmail.com",
+                                           "alfred@gmail.com"))
+            m.attach_alternative("<p>The joker escaped</p>", "text/html")
+            self.messages.append(m)
+
+    def test_enqueue(self):
+        for i in self.messages:
+            QueuedEmail.objects.enqueue(i)
+
+        self.assertEqual(QueuedEmail.objects.backlog().count(),
+                         len(self.messages))
+        self.assertEqual(len(mail.outbox), 0)
+
+        queued = QueuedEmail.objects.get(subject=self.messages[0].subject)
+        message = queued.as_message()
+        self.assertEqual(message.body, self.messages[0].body)
+        self.assertEqual(message.recipients(), self.messages[0].recipients())
+        self.assertEqual(message.alternatives, self.messages[0].alternatives)
+
+    def test_deliver_ok(self):
+        queued = QueuedEmail.objects.enqueue(self.messages[0])
+        self.assertTrue(queued.claim())
+        self.assertFalse(queued.claim())
+
+        self.assertEqual(queued.deliver(), QueuedEmail.STATUS_SENT)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, self.messages[0].subject)
+
+        queued = QueuedEmail.objects.get(id=queued.id)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIsNotNone(queued.sent)
+
+    def test_deliver_retry_backoff(self):
+        queued = QueuedEmail.objects.enqueue(self.messages[0])
+
+        with mock.patch.object(EmailMultiAlternatives, 'send',
+                               side_effect=IOError("SMTP down")):
+            before = timezone.now()
+            self.assertEqual(queued.deliver(), QueuedEmail.STATUS_PENDING)
+            self.assertGreaterEqual(queued.next_attempt,
+                                    before + timedelta(seconds=60))
+
+            before = timezone.now()
+            self.assertEqual(queued.deliver(), QueuedEmail.STATUS_PENDING)
+            self.assertGreaterEqual(queued.next_attempt,
+                                    before + timedelta(seconds=120))
+
+            # Max attempts reached
+            self.assertEqual(queued.deliver(), QueuedEmail.STATUS_FAILED)
+
+        queued = QueuedEmail.objects.get(id=queued.id)
+        self.assertEqual(queued.last_error, "SMTP down")
+        self.assertEqual(QueuedEmail.objects.backlog().count(), 0)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_send_queued_email_command(self):
+        for i in self.messages:
+            QueuedEmail.objects.enqueue(i)
+
+        # Not ready yet
+        delayed = QueuedEmail.objects.enqueue(self.messages[0])
+        delayed.next_attempt = timezone.now() + timedelta(hours=1)
+        delayed.save()
+
+        out = StringIO()
+        call_command('send_queued_email', workers=1, stdout=out)
+
+        self.assertEqual(len(mail.outbox), len(self.messages))
+        self.assertEqual(QueuedEmail.objects.filter(
+            status=QueuedEmail.STATUS_SENT).count(), len(self.messages))
+        self.assertIn("sent: 3", out.getvalue())
+        self.assertIn("backlog: 1", out.getvalue())
+
+    def test_requeue_stale(self):
+        stale, recent = [QueuedEmail.objects.enqueue(m)
+                         for m in self.messages[:2]]
+        self.assertTrue(stale.claim())
+        self.assertTrue(recent.claim())
+        QueuedEmail.objects.filter(pk=stale.pk).update(
+            claimed=timezone.now() - timedelta(minutes=11))
+
+        self.assertEqual(QueuedEmail.objects.requeue_stale(60 * 10), 1)
+        self.assertEqual(list(QueuedEmail.objects.backlog()), [stale])
+
+        # Without claim time
+        self.assertTrue(stale.claim())
+        QueuedEmail.objects.filter(pk=stale.pk).update(claimed=None)
+        self.assertEqual(QueuedEmail.objects.requeue_stale(60 * 10), 1)
+        self.assertEqual(list(QueuedEmail.objects.backlog()), [stale])
+
+        # The command requeues them before each pass
+        QueuedEmail.objects.filter(pk=recent.pk).update(
+            claimed=timezone.now() - timedelta(hours=1))
+        call_command('send_queued_email', workers=1, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_send_queued_email_server_down(self):
+        for i in self.messages:
+            QueuedEmail.objects.enqueue(i)
+
+        with mock.patch.object(EmailBackend, 'open',
+                               side_effect=OSError("Connection refused")):
+            with self.assertRaises(CommandError):
+                call_command('send_queued_email', workers=1,
+                             stdout=StringIO())
+        # Not claimed
+        self.assertEqual(QueuedEmail.objects.backlog().count(), 3)
+
+        # The worker backs off until the server is back
+        sleep = mock.Mock(side_effect=[None, None, KeyboardInterrupt])
+        with mock.patch.object(EmailBackend, 'open',
+                               side_effect=[OSError, OSError, None]), \
+                mock.patch("time.sleep", sleep):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('send_queued_email', workers=1, forever=True,
+                             sleep=1, stdout=StringIO())
+        self.assertEqual([c[0][0] for c in sleep.call_args_list], [1, 2, 1])
+        self.assertEqual(len(mail.outbox), 3)
@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import override_settings
+
+from profiles import utils
+from profiles.models import CalendallUser
+from . import routers
+from .middleware import ReplicaPinningMiddleware
+
+
+@override_settings(DATABASE_REPLICAS=('replica',))
+class ReplicaRouterTestCase(SimpleTestCase):
+
+    def setUp(self):
+        routers.unpin()
+        self.addCleanup(routers.unpin)
+        self.router = routers.ReplicaRouter()
+
+    def test_read_write(self):
+        self.assertEqual(self.router.db_for_read(CalendallUser), 'replica')
+        self.assertEqual(self.router.db_for_write(CalendallUser), 'default')
+        # Read your writes
+        self.assertEqual(self.router.db_for_read(CalendallUser), 'default')
+        self.assertTrue(routers.wrote())
+
+        routers.unpin()
+        self.assertEqual(self.router.db_for_read(CalendallUser), 'replica')
+
+    def test_primary_apps(self):
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+        self.router.db_for_write(Session)
+        self.assertFalse(routers.wrote())
+
+    def test_without_replicas(self):
+        with self.settings(DATABASE_REPLICAS=()):
+            self.assertEqual(self.router.db_for_read(CalendallUser),
+                             'default')
+
+    def test_allow_migrate(self):
+        self.assertIs(self.router.allow_migrate('replica', CalendallUser),
+                      False)
+        self.assertIs(self.router.allow_migrate('default', CalendallUser),
+                      None)
+
+
+@override_settings(DATABASE_REPLICAS=('replica',))
+class ReplicaPinningMiddlewareTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.addCleanup(routers.unpin)
+        self.middleware = ReplicaPinningMiddleware()
+        self.factory = RequestFactory()
+        self.router = routers.ReplicaRouter()
+
+    def request(self, write=False, cookies=None):
+        request = self.factory.get("/")
+        request.COOKIES.update(cookies or {})
+        self.middleware.process_request(request)
+        read_db = self.router.db_for_read(CalendallUser)
+        if write:
+            self.router.db_for_write(CalendallUser)
+        return read_db, self.middleware.process_response(request,
+                                                         HttpResponse())
+
+    def test_pin_after_write(self):
+        routers.pin_to_primary()
+        read_db, response = self.request()
+        self.assertEqual(read_db, 'replica')
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE_NAME, response.cookies)
+
+        read_db, response = self.request(write=True)
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE_NAME]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+
+        # The next request of the client
+        read_db, response = self.request(
+            cookies={settings.REPLICA_PIN_COOKIE_NAME: cookie.value})
+        self.assertEqual(read_db, 'default')
+
+
+class ReplicaDatabaseTestCase(TestCase):
+    """A SQLite file standing in for the replica"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        connections.databases['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(self.dir, "replica.sqlite3"),
+        }
+        self.addCleanup(connections.databases.pop, 'replica')
+        self.addCleanup(connections.__delitem__, 'replica')
+        self.addCleanup(lambda: connections['replica'].close())
+        with connections['replica'].schema_editor() as editor:
+            editor.create_model(CalendallUser)
+        # Only in the replica
+        CalendallUser.objects.using('replica').create(
+            username="joker", email="joker@gmail.com")
+
+        routers.unpin()
+        self.addCleanup(routers.unpin)
+
+    @override_settings(DATABASE_REPLICAS=('replica',))
+    def test_reads(self):
+        self.assertTrue(utils.username_exists("joker"))
+
+        CalendallUser.objects.create(username="batman",
+                                     email="darkknight@gmail.com")
+        self.assertFalse(utils.username_exists("joker"))
+        self.assertTrue(utils.username_exists("batman"))
+
+        routers.unpin()
+        self.assertTrue(utils.username_exists("joker"))
+        self.assertFalse(utils.username_exists("batman"))
+
+    def test_without_replicas(self):
+        self.assertFalse(utils.username_exists("joker"))
@@ -0,0 +1,42 @@
+import unittest
+
+from django.test import SimpleTestCase
+
+from .runner import iter_tests, shard_suite
+
+
+def make_test_case(name, tests):
+    """A TestCase class with 'tests' empty tests, built in the tests so the
+    runner doesn't discover it
+    """
+    attrs = {'test_{0}'.format(i): lambda self: None
+             for i in range(1, tests + 1)}
+    return type(name, (unittest.TestCase,), attrs)
+
+
+class ShardSuiteTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.big = make_test_case("BigTestCase", 3)
+        self.medium = make_test_case("MediumTestCase", 2)
+        self.small = make_test_case("SmallTestCase", 1)
+
+        loader = unittest.defaultTestLoader
+        self.suite = unittest.TestSuite(
+            loader.loadTestsFromTestCase(cls)
+            for cls in (self.small, self.big, self.medium))
+
+    def test_shard_suite(self):
+        shards = shard_suite(self.suite, 2)
+        self.assertEqual([s.countTestCases() for s in shards], [3, 3])
+
+        # Classes aren't split and the order is kept
+        self.assertEqual([type(t) for t in iter_tests(shards[0])],
+                         [self.big] * 3)
+        self.assertEqual([type(t) for t in iter_tests(shards[1])],
+                         [self.small] + [self.medium] * 2)
+
+    def test_shard_suite_more_shards_than_classes(self):
+        shards = shard_suite(self.suite, 8)
+        self.assertEqual(len(shards), 3)
+        self.assertEqual(sum(s.countTestCases() for s in shards), 6)
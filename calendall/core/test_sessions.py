@@ -0,0 +1,69 @@
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from .sessions import SessionStore
+from profiles.models import CalendallUser
+
+
+@override_settings(SESSION_ENGINE='core.sessions')
+class SessionStoreTestCase(TestCase):
+
+    def setUp(self):
+        caches['sessions'].clear()
+        self.session = SessionStore()
+        self.session['_auth_user_id'] = 1
+        self.session.save()
+
+    def test_cached(self):
+        session = SessionStore(self.session.session_key)
+        with self.assertNumQueries(0):
+            self.assertEqual(session['_auth_user_id'], 1)
+
+    def test_flushed_session_not_saved(self):
+        session = SessionStore(self.session.session_key)
+        session.flush()
+        self.assertFalse(Session.objects.exists())
+        self.assertIsNone(session.session_key)
+        # SessionMiddleware only saves the modified sessions
+        self.assertFalse(session.modified)
+
+        session['_auth_user_id'] = 2
+        session.save()
+        self.assertNotEqual(session.session_key, self.session.session_key)
+        self.assertEqual(Session.objects.get().get_decoded(),
+                         {'_auth_user_id': 2})
+
+    @override_settings(DEBUG=True)
+    def test_logout_creates_no_session(self):
+        user = CalendallUser(username="batman")
+        user.set_password("I'mBatman123")
+        user.save()
+        c = Client()
+        c.login(username="batman", password="I'mBatman123")
+
+        response = c.get(reverse("profiles:logout"))
+        self.assertEqual(response.status_code, 301)
+        # Only the one of setUp
+        self.assertEqual(list(Session.objects.values_list("session_key",
+                                                          flat=True)),
+                         [self.session.session_key])
+
+    @override_settings(DEBUG=True)
+    def test_logged_request_skips_session_table(self):
+        user = CalendallUser(username="batman")
+        user.set_password("I'mBatman123")
+        user.save()
+        c = Client()
+        c.login(username="batman", password="I'mBatman123")
+        url = reverse("profiles:profile_settings")
+        c.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = c.get(url)
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            self.assertNotIn("django_session", query['sql'])
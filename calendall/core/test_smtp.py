@@ -0,0 +1,140 @@
+import asyncore
+import smtpd
+import smtplib
+import threading
+from unittest import mock
+
+from django.core.mail import EmailMessage, get_connection
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from . import smtp
+
+
+class FakeSMTPServer(smtpd.SMTPServer):
+    """Local SMTP stand-in that counts the connections"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), None)
+        self.port = self.socket.getsockname()[1]
+        self.connections = 0
+        self.messages = []
+        self.channels = []
+        # Error reply of the messages, None to accept them
+        self.reply = None
+
+    def handle_accepted(self, conn, addr):
+        self.connections += 1
+        self.channels.append(
+            smtpd.SMTPChannel(self, conn, addr, map=self._map))
+
+    def process_message(self, peer, mailfrom, rcpttos, data, **kwargs):
+        self.messages.append((mailfrom, rcpttos))
+        return self.reply
+
+    def drop_connections(self):
+        for channel in self.channels:
+            channel.close()
+        self.channels = []
+
+
+class PooledEmailBackendTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.server = FakeSMTPServer()
+        self.map = self.server._map
+        self.thread = threading.Thread(
+            target=asyncore.loop,
+            kwargs={'timeout': 0.05, 'map': self.map})
+        self.thread.start()
+
+        self.settings_override = override_settings(
+            EMAIL_BACKEND='core.smtp.PooledEmailBackend',
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.server.port,
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+            EMAIL_POOL_SIZE=2,
+            EMAIL_POOL_IDLE_TIMEOUT=30)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        smtp.close_pools()
+        self.settings_override.disable()
+        asyncore.close_all(map=self.map)
+        self.thread.join()
+
+    def message(self, i=0):
+        return EmailMessage(subject="Gotham news {0}".format(i),
+                            body="The joker escaped",
+                            from_email="batman@gmail.com",
+                            to=("robin@gmail.com",))
+
+    def wait_messages(self, number):
+        for i in range(100):
+            if len(self.server.messages) >= number:
+                break
+            threading.Event().wait(0.05)
+        self.assertEqual(len(self.server.messages), number)
+
+    def test_connection_reused(self):
+        for i in range(5):
+            get_connection().send_messages([self.message(i)])
+
+        self.wait_messages(5)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_pool_bounded_between_threads(self):
+        def send(i):
+            for j in range(3):
+                get_connection().send_messages([self.message(i)])
+
+        threads = [threading.Thread(target=send, args=(i,)) for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.wait_messages(18)
+        self.assertLessEqual(self.server.connections, 2)
+
+    def test_idle_timeout_reconnects(self):
+        with self.settings(EMAIL_POOL_IDLE_TIMEOUT=0):
+            for i in range(3):
+                get_connection().send_messages([self.message(i)])
+
+        self.wait_messages(3)
+        self.assertEqual(self.server.connections, 3)
+
+    def test_reconnect_when_server_disconnects(self):
+        get_connection().send_messages([self.message()])
+        self.wait_messages(1)
+
+        self.server.drop_connections()
+        get_connection().send_messages([self.message()])
+
+        self.wait_messages(2)
+        self.assertEqual(self.server.connections, 2)
+
+    def test_failed_connection_discarded(self):
+        self.server.reply = "554 Transaction failed"
+        with self.assertRaises(smtplib.SMTPDataError):
+            get_connection().send_messages([self.message()])
+        self.server.reply = None
+        get_connection().send_messages([self.message()])
+
+        self.wait_messages(2)
+        self.assertEqual(self.server.connections, 2)
+
+    def test_reconnect_error(self):
+        get_connection().send_messages([self.message()])
+        self.wait_messages(1)
+
+        self.server.drop_connections()
+        with mock.patch("django.core.mail.backends.smtp.smtplib.SMTP",
+                        side_effect=ConnectionRefusedError):
+            self.assertEqual(get_connection(fail_silently=True)
+                             .send_messages([self.message()]), 0)
+            with self.assertRaises(ConnectionRefusedError):
+                get_connection().send_messages([self.message()])
@@ -0,0 +1,130 @@
+import gzip
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+import brotli
+from django.core.files.storage import FileSystemStorage
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase
+from django.test.utils import override_settings
+
+from .static import PrecompressMixin, serve_static
+
+CSS = b"body { color: black; }\n" * 100
+HASHED_NAME = "css/base.0123456789ab.css"
+
+
+class TestStorage(PrecompressMixin, FileSystemStorage):
+    """Without the pipeline and the cache of the hashed names"""
+
+
+class StaticTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.mkdir(os.path.join(self.root, "css"))
+        for name, content in ((HASHED_NAME, CSS), ("css/base.css", CSS),
+                              ("css/small.0123456789ab.css", b"a{}")):
+            with open(os.path.join(self.root, name), "wb") as f:
+                f.write(content)
+        self.storage = TestStorage(location=self.root)
+
+
+@override_settings(STATIC_COMPRESS_WORKERS=2)
+class PrecompressedStorageTestCase(StaticTestCase):
+
+    def test_compress(self):
+        names = [HASHED_NAME, "css/small.0123456789ab.css"]
+        self.assertEqual(sorted(self.storage.compress(names)),
+                         [HASHED_NAME + ".br", HASHED_NAME + ".gz"])
+        with open(os.path.join(self.root, HASHED_NAME + ".gz"), "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), CSS)
+        with open(os.path.join(self.root, HASHED_NAME + ".br"), "rb") as f:
+            self.assertEqual(brotli.decompress(f.read()), CSS)
+
+        # Already compressed, the hash is the same
+        self.assertEqual(list(self.storage.compress(names)), [])
+
+    def test_incompressible_skipped(self):
+        name = "css/random.0123456789ab.css"
+        with open(os.path.join(self.root, name), "wb") as f:
+            f.write(os.urandom(1024))
+        self.assertEqual(list(self.storage.compress([name])), [])
+        self.assertFalse(os.path.exists(os.path.join(self.root,
+                                                     name + ".gz")))
+
+        # Not compressed again on the next deploys
+        with mock.patch("core.static.ProcessPoolExecutor") as pool:
+            self.assertEqual(list(self.storage.compress([name])), [])
+        self.assertFalse(pool.called)
+        self.assertEqual(
+            sorted(self.storage.compress([name, HASHED_NAME])),
+            [HASHED_NAME + ".br", HASHED_NAME + ".gz"])
+
+    def test_compress_patterns(self):
+        with self.settings(STATIC_COMPRESS_PATTERNS=("*.js",)):
+            self.assertEqual(list(self.storage.compress([HASHED_NAME])), [])
+
+
+class ServeStaticTestCase(StaticTestCase):
+
+    def setUp(self):
+        super().setUp()
+        list(self.storage.compress([HASHED_NAME]))
+        self.factory = RequestFactory()
+
+    def get(self, path, **headers):
+        return serve_static(self.factory.get("/static/" + path, **headers),
+                            path, document_root=self.root)
+
+    def test_immutable(self):
+        response = self.get(HASHED_NAME)
+        self.assertEqual(response.content, CSS)
+        self.assertEqual(response['Content-Type'], "text/css")
+        self.assertIn("immutable", response['Cache-Control'])
+        self.assertIn("max-age=31536000", response['Cache-Control'])
+        self.assertEqual(response['Vary'], "Accept-Encoding")
+
+        response = self.get("css/base.css")
+        self.assertNotIn("immutable", response['Cache-Control'])
+
+    def test_compressed(self):
+        response = self.get(HASHED_NAME, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response['Content-Encoding'], "br")
+        self.assertEqual(brotli.decompress(response.content), CSS)
+
+        response = self.get(HASHED_NAME, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response['Content-Encoding'], "gzip")
+        self.assertEqual(gzip.decompress(response.content), CSS)
+
+        # Not compressed
+        response = self.get("css/base.css", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_not_acceptable_encoding(self):
+        for accept in ("gzip;q=0, br;q=0", "*;q=0", "gzipped, brx",
+                       "br;q=0.0, gzip;q=nope, identity"):
+            response = self.get(HASHED_NAME, HTTP_ACCEPT_ENCODING=accept)
+            self.assertFalse(response.has_header('Content-Encoding'), accept)
+            self.assertEqual(response.content, CSS)
+
+        response = self.get(HASHED_NAME,
+                            HTTP_ACCEPT_ENCODING="br;q=0, GZIP; q=0.5")
+        self.assertEqual(response['Content-Encoding'], "gzip")
+        response = self.get(HASHED_NAME, HTTP_ACCEPT_ENCODING="*")
+        self.assertEqual(response['Content-Encoding'], "br")
+
+    def test_not_modified(self):
+        response = self.get(HASHED_NAME)
+        response = self.get(
+            HASHED_NAME, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_not_found(self):
+        for path in ("css/nothing.css", "../" + os.path.basename(self.root),
+                     "css"):
+            with self.assertRaises(Http404):
+                self.get(path)
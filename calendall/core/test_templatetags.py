@@ -1,7 +1,12 @@
+from django.template import Context, Template
 from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils.html import escape
+from django_gravatar.helpers import get_gravatar_url
 
 
 from .templatetags import core_tags
+from profiles.models import CalendallUser
 
 
 class CoreTagsTestCase(TestCase):
@@ -60,3 +65,16 @@ class CoreTagsTestCase(TestCase):
                                        i['last_join_word'],
                                        i['join_word']),
                 i['result'])
+
+    @override_settings(AVATAR_PROXY=False)
+    def test_avatar_url(self):
+        user = CalendallUser(email="DarkKnight@gmail.com ")
+        url = core_tags.avatar_url(user, 30)
+        self.assertEqual(url, escape(get_gravatar_url("darkknight@gmail.com",
+                                                      size=30)))
+        self.assertEqual(core_tags.avatar_url("darkknight@gmail.com", "30"),
+                         url)
+
+        html = Template("{% load core_tags %}{% avatar_url user 30 %}").render(
+            Context({'user': user}))
+        self.assertEqual(html, url)
@@ -0,0 +1,68 @@
+import copy
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+import pytz
+
+from . import timezones
+
+
+class TimezonesRegistryTestCase(TestCase):
+
+    def test_registry(self):
+        self.assertEqual(list(timezones.TIMEZONES), pytz.common_timezones)
+        self.assertEqual(len(timezones.TIMEZONES_SET),
+                         len(timezones.TIMEZONE_CHOICES))
+        self.assertIn(("Europe/Madrid", "Europe/Madrid"),
+                      timezones.TIMEZONE_CHOICES)
+
+    def test_grouped_choices(self):
+        groups = dict(timezones.TIMEZONE_GROUPED_CHOICES)
+        self.assertIn(("Europe/Madrid", "Madrid"), groups["Europe"])
+        self.assertIn(("America/New_York", "New York"), groups["America"])
+        self.assertEqual(groups["UTC"], "UTC")
+
+        flat = []
+        for key, value in timezones.TIMEZONE_GROUPED_CHOICES:
+            if isinstance(value, str):
+                flat.append(key)
+            else:
+                flat.extend(tz for tz, city in value)
+        self.assertEqual(sorted(flat), sorted(timezones.TIMEZONES))
+
+    def test_is_valid_timezone(self):
+        self.assertTrue(timezones.is_valid_timezone("Europe/Madrid"))
+        self.assertFalse(timezones.is_valid_timezone("Inferno"))
+        self.assertFalse(timezones.is_valid_timezone(None))
+
+
+class TimezoneFieldsTestCase(TestCase):
+
+    class TimezoneForm(forms.Form):
+        timezone = timezones.TimezoneFormField()
+
+    def test_form_field(self):
+        form = self.TimezoneForm({'timezone': "Europe/Madrid"})
+        self.assertTrue(form.is_valid())
+        form = self.TimezoneForm({'timezone': "Inferno"})
+        self.assertFalse(form.is_valid())
+
+    def test_form_field_shares_choices(self):
+        field = timezones.TimezoneFormField()
+        self.assertIs(copy.deepcopy(field).choices, field.choices)
+        form = self.TimezoneForm()
+        self.assertIs(form.fields['timezone'].choices,
+                      self.TimezoneForm.base_fields['timezone'].choices)
+        self.assertEqual(field.choices,
+                         list(timezones.TIMEZONE_GROUPED_CHOICES))
+
+    def test_model_field(self):
+        field = timezones.TimezoneField(default='UTC')
+        field.validate("Europe/Madrid", None)
+        with self.assertRaises(ValidationError):
+            field.validate("Inferno", None)
+        with self.assertRaises(ValidationError):
+            field.validate("", None)
+        self.assertIsInstance(field.formfield(), timezones.TimezoneFormField)
+        self.assertNotIn('choices', field.deconstruct()[3])
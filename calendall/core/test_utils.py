@@ -1,12 +1,14 @@
 from django.conf import settings
 from django.core import mail
-from django.template.loader import render_to_string
+from django.template.loader import (get_template, get_template_from_string,
+                                    render_to_string)
 from django.test import TestCase
 from django.test.utils import override_settings
 from unittest import mock
 import premailer
 
-from .utils import send_templated_email
+from .models import QueuedEmail
+from .utils import send_templated_email, send_templated_emails
 from .mock_utils import local_url_loader
 
 
@@ -44,3 +46,104 @@ class TestEmailUtils(TestCase):
         self.assertEquals(mail.outbox[0].body, result_txt)
         self.assertEquals(mail.outbox[0].alternatives[0][0], result_html)
         self.assertEquals(data['receivers'][0], mail.outbox[0].recipients()[0])
+
+    @override_settings(EMAIL_DELIVERY="queue")
+    def test_send_email_queued(self, mock_method):
+        data = {
+            "subject": "I'm Batman",
+            "context": {
+                "user": "Joker",
+                "domain": settings.DOMAIN
+            },
+            "template_name": "tests/emails/tests_email_test",
+            "sender": "batman@gmail.com",
+            "receivers": ("joker@gmail.com", "harley@gmail.com"),
+        }
+
+        send_templated_email(**data)
+        self.assertEquals(len(mail.outbox), 0)
+        self.assertEquals(QueuedEmail.objects.count(), 1)
+
+        queued = QueuedEmail.objects.get()
+        self.assertEquals(queued.status, QueuedEmail.STATUS_PENDING)
+        self.assertEquals(queued.subject, data['subject'])
+        self.assertEquals(queued.from_email, data['sender'])
+        self.assertEquals(queued.recipients.splitlines(),
+                          list(data['receivers']))
+        self.assertTrue(queued.html_body)
+
+    def batch(self, users=("joker", "riddler", "penguin")):
+        return [
+            {
+                "subject": "I'm Batman",
+                "context": {"user": u, "domain": settings.DOMAIN},
+                "template_name": "tests/emails/tests_email_test",
+                "sender": "batman@gmail.com",
+                "receivers": ("{0}@gmail.com".format(u),),
+            } for u in users
+        ]
+
+    def check_outbox(self, batch):
+        self.assertEquals(len(mail.outbox), len(batch))
+        for i, email in enumerate(batch):
+            self.assertEquals(mail.outbox[i].recipients(),
+                              list(email['receivers']))
+            self.assertIn(email['context']['user'], mail.outbox[i].body)
+            self.assertIn(email['context']['user'],
+                          mail.outbox[i].alternatives[0][0])
+
+    def test_send_emails_batch(self, mock_method):
+        batch = self.batch()
+
+        # One backend connection and one template compilation for all the
+        # batch
+        with mock.patch('core.utils.get_connection',
+                        wraps=mail.get_connection) as connection:
+            with mock.patch('core.utils.get_template',
+                            wraps=get_template) as template:
+                self.assertEquals(send_templated_emails(iter(batch)),
+                                  len(batch))
+                self.assertEquals(connection.call_count, 1)
+                self.assertEquals(template.call_count, 2)
+
+        self.check_outbox(batch)
+
+    @override_settings(TEMPLATE_LOADERS=(
+        ('django.template.loaders.cached.Loader', (
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        )),
+    ))
+    def test_send_emails_batch_cached_loader(self, mock_method):
+        batch = [dict(email, template_name="profiles/emails/"
+                                            "profiles_email_welcome")
+                 for email in self.batch()]
+
+        # The templates and their parents are compiled on the first batch
+        with mock.patch('django.template.loader.get_template_from_string',
+                        wraps=get_template_from_string) as compile:
+            send_templated_emails(batch)
+            compiled = compile.call_count
+            self.assertGreater(compiled, 2)
+            send_templated_emails(batch)
+            self.assertEquals(compile.call_count, compiled)
+        self.assertEquals(len(mail.outbox), 2 * len(batch))
+
+    @override_settings(EMAIL_BATCH_CHUNK_SIZE=2)
+    def test_send_emails_batch_processes(self, mock_method):
+        batch = self.batch()
+
+        self.assertEquals(send_templated_emails(batch, processes=2),
+                          len(batch))
+        self.check_outbox(batch)
+
+        with self.assertRaises(ValueError):
+            send_templated_emails(batch, request=mock.Mock(), processes=2)
+
+    @override_settings(EMAIL_DELIVERY="queue", EMAIL_BATCH_CHUNK_SIZE=2)
+    def test_send_emails_batch_queued(self, mock_method):
+        batch = self.batch()
+
+        self.assertEquals(send_templated_emails(batch), len(batch))
+        self.assertEquals(len(mail.outbox), 0)
+        self.assertEquals(QueuedEmail.objects.backlog().count(), len(batch))
@@ -0,0 +1,52 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import translation
+
+from .widgets import SemanticSelect
+
+
+class SemanticSelectTestCase(TestCase):
+
+    def setUp(self):
+        SemanticSelect._menus.clear()
+        self.widget = SemanticSelect(
+            attrs={'placeholder': "Select"},
+            choices=(('', '---'),
+                     ("Europe/Madrid", "Madrid"),
+                     ("Europe/Rome", "Rome <3"),
+                     ("Asia", (("Asia/Tokyo", "Tokyo"),))))
+
+    def test_render(self):
+        html = self.widget.render("timezone", "Europe/Rome",
+                                  attrs={'id': "id_timezone"})
+        self.assertIn('<input id="id_timezone" name="timezone" '
+                      'type="hidden" value="Europe/Rome">', html)
+        self.assertIn('<div class="default text">Select</div>', html)
+        self.assertIn('<div class="item active selected" '
+                      'data-value="Europe/Rome">Rome &lt;3</div>', html)
+        self.assertIn('<div class="item" data-value="Europe/Madrid">'
+                      'Madrid</div>', html)
+        self.assertIn('<div class="header">Asia</div>', html)
+        self.assertNotIn('data-value=""', html)
+        self.assertEqual(html.count("selected"), 1)
+
+    def test_render_no_value(self):
+        html = self.widget.render("timezone", None)
+        self.assertIn('value=""', html)
+        self.assertNotIn("selected", html)
+
+    def test_menu_cache(self):
+        with mock.patch.object(SemanticSelect, 'build_menu',
+                               wraps=self.widget.build_menu) as build:
+            first = self.widget.render("timezone", "Europe/Rome")
+            second = self.widget.render("timezone", "Europe/Madrid")
+            self.assertEqual(build.call_count, 1)
+            with translation.override("es"):
+                self.widget.render("timezone", "Europe/Rome")
+            self.assertEqual(build.call_count, 2)
+
+        # The cached menu is not modified by the selected item
+        self.assertIn('class="item active selected" data-value="Europe/Rome"',
+                      first)
+        self.assertIn('class="item" data-value="Europe/Rome"', second)
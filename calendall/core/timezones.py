@@ -0,0 +1,98 @@
+"""
+Registry of the timezones the users can select.
+
+Everything is built once at import time from pytz.common_timezones, use
+the frozenset for lookups instead of the pytz lazy lists.
+"""
+from collections import OrderedDict
+
+from django import forms
+from django.core import exceptions
+from django.db import models
+import pytz
+
+TIMEZONES = tuple(pytz.common_timezones)
+TIMEZONES_SET = frozenset(TIMEZONES)
+
+# [("Europe/Madrid", "Europe/Madrid"), ...]
+TIMEZONE_CHOICES = tuple((tz, tz) for tz in TIMEZONES)
+
+
+def _grouped_choices():
+    # Zones without region (UTC, GMT) are top level choices
+    groups = OrderedDict()
+    for tz in TIMEZONES:
+        region, _, city = tz.partition("/")
+        if city:
+            groups.setdefault(region, []).append(
+                (tz, city.replace("_", " ")))
+        else:
+            groups[tz] = tz
+
+    return tuple((key, value if isinstance(value, str) else tuple(value))
+                 for key, value in groups.items())
+
+# [("Europe", (("Europe/Madrid", "Madrid"), ...)), ("UTC", "UTC"), ...]
+TIMEZONE_GROUPED_CHOICES = _grouped_choices()
+
+
+def is_valid_timezone(value):
+    return value in TIMEZONES_SET
+
+
+class TimezoneFormField(forms.TypedChoiceField):
+    """Timezone select grouped by region, with constant time validation"""
+
+    def __init__(self, *args, **kwargs):
+        kwargs['choices'] = TIMEZONE_GROUPED_CHOICES
+        super().__init__(*args, **kwargs)
+
+    def __deepcopy__(self, memo):
+        # Choices never change, share them between the form instances
+        # instead of deep copying ~430 tuples per form (the rendered menu of
+        # core.widgets.SemanticSelect is cached by them)
+        result = super(forms.ChoiceField, self).__deepcopy__(memo)
+        result._choices = self._choices
+        return result
+
+    def valid_value(self, value):
+        return is_valid_timezone(value)
+
+
+class TimezoneField(models.CharField):
+    """CharField with the registry timezones as choices"""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', 40)  # Max is 30, but 10 extra
+        kwargs['choices'] = TIMEZONE_CHOICES
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        # Choices depend on the installed pytz, keep them out of migrations
+        name, path, args, kwargs = super().deconstruct()
+        del kwargs['choices']
+        return name, path, args, kwargs
+
+    def validate(self, value, model_instance):
+        # Same as Field.validate without the linear scan of the choices
+        if not self.editable:
+            return
+
+        if value not in self.empty_values and not is_valid_timezone(value):
+            raise exceptions.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value})
+
+        if value is None and not self.null:
+            raise exceptions.ValidationError(self.error_messages['null'],
+                                             code='null')
+
+        if not self.blank and value in self.empty_values:
+            raise exceptions.ValidationError(self.error_messages['blank'],
+                                             code='blank')
+
+    def formfield(self, **kwargs):
+        defaults = {'choices_form_class': TimezoneFormField}
+        defaults.update(kwargs)
+        return super().formfield(**defaults)
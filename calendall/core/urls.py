@@ -0,0 +1,8 @@
+from django.conf.urls import patterns, url
+
+from . import views
+
+urlpatterns = patterns('',
+    url(r'^avatar/(?P<email_hash>[a-f0-9]{32})/(?P<size>[0-9]{1,4})$',
+        views.AvatarProxy.as_view(), name="avatar"),
+)
@@ -1,49 +1,220 @@
+from concurrent.futures import ProcessPoolExecutor
+import itertools
 import logging
+import time
 
 from django.conf import settings
-from django.core.mail import send_mail
-from django.template import RequestContext
-from django.template.loader import render_to_string
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template import Context, RequestContext
+from django.template.loader import get_template
 
-import premailer
+from . import inliner
+from .models import QueuedEmail
 
 
 log = logging.getLogger(__name__)
 
+EMAIL_DELIVERY_SYNC = "sync"
+EMAIL_DELIVERY_QUEUE = "queue"
+
+
+def delete_in_batches(queryset, batch_size, sleep=0, dry_run=False):
+    """Deletes the rows of the queryset in primary key order (keyset
+    pagination), batch_size rows per query so the locks are short. Yields
+    the primary keys of each batch, with dry_run nothing is deleted
+    """
+    last_pk = None
+    while True:
+        batch = queryset.order_by("pk")
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        pks = list(batch.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return
+
+        if not dry_run:
+            # The queryset filters again so rows changed meanwhile are kept
+            queryset.filter(pk__in=pks).delete()
+        last_pk = pks[-1]
+        yield pks
+
+        if sleep and not dry_run:
+            time.sleep(sleep)
+
+
+def _email_base(request):
+    """Returns the request context and the base url for the links"""
+    if request:
+        # Is more handy to use 'request' instance in render_to_string:
+        # https://github.com/django/django/commit/eaa1a22341aef5b92f5c3cd682f01e61c4159262
+        return RequestContext(request), "http://" + request.get_host()
+    return None, "http://" + settings.DOMAIN
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class EmailTemplates(object):
+    """The .txt and .html templates of a templated email, compiled once and
+    rendered for every email. With the cached template loader (production
+    settings) their parents are compiled once per process too
+    """
+
+    def __init__(self, template_name):
+        self.txt = get_template(template_name + ".txt")
+
+        # Use the template with the CSS already inlined if it has been built
+        # (inline_email_templates command)
+        inlined_name = inliner.inlined_template_name(template_name + ".html")
+        self.inlined = bool(inlined_name)
+        self.html = get_template(inlined_name or template_name + ".html")
+
+    @staticmethod
+    def _render(template, context, request_context):
+        # Same as render_to_string
+        if request_context is None:
+            return template.render(Context(context))
+        with request_context.push(context):
+            return template.render(request_context)
+
+    def render(self, context, request_context, base_url):
+        """Returns the text and the html of the email"""
+        txt_render = self._render(self.txt, context, request_context)
+        html_render = self._render(self.html, context, request_context)
+
+        if self.inlined:
+            html_render = inliner.absolute_urls(html_render, base_url)
+        else:
+            # Inline CSS and links, the parsed stylesheets are cached per
+            # process
+            # Mock in tests
+            html_render = inliner.transform(html_render, base_url=base_url)
+
+        return txt_render, html_render
+
+
+def _build_message(subject, sender, receivers, txt_render, html_render):
+    message = EmailMultiAlternatives(subject=subject,
+                                     body=txt_render,
+                                     from_email=sender,
+                                     to=receivers)
+    message.attach_alternative(html_render, "text/html")
+    return message
+
+
+# Compiled templates of the render worker processes
+_worker_templates = {}
+
+
+def _render_in_worker(email, base_url):
+    """Renders an email in a worker process, returns the message arguments"""
+    template_name = email['template_name']
+    if template_name not in _worker_templates:
+        _worker_templates[template_name] = EmailTemplates(template_name)
+
+    txt_render, html_render = _worker_templates[template_name].render(
+        email['context'], None, base_url)
+    return (email['subject'], email['sender'], email['receivers'],
+            txt_render, html_render)
+
+
+def _render_messages(batch, request_context, base_url):
+    templates = {}
+    for email in batch:
+        template_name = email['template_name']
+        if template_name not in templates:
+            templates[template_name] = EmailTemplates(template_name)
+
+        txt_render, html_render = templates[template_name].render(
+            email['context'], request_context, base_url)
+        yield _build_message(email['subject'], email['sender'],
+                             email['receivers'], txt_render, html_render)
+
+
+def _render_messages_in_processes(batch, base_url, processes):
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for chunk in _chunks(batch, settings.EMAIL_BATCH_CHUNK_SIZE):
+            rendered = executor.map(_render_in_worker, chunk,
+                                    itertools.repeat(base_url),
+                                    chunksize=max(len(chunk) // processes, 1))
+            for args in rendered:
+                yield _build_message(*args)
+
+
+def _deliver(messages):
+    """Sends the messages using the same backend connection or stores them
+    in the outbox queue depending on EMAIL_DELIVERY. The messages are
+    consumed in chunks of EMAIL_BATCH_CHUNK_SIZE, returns the number of
+    messages
+    """
+    total = 0
+
+    if settings.EMAIL_DELIVERY == EMAIL_DELIVERY_QUEUE:
+        for chunk in _chunks(messages, settings.EMAIL_BATCH_CHUNK_SIZE):
+            QueuedEmail.objects.enqueue_many(chunk)
+            total += len(chunk)
+            for message in chunk:
+                log.info("Queued email '%s' to '%s'",
+                         message.subject, message.to)
+        return total
+
+    connection = get_connection(fail_silently=False)
+    connection.open()
+    try:
+        for chunk in _chunks(messages, settings.EMAIL_BATCH_CHUNK_SIZE):
+            connection.send_messages(chunk)
+            total += len(chunk)
+            for message in chunk:
+                log.info("Sent email '%s' to '%s'",
+                         message.subject, message.to)
+    finally:
+        connection.close()
+    return total
+
 
 def send_templated_email(template_name, context, subject, sender, receivers,
                          request=None):
     """
         Sends a templated email. The template_name shoudln't have  the prefix,
-        will load the .txt and the .html templates with the name
+        will load the .txt and the .html templates with the name.
+
+        Depending on the EMAIL_DELIVERY setting the email will be sent in
+        the moment ('sync') or stored in the outbox queue ('queue') for the
+        send_queued_email worker
     """
+    send_templated_emails(({'template_name': template_name,
+                            'context': context,
+                            'subject': subject,
+                            'sender': sender,
+                            'receivers': receivers},),
+                          request)
 
-    request_context = None
-    if request:
-        # Is more handy to use 'request' instance in render_to_string:
-        # https://github.com/django/django/commit/eaa1a22341aef5b92f5c3cd682f01e61c4159262
-        request_context = RequestContext(request)
 
-        base_url = "http://" + request.get_host()
+def send_templated_emails(batch, request=None, processes=None):
+    """
+        Sends a batch of templated emails, each one is a dict with the
+        send_templated_email arguments (template_name, context, subject,
+        sender & receivers), the batch can be a generator.
+
+        Each template is compiled once for all the batch and the emails are
+        rendered and sent in chunks through the same backend connection (see
+        core.smtp.PooledEmailBackend). With 'processes' the emails are
+        rendered in a pool of processes, the contexts need to be picklable
+        and the request can't be used.
+    """
+    if processes and processes > 1:
+        if request:
+            raise ValueError("request can't be used rendering in processes")
+        messages = _render_messages_in_processes(
+            batch, "http://" + settings.DOMAIN, processes)
     else:
-        base_url = "http://" + settings.DOMAIN
-
-    # Load templates
-    txt_render = render_to_string(template_name + ".txt", context,
-                                  context_instance=request_context)
-    html_render = render_to_string(template_name + ".html", context,
-                                   context_instance=request_context)
-
-    # Inline CSS and links
-    # Mock in tests
-    html_render = premailer.transform(html_render, base_url=base_url)
-
-    send_mail(
-        html_message=html_render,
-        message=txt_render,
-        subject=subject,
-        from_email=sender,
-        recipient_list=receivers,
-        fail_silently=False)
-
-    log.info("Sent email '{0}' to '{1}'".format(subject, receivers))
+        request_context, base_url = _email_base(request)
+        messages = _render_messages(batch, request_context, base_url)
+
+    return _deliver(messages)
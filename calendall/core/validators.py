@@ -2,16 +2,15 @@ import logging
 
 from django.core.exceptions import ValidationError
 from django.utils.translation import ugettext_lazy as _
-import pytz
+
+from .timezones import is_valid_timezone
 
 log = logging.getLogger(__name__)
 
 
 def validate_timezone(value):
-    log.debug("Validate '{0}' timezone".format(value))
-
-    if value not in pytz.common_timezones:
-        log.error("Invalida timezone: '{0}'".format(value))
+    if not is_valid_timezone(value):
+        log.error("Invalid timezone: '%s'", value)
         raise ValidationError(_('Invalid value: %(value)s'),
                               code='invalid',
                               params={'value': value})
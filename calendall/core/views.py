@@ -1,8 +1,54 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
 from django.utils.decorators import method_decorator
+from django.utils.http import parse_http_date_safe
+from django.views.generic import View
+
+from .avatars import get_avatar
 
 
 class LoginRequiredMixin(object):
     @method_decorator(login_required)
     def dispatch(self, request, *args, **kwargs):
         return super().dispatch(request, *args, **kwargs)
+
+
+class NotModifiedMixin(object):
+    """Conditional GET with the ETag and the Last-Modified of the view"""
+
+    def not_modified(self, request, etag, last_modified):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return etag in if_none_match or if_none_match.strip() == '*'
+
+        since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        modified = parse_http_date_safe(last_modified or '')
+        return since is not None and modified is not None and \
+            modified <= since
+
+
+class AvatarProxy(NotModifiedMixin, View):
+    """Serves the avatars from the local cache (see core.avatars)"""
+
+    def get(self, request, email_hash, size):
+        size = int(size)
+        # Only the sizes of the templates, each one is a file in the cache
+        if size not in settings.AVATAR_SIZES:
+            raise Http404
+
+        avatar = get_avatar(email_hash, size)
+        etag = '"{0}"'.format(avatar.digest)
+        if self.not_modified(request, etag, avatar.last_modified):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(avatar.content,
+                                    content_type=avatar.content_type)
+        response['ETag'] = etag
+        if avatar.last_modified:
+            response['Last-Modified'] = avatar.last_modified
+        patch_cache_control(response, public=True,
+                            max_age=settings.AVATAR_MAX_AGE)
+        return response
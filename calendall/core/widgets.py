@@ -0,0 +1,82 @@
+from itertools import chain
+
+from django import forms
+from django.forms.utils import flatatt
+from django.utils.encoding import force_text
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+
+# Max number of rendered menus kept, see SemanticSelect.render_menu
+MENU_CACHE_SIZE = 64
+
+
+class SemanticSelect(forms.Select):
+    """Semantic UI search dropdown
+
+    The menu with all the choices is rendered once per process and
+    language, only the selected item is patched on every render.
+    """
+    dropdown_class = "ui fluid search selection dropdown"
+
+    # (id(choices), language): (choices, html)
+    _menus = {}
+
+    def render(self, name, value, attrs=None, choices=()):
+        if value is None:
+            value = ''
+        final_attrs = self.build_attrs(attrs, type='hidden', name=name)
+        placeholder = final_attrs.pop('placeholder', '')
+        value = force_text(value)
+        final_attrs['value'] = value
+
+        menu = self.render_menu(choices)
+        if value:
+            item = self.render_item(value, '').split('>', 1)[0]
+            selected = item.replace('class="item"',
+                                    'class="item active selected"', 1)
+            menu = mark_safe(menu.replace(item, selected, 1))
+
+        return format_html('<div class="{0}">'
+                           '<input{1}>'
+                           '<i class="dropdown icon"></i>'
+                           '<div class="default text">{2}</div>'
+                           '<div class="menu">{3}</div>'
+                           '</div>',
+                           self.dropdown_class,
+                           flatatt(final_attrs),
+                           placeholder,
+                           menu)
+
+    def render_menu(self, choices=()):
+        # Extra choices of this render only can't be cached
+        if choices:
+            return self.build_menu(chain(self.choices, choices))
+
+        key = (id(self.choices), get_language())
+        cached = self._menus.get(key)
+        # The cached entry keeps the choices alive so the id is not reused
+        if cached is None or cached[0] is not self.choices:
+            if len(self._menus) >= MENU_CACHE_SIZE:
+                self._menus.clear()
+            cached = (self.choices, self.build_menu(self.choices))
+            self._menus[key] = cached
+        return cached[1]
+
+    def build_menu(self, choices):
+        output = []
+        for option_value, option_label in choices:
+            if isinstance(option_label, (list, tuple)):
+                output.append(format_html('<div class="header">{0}</div>',
+                                          force_text(option_value)))
+                for option in option_label:
+                    output.append(self.render_item(*option))
+            elif option_value not in (None, ''):
+                # The empty choice is the placeholder
+                output.append(self.render_item(option_value, option_label))
+        return mark_safe('\n'.join(output))
+
+    def render_item(self, option_value, option_label):
+        return format_html('<div class="item" data-value="{0}">{1}</div>',
+                           force_text(option_value),
+                           force_text(option_label))
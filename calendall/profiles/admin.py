@@ -1,11 +1,18 @@
 from django.contrib import admin
 
-from .models import CalendallUser
+from .models import CalendallUser, Token
 
 
 class CalendallUserAdmin(admin.ModelAdmin):
     list_display = ("id", "email", "username", "first_name", "last_name",
                     "is_superuser")
-    readonly_fields = ("reset_token",)
+
+
+class TokenAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "kind", "expiration", "created")
+    list_filter = ("kind",)
+    raw_id_fields = ("user",)
+    readonly_fields = ("token_hash",)
 
 admin.site.register(CalendallUser, CalendallUserAdmin)
+admin.site.register(Token, TokenAdmin)
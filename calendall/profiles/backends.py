@@ -0,0 +1,46 @@
+import logging
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+log = logging.getLogger(__name__)
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    """Authenticates with the username or the email
+
+    The user is loaded in one query (lower(email) index for the emails)
+    and the password is checked on that row.
+    """
+
+    def authenticate(self, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if not username or password is None:
+            return None
+
+        try:
+            if "@" in username:
+                validate_email(username)
+                user = UserModel._default_manager.get(
+                    email__lower=username.lower())
+            else:
+                user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.MultipleObjectsReturned:
+            # Not with the unique lower(email) index (profiles migration
+            # 0006), the accounts need to be fixed by hand
+            log.error("Several accounts with the email '%s', can't log in "
+                      "by email", username)
+            UserModel().set_password(password)
+            return None
+        except (ValidationError, UserModel.DoesNotExist):
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a non-existing user
+            UserModel().set_password(password)
+            return None
+
+        if user.check_password(password):
+            return user
@@ -0,0 +1,64 @@
+"""
+Cache of the logged users.
+
+AuthenticationMiddleware loads the user from the database on every
+request, CachedAuthenticationMiddleware gets it from the USER_CACHE_ALIAS
+cache by id, with the session auth hash of the user to verify the session
+like SessionAuthenticationMiddleware. CalendallUser.save and delete, and
+the update and delete of its querysets, drop the cached users. The cache
+must be shared by all the processes (SHARED_CACHES, see core.checks), the
+other ones would keep a changed user (or password) for USER_CACHE_TTL.
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, load_backend)
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.utils.crypto import constant_time_compare
+
+log = logging.getLogger(__name__)
+
+USER_KEY = "profiles.user:{0}"
+
+
+def get_user_cache():
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def invalidate_user(user_id):
+    get_user_cache().delete(USER_KEY.format(user_id))
+
+
+def invalidate_users(user_ids):
+    get_user_cache().delete_many([USER_KEY.format(i) for i in user_ids])
+
+
+def get_user(request):
+    """django.contrib.auth.get_user with the cached user"""
+    try:
+        user_id = request.session[SESSION_KEY]
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+
+    cache = get_user_cache()
+    key = USER_KEY.format(user_id)
+    cached = cache.get(key)
+    if cached is None:
+        user = load_backend(backend_path).get_user(user_id)
+        if user is None:
+            return AnonymousUser()
+        user_hash = user.get_session_auth_hash()
+        cache.set(key, (user_hash, user), settings.USER_CACHE_TTL)
+    else:
+        user_hash, user = cached
+
+    session_hash = request.session.get(HASH_SESSION_KEY) or ""
+    if not constant_time_compare(session_hash, user_hash):
+        request.session.flush()
+        return AnonymousUser()
+    return user
@@ -1,14 +1,14 @@
 import logging
 
 from django import forms
-from django.contrib.auth import authenticate
 from django.contrib.auth.forms import AuthenticationForm
-from django.core.validators import validate_email
 from django.utils.translation import ugettext_lazy as _
 
 from .models import CalendallUser
 from . import utils
 
+from core.widgets import SemanticSelect
+
 
 log = logging.getLogger(__name__)
 
@@ -29,7 +29,7 @@ class CalendallUserCreateForm(forms.ModelForm):
     def clean_email(self):
         email = self.cleaned_data['email']
         if utils.email_exists(email):
-            log.debug("email '{0}' already taken".format(email))
+            log.debug("email '%s' already taken", email)
             raise forms.ValidationError(_("already taken"))
 
         return email
@@ -38,12 +38,12 @@ class CalendallUserCreateForm(forms.ModelForm):
         username = self.cleaned_data['username']
 
         if not utils.valid_username(username):
-            log.debug("username '{0}' not ^.(?<!\-)[a-zA-Z0-9\-]{{1,29}}$".format(username))
+            log.debug("username '%s' not ^.(?<!\-)[a-zA-Z0-9\-]{1,29}$", username)
             raise forms.ValidationError(_("May only contain alphanumeric characters or dashes and cannot begin with a dash"))
 
         # Check username exists
         if utils.username_exists(username):
-            log.debug("username '{0}' already taken".format(username))
+            log.debug("username '%s' already taken", username)
             raise forms.ValidationError(_("already taken"))
 
         return username
@@ -63,8 +63,8 @@ class CalendallUserCreateForm(forms.ModelForm):
         password_verification = self.cleaned_data.get('password_verification', "")
 
         if password and password_verification and password != password_verification:
-            log.debug("password '{0}' and '{1}'' differ".format(
-                password, password_verification))
+            log.debug("password '%s' and '%s'' differ",
+                      password, password_verification)
 
             msg = _("doesn't match the confirmation")
             self.add_error('password', msg)
@@ -87,43 +87,14 @@ class LoginForm(AuthenticationForm):
         super().__init__(*args, **kwargs)
         self.fields['username'].label = _("Username or Email")
 
-    # Reimplement the login to allow email and username login
+    # Email and username login is done by the EmailOrUsernameBackend
     def clean(self):
-        # Don't do this because email is in the username field and will get error
-        # self.cleaned_data = super().clean()
-        username_or_email = self.cleaned_data.get('username')
-        password = self.cleaned_data.get('password')
-        dont_check = False
-
-        if username_or_email and password:
-            # Check if is an email
-            if "@" in username_or_email:
-                # Validate the email
-                try:
-                    validate_email(username_or_email)
-                    username = CalendallUser.objects.get(
-                        email=username_or_email).username
-                except (forms.ValidationError, CalendallUser.DoesNotExist):
-                    dont_check = True
-            else:
-                username = username_or_email
-
-            # Do not check if not a valid email
-            if not dont_check:
-                self.user_cache = authenticate(username=username,
-                                               password=password)
-            if self.user_cache is None:
-                log.debug("Invalid login for user '{0}'".format(
-                    username_or_email))
-                raise forms.ValidationError(
-                    self.error_messages['invalid_login'],
-                    code='invalid_login',
-                    params={'username': self.username_field.verbose_name},
-                )
-            else:
-                self.confirm_login_allowed(self.user_cache)
-
-        return self.cleaned_data
+        try:
+            return super().clean()
+        except forms.ValidationError:
+            log.debug("Invalid login for user '%s'",
+                      self.cleaned_data.get('username'))
+            raise
 
 
 class ProfileSettingsForm(forms.ModelForm):
@@ -131,12 +102,15 @@ class ProfileSettingsForm(forms.ModelForm):
     class Meta:
         model = CalendallUser
         fields = ["first_name", "last_name", "url", "location", "timezone"]
+        widgets = {'timezone': SemanticSelect}
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['url'].label = _("URL")
         self.fields['location'].label = _("Location")
         self.fields['timezone'].help_text = _("Select timezone")
+        self.fields['timezone'].widget.attrs['placeholder'] = (
+            self.fields['timezone'].help_text)
 
 
 class AccountSettingsForm(forms.ModelForm):
@@ -178,8 +152,8 @@ class AccountSettingsForm(forms.ModelForm):
                 'new_password_verification', "")
 
             if new_password and new_password_verification and new_password != new_password_verification:
-                log.debug("new password '{0}' and '{1}' differ".format(
-                    new_password, new_password_verification))
+                log.debug("new password '%s' and '%s' differ",
+                          new_password, new_password_verification)
 
                 msg = _("doesn't match the confirmation")
                 self.add_error('new_password', msg)
@@ -0,0 +1,64 @@
+from optparse import make_option
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.utils import delete_in_batches
+from profiles.models import CalendallUser, Token
+
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ("Deletes the expired account tokens and the stale unvalidated "
+            "accounts in small batches")
+
+    option_list = BaseCommand.option_list + (
+        make_option('--batch',
+                    type='int',
+                    dest='batch',
+                    default=settings.CLEANUP_BATCH_SIZE,
+                    help='Rows deleted per query'),
+        make_option('--sleep',
+                    type='float',
+                    dest='sleep',
+                    default=settings.CLEANUP_SLEEP,
+                    help='Seconds between batches'),
+        make_option('--dry-run',
+                    action='store_true',
+                    dest='dry_run',
+                    default=False,
+                    help='Only count the rows that would be deleted'),
+        make_option('--skip-accounts',
+                    action='store_true',
+                    dest='skip_accounts',
+                    default=False,
+                    help="Only delete the expired tokens"),
+    )
+
+    def handle(self, *args, **options):
+        sweeps = [("expired tokens", Token.objects.expired())]
+        if not options['skip_accounts']:
+            sweeps.append(("unvalidated accounts",
+                           CalendallUser.objects.stale_unvalidated()))
+
+        for name, queryset in sweeps:
+            self.sweep(name, queryset, max(options['batch'], 1),
+                       options['sleep'], options['dry_run'])
+
+    def sweep(self, name, queryset, batch_size, sleep, dry_run):
+        start = time.perf_counter()
+        rows = 0
+        for pks in delete_in_batches(queryset, batch_size, sleep, dry_run):
+            rows += len(pks)
+            log.debug("%s: %d rows up to pk %s", name, rows, pks[-1])
+
+        elapsed = time.perf_counter() - start
+        msg = "{0}{1}: {2} rows in {3:.1f}s ({4:.0f} rows/s)".format(
+            "[dry run] " if dry_run else "", name, rows, elapsed,
+            rows / elapsed if elapsed else 0)
+        log.info(msg)
+        self.stdout.write(msg)
@@ -0,0 +1,16 @@
+from django.utils.functional import SimpleLazyObject
+
+from .cache import get_user
+
+
+def get_request_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_user(request)
+    return request._cached_user
+
+
+class CachedAuthenticationMiddleware(object):
+    """AuthenticationMiddleware with the users of profiles.cache"""
+
+    def process_request(self, request):
+        request.user = SimpleLazyObject(lambda: get_request_user(request))
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+import core.validators
+import core.timezones
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0004_auto_20150117_1017'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='calendalluser',
+            name='timezone',
+            field=core.timezones.TimezoneField(verbose_name='User timezone', max_length=40, default='UTC', validators=[core.validators.validate_timezone]),
+            preserve_default=True,
+        ),
+    ]
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+# Functional indexes for the field__lower lookups (core.lookups.Lower).
+# SQLite >= 3.9 has expression indexes too.
+VENDORS = ('postgresql', 'sqlite')
+INDEXES = (
+    ("profiles_calendalluser_email_lower",
+     "CREATE INDEX {0} ON profiles_calendalluser (LOWER(email))"),
+    ("profiles_calendalluser_username_lower",
+     "CREATE INDEX {0} ON profiles_calendalluser (LOWER(username))"),
+    # The emails are unique ignoring the case (login by email), the blank
+    # ones excepted. The lookups can't use a partial index, hence two.
+    ("profiles_calendalluser_email_lower_unique",
+     "CREATE UNIQUE INDEX {0} ON profiles_calendalluser (LOWER(email)) "
+     "WHERE email <> ''"),
+)
+
+DUPLICATED_EMAILS_SQL = """
+    SELECT LOWER(email) FROM profiles_calendalluser WHERE email <> ''
+    GROUP BY LOWER(email) HAVING COUNT(*) > 1
+"""
+
+
+def check_duplicated_emails(connection):
+    """Accounts can't be merged automatically, they need to be fixed by
+    hand before the unique index is created
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(DUPLICATED_EMAILS_SQL)
+        emails = [row[0] for row in cursor.fetchall()]
+    if emails:
+        raise ValueError(
+            "Emails used by several accounts (ignoring the case), change "
+            "them before migrating: {0}".format(", ".join(emails)))
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in VENDORS:
+        return
+    check_duplicated_emails(schema_editor.connection)
+    for name, sql in INDEXES:
+        schema_editor.execute(sql.format(name))
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in VENDORS:
+        return
+    for name, sql in INDEXES:
+        schema_editor.execute("DROP INDEX IF EXISTS {0}".format(name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_auto_20261016_2247'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
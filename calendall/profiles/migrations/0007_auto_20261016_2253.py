@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from datetime import timedelta
+import hashlib
+
+from django.db import models, migrations
+from django.conf import settings
+from django.utils import timezone
+
+# TOKEN_LIFETIMES['validation'] when the tokens were moved, the migrated
+# data doesn't depend on the settings at migrate time
+VALIDATION_LIFETIME = 60 * 60 * 24 * 30
+
+
+def hash_token(raw_token):
+    return hashlib.sha256(raw_token.encode("ascii")).hexdigest()
+
+
+def move_tokens(apps, schema_editor):
+    """Moves the user token columns to the token table"""
+    CalendallUser = apps.get_model("profiles", "CalendallUser")
+    Token = apps.get_model("profiles", "Token")
+    validation_expiration = timezone.now() + timedelta(
+        seconds=VALIDATION_LIFETIME)
+
+    tokens = []
+    users = CalendallUser.objects.exclude(validation_token="", reset_token="")
+    for user in users.iterator():
+        if user.validation_token and not user.validated:
+            tokens.append(Token(user=user,
+                                kind="validation",
+                                token_hash=hash_token(user.validation_token),
+                                expiration=validation_expiration))
+        if user.reset_token and user.reset_expiration:
+            tokens.append(Token(user=user,
+                                kind="reset",
+                                token_hash=hash_token(user.reset_token),
+                                expiration=user.reset_expiration))
+    Token.objects.bulk_create(tokens, batch_size=1000)
+
+
+def noop(apps, schema_editor):
+    """Only the hashes are stored, the tokens can't be moved back. The
+    users need to ask for new ones
+    """
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0006_lower_email_username_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Token',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('kind', models.CharField(verbose_name='kind', max_length=10, choices=[('validation', 'Account validation'), ('reset', 'Password reset')])),
+                ('token_hash', models.CharField(verbose_name='token hash', max_length=64, unique=True)),
+                ('expiration', models.DateTimeField(verbose_name='expiration', db_index=True)),
+                ('created', models.DateTimeField(verbose_name='created', auto_now_add=True)),
+                ('user', models.ForeignKey(related_name='tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+            },
+            bases=(models.Model,),
+        ),
+        migrations.RunPython(move_tokens, noop),
+        migrations.RemoveField(
+            model_name='calendalluser',
+            name='reset_expiration',
+        ),
+        migrations.RemoveField(
+            model_name='calendalluser',
+            name='reset_token',
+        ),
+        migrations.RemoveField(
+            model_name='calendalluser',
+            name='validation_token',
+        ),
+    ]
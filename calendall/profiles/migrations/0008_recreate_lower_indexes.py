@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from importlib import import_module
+
+from django.db import migrations
+
+lower_indexes = import_module(
+    "profiles.migrations.0006_lower_email_username_indexes")
+
+
+def recreate_indexes(apps, schema_editor):
+    """SQLite removes the columns of 0007 rebuilding the table, without
+    the expression indexes of 0006
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    lower_indexes.drop_indexes(apps, schema_editor)
+    lower_indexes.create_indexes(apps, schema_editor)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0007_auto_20261016_2253'),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_indexes, noop),
+    ]
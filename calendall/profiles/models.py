@@ -1,33 +1,61 @@
-from django.contrib.auth.models import AbstractUser
+from datetime import timedelta
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django.utils.encoding import python_2_unicode_compatible
-import pytz
 
+from .cache import invalidate_user, invalidate_users
+from core.timezones import TimezoneField
 from core.validators import validate_timezone
 
-TIMEZONES = [(tz, tz) for tz in pytz.common_timezones]
+
+class CalendallUserQuerySet(models.QuerySet):
+    """Drops the cached users (profiles.cache) of the changed rows"""
+
+    def update(self, **kwargs):
+        user_ids = list(self.values_list("pk", flat=True))
+        rows = super().update(**kwargs)
+        invalidate_users(user_ids)
+        return rows
+    update.alters_data = True
+
+    def delete(self):
+        user_ids = list(self.values_list("pk", flat=True))
+        super().delete()
+        invalidate_users(user_ids)
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class CalendallUserManager(UserManager.from_queryset(CalendallUserQuerySet)):
+
+    def stale_unvalidated(self):
+        """Regular accounts never validated after UNVALIDATED_ACCOUNT_MAX_AGE
+        and without activity: no log in for that long and no calendars
+        """
+        stale = timezone.now() - timedelta(
+            seconds=settings.UNVALIDATED_ACCOUNT_MAX_AGE)
+        return self.filter(
+            Q(last_login__isnull=True) | Q(last_login__lt=stale),
+            validated=False,
+            is_staff=False,
+            is_superuser=False,
+            date_joined__lt=stale).exclude(calendars__isnull=False)
 
 
 @python_2_unicode_compatible
 class CalendallUser(AbstractUser):
 
-    timezone = models.CharField(_("User timezone"),
-                                max_length=40,  # Max is 30, but 10 extra
-                                choices=TIMEZONES,
-                                default='UTC',
-                                validators=[validate_timezone])
-    # Tokens are uuid without slashes
-    reset_token = models.CharField(_("reset token"),
-                                   max_length=32,
-                                   blank=True)
-    reset_expiration = models.DateTimeField(_("reset token expiration"),
-                                            null=True)
-
+    timezone = TimezoneField(_("User timezone"),
+                             default='UTC',
+                             validators=[validate_timezone])
     validated = models.BooleanField(_("User account validated"), default=False)
-    validation_token = models.CharField(_("User account validation token"),
-                                        max_length=32,
-                                        blank=True)
     url = models.URLField(_("User homepage"),
                           blank=True)
 
@@ -35,5 +63,70 @@ class CalendallUser(AbstractUser):
                                 max_length=30,
                                 blank=True)
 
+    objects = CalendallUserManager()
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_user(self.pk)
+
+    def delete(self, *args, **kwargs):
+        user_id = self.pk
+        super().delete(*args, **kwargs)
+        invalidate_user(user_id)
+
     def __str__(self):
         return self.email
+
+
+def hash_token(raw_token):
+    """Only the hash of the tokens is stored"""
+    return hashlib.sha256(raw_token.encode("ascii")).hexdigest()
+
+
+class TokenManager(models.Manager):
+
+    def create_token(self, user, kind):
+        """Creates a token of the kind for the user and returns the raw
+        token (uuid without slashes) to send it to the user
+        """
+        raw_token = uuid.uuid4().hex
+        lifetime = timedelta(seconds=settings.TOKEN_LIFETIMES[kind])
+        self.create(user=user,
+                    kind=kind,
+                    token_hash=hash_token(raw_token),
+                    expiration=timezone.now() + lifetime)
+        return raw_token
+
+    def get_valid(self, kind, raw_token):
+        """Returns the not expired token with its user in one query by the
+        unique hash index, raises Token.DoesNotExist
+        """
+        return self.select_related('user').get(
+            token_hash=hash_token(raw_token),
+            kind=kind,
+            expiration__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expiration__lte=timezone.now())
+
+
+@python_2_unicode_compatible
+class Token(models.Model):
+    KIND_VALIDATION = "validation"
+    KIND_RESET = "reset"
+    KINDS = (
+        (KIND_VALIDATION, _("Account validation")),
+        (KIND_RESET, _("Password reset")),
+    )
+
+    user = models.ForeignKey(CalendallUser, related_name="tokens")
+    kind = models.CharField(_("kind"), max_length=10, choices=KINDS)
+    token_hash = models.CharField(_("token hash"), max_length=64,
+                                  unique=True)
+    expiration = models.DateTimeField(_("expiration"), db_index=True)
+    created = models.DateTimeField(_("created"), auto_now_add=True)
+
+    objects = TokenManager()
+
+    def __str__(self):
+        return "{0} token of {1}".format(self.kind, self.user_id)
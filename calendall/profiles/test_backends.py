@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.contrib.auth import authenticate
+from django.test import TestCase
+
+from .backends import EmailOrUsernameBackend
+from .models import CalendallUser
+
+
+class EmailOrUsernameBackendTestCase(TestCase):
+
+    def setUp(self):
+        self.data = {
+            'username': "batman",
+            'email': "darkknight@gmail.com",
+            'password': 'I\'mBatman123',
+        }
+        self.user = CalendallUser(**self.data)
+        self.user.set_password(self.data['password'])
+        self.user.save()
+        self.backend = EmailOrUsernameBackend()
+
+    def test_username(self):
+        with self.assertNumQueries(1):
+            user = self.backend.authenticate(self.data['username'],
+                                             self.data['password'])
+        self.assertEqual(user, self.user)
+
+    def test_email(self):
+        with self.assertNumQueries(1):
+            user = self.backend.authenticate("DarkKnight@gmail.com",
+                                             self.data['password'])
+        self.assertEqual(user, self.user)
+
+    def test_wrong(self):
+        wrong = (
+            (self.data['username'], "wrong"),
+            (self.data['email'], "wrong"),
+            ("robin", self.data['password']),
+            ("robin@gmail.com", self.data['password']),
+            ("@gmail.com", self.data['password']),
+            ("", self.data['password']),
+            (self.data['username'], None),
+        )
+        for username, password in wrong:
+            self.assertIsNone(self.backend.authenticate(username, password))
+
+    def test_duplicated_email(self):
+        # Rows from before the unique index
+        manager = CalendallUser._default_manager
+        with mock.patch.object(
+                manager, 'get',
+                side_effect=CalendallUser.MultipleObjectsReturned):
+            with self.assertLogs("profiles.backends", "ERROR") as logs:
+                self.assertIsNone(self.backend.authenticate(
+                    "Robin@gmail.com", self.data['password']))
+        self.assertIn("Robin@gmail.com", logs.output[0])
+
+    def test_authenticate(self):
+        user = authenticate(username=self.data['email'],
+                            password=self.data['password'])
+        self.assertEqual(user, self.user)
+        self.assertEqual(user.backend,
+                         "profiles.backends.EmailOrUsernameBackend")
@@ -0,0 +1,72 @@
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from .models import CalendallUser
+
+
+@override_settings(DEBUG=True)
+class UserCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.url = reverse("profiles:profile_settings")
+        self.data = {
+            'username': "batman",
+            'email': "darkknight@gmail.com",
+            'password': 'I\'mBatman123',
+        }
+        self.user = CalendallUser(**self.data)
+        self.user.set_password(self.data['password'])
+        self.user.save()
+
+        self.c = Client()
+        self.c.login(username=self.data['username'],
+                     password=self.data['password'])
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.c.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [q for q in queries.captured_queries
+                if "profiles_calendalluser" in q['sql']]
+
+    def test_cached_user(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(len(self.user_queries()), 0)
+
+    def test_save_invalidates(self):
+        self.user_queries()
+        self.user.location = "Gotham city"
+        self.user.save()
+
+        self.assertEqual(len(self.user_queries()), 1)
+        response = self.c.get(self.url)
+        self.assertEqual(response.context['user'].location, "Gotham city")
+
+    def test_password_change_logs_out(self):
+        self.user_queries()
+        self.user.set_password("I'mRobin123")
+        self.user.save()
+
+        response = self.c.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_deleted_user_logs_out(self):
+        self.user_queries()
+        self.user.delete()
+
+        response = self.c.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_queryset_changes_invalidate(self):
+        self.user_queries()
+        CalendallUser.objects.filter(pk=self.user.pk).update(
+            location="Gotham city")
+        response = self.c.get(self.url)
+        self.assertEqual(response.context['user'].location, "Gotham city")
+
+        CalendallUser.objects.filter(pk=self.user.pk).delete()
+        response = self.c.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(hasattr(CalendallUser.objects, "delete"))
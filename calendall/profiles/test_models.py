@@ -1,10 +1,13 @@
-import uuid
 from datetime import timedelta
+from io import StringIO
 
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from django.test import TestCase
 
-from .models import CalendallUser
+from .models import CalendallUser, Token, hash_token
+from calendars.models import Calendar
 
 
 # Simple tests, this shouldn't be neccessary, the ORM is already tested
@@ -20,9 +23,6 @@ class CalendallUserTestCase(TestCase):
                 "last_name": "Wayne",
                 "email": "darkknight@gmail.com",
                 "timezone": "America/New_York",
-                "reset_token": str(uuid.uuid4()).replace("-", ""),
-                "reset_expiration": timezone.now() + timedelta(minutes=20),
-                "validation_token": str(uuid.uuid4()).replace("-", ""),
                 "validated": False,
                 "url": "https://darkknight.com",
                 "location": "Gotham city",
@@ -34,9 +34,6 @@ class CalendallUserTestCase(TestCase):
                 "last_name": "Parker",
                 "email": "spidy@gmail.com",
                 "timezone": "America/New_York",
-                "reset_token": str(uuid.uuid4()).replace("-", ""),
-                "reset_expiration": timezone.now() + timedelta(minutes=20),
-                "validation_token": str(uuid.uuid4()).replace("-", ""),
                 "validated": True,
                 "url": "http://spiderstories.com",
                 "location": "NY",
@@ -48,9 +45,6 @@ class CalendallUserTestCase(TestCase):
                 "last_name": "Xavier",
                 "email": "boldAndMutant@gmail.com",
                 "timezone": "America/New_York",
-                "reset_token": str(uuid.uuid4()).replace("-", ""),
-                "reset_expiration": timezone.now() + timedelta(minutes=20),
-                "validation_token": str(uuid.uuid4()).replace("-", ""),
                 "validated": True,
                 "url": "http://www.mutantunited.net",
                 "location": "X Mansion",
@@ -82,18 +76,9 @@ class CalendallUserTestCase(TestCase):
                                                   self.data[k]['email']))
             self.assertEqual(v.timezone, data[k].get('timezone',
                                                      self.data[k]['timezone']))
-            self.assertEqual(v.reset_token,
-                             str(data[k].get('reset_token',
-                                             self.data[k]['reset_token'])))
-            self.assertEqual(v.reset_expiration,
-                             data[k].get('reset_expiration',
-                                         self.data[k]['reset_expiration']))
             self.assertEqual(v.validated,
                              data[k].get('validated',
                                          self.data[k]['validated']))
-            self.assertEqual(v.validation_token,
-                             data[k].get('validation_token',
-                                         self.data[k]['validation_token']))
             self.assertEqual(v.url, data[k].get('url', self.data[k]['url']))
             self.assertEqual(v.location, data[k].get('location',
                              self.data[k]['location']))
@@ -125,3 +110,111 @@ class CalendallUserTestCase(TestCase):
             i.delete()
 
         self.assertEqual(CalendallUser.objects.count(), 0)
+
+    def test_email_unique_ignoring_case(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CalendallUser.objects.create(username="Batman2",
+                                         email="DarkKnight@gmail.com")
+        # Blank emails are allowed
+        for username in ("Robin", "Alfred"):
+            CalendallUser.objects.create(username=username, email="")
+
+
+class TokenTestCase(TestCase):
+
+    def setUp(self):
+        self.user = CalendallUser(username="batman",
+                                  email="darkknight@gmail.com")
+        self.user.save()
+
+    def test_create_token(self):
+        raw_token = Token.objects.create_token(self.user,
+                                               Token.KIND_VALIDATION)
+        self.assertRegex(raw_token, "^[a-f0-9]{32}$")
+
+        token = Token.objects.get(user=self.user)
+        self.assertEqual(token.token_hash, hash_token(raw_token))
+        self.assertNotEqual(token.token_hash, raw_token)
+        self.assertGreater(token.expiration,
+                           timezone.now() + timedelta(days=29))
+
+    def test_get_valid(self):
+        raw_token = Token.objects.create_token(self.user, Token.KIND_RESET)
+
+        with self.assertNumQueries(1):
+            token = Token.objects.get_valid(Token.KIND_RESET, raw_token)
+            self.assertEqual(token.user, self.user)
+
+        with self.assertRaises(Token.DoesNotExist):
+            Token.objects.get_valid(Token.KIND_VALIDATION, raw_token)
+
+        token.expiration = timezone.now()
+        token.save()
+        with self.assertRaises(Token.DoesNotExist):
+            Token.objects.get_valid(Token.KIND_RESET, raw_token)
+        self.assertEqual(list(Token.objects.expired()), [token])
+
+
+class CleanupAccountsTestCase(TestCase):
+
+    def setUp(self):
+        joined = timezone.now() - timedelta(days=90)
+        self.users = {}
+        for name, validated, is_staff in (("stale", False, False),
+                                          ("stale2", False, False),
+                                          ("validated", True, False),
+                                          ("admin", False, True),
+                                          ("active", False, False),
+                                          ("owner", False, False)):
+            user = CalendallUser(username=name,
+                                 email="{0}@gmail.com".format(name),
+                                 validated=validated,
+                                 is_staff=is_staff,
+                                 date_joined=joined,
+                                 last_login=joined)
+            user.save()
+            self.users[name] = user
+        # Still using the account
+        self.users['active'].last_login = timezone.now() - timedelta(days=1)
+        self.users['active'].save()
+        Calendar.objects.create(owner=self.users['owner'], name="Gotham")
+        # Recent account, still can validate it
+        self.users['new'] = CalendallUser.objects.create(
+            username="new", email="new@gmail.com")
+
+        for user in self.users.values():
+            Token.objects.create_token(user, Token.KIND_VALIDATION)
+        self.valid = Token.objects.create_token(self.users['validated'],
+                                                Token.KIND_RESET)
+        Token.objects.filter(kind=Token.KIND_VALIDATION).update(
+            expiration=timezone.now())
+
+    def test_cleanup_accounts(self):
+        out = StringIO()
+        call_command('cleanup_accounts', batch=1, sleep=0, stdout=out)
+
+        self.assertIn("expired tokens: 7 rows", out.getvalue())
+        self.assertIn("unvalidated accounts: 2 rows", out.getvalue())
+        self.assertEqual(
+            set(CalendallUser.objects.values_list("username", flat=True)),
+            {"validated", "admin", "active", "owner", "new"})
+        self.assertEqual(Token.objects.count(), 1)
+        Token.objects.get_valid(Token.KIND_RESET, self.valid)
+
+    def test_cleanup_accounts_dry_run(self):
+        out = StringIO()
+        call_command('cleanup_accounts', dry_run=True, stdout=out)
+
+        self.assertIn("[dry run] expired tokens: 7 rows", out.getvalue())
+        self.assertIn("[dry run] unvalidated accounts: 2 rows",
+                      out.getvalue())
+        self.assertEqual(CalendallUser.objects.count(), 7)
+        self.assertEqual(Token.objects.count(), 8)
+
+    def test_cleanup_tokens_only(self):
+        out = StringIO()
+        call_command('cleanup_accounts', skip_accounts=True, stdout=out)
+
+        self.assertNotIn("unvalidated accounts", out.getvalue())
+        self.assertEqual(CalendallUser.objects.count(), 7)
+        self.assertEqual(Token.objects.count(), 1)
@@ -1,15 +1,19 @@
 from unittest import mock
+import re
 import uuid
 
 from django.conf import settings
-from django.core import mail
+from django.contrib.auth.hashers import check_password, make_password
+from django.core import mail, signing
 from django.core.urlresolvers import reverse
 from django.test import Client, TestCase
 from django.test.utils import override_settings
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 import premailer
 
-from .models import CalendallUser
+from .models import CalendallUser, Token
+from core.middleware import TIMEZONE_COOKIE_SALT
 from core.mock_utils import local_url_loader
 
 
@@ -84,6 +88,18 @@ class TestCalendallUserCreation(TestCase):
 
         self.assertEqual(len(mail.outbox), len(self.users)*2)
 
+    @mock.patch.object(premailer.Premailer, '_load_external',
+                       side_effect=local_url_loader)
+    def test_validation_email_link(self, mock_method):
+        c = Client()
+        c.post(self.url, self.users[0])
+
+        url = re.search(r"\S+/validate/\S+/[a-f0-9]{32}",
+                        mail.outbox[1].body)
+        c.get(url.group())
+        u = CalendallUser.objects.get(username=self.users[0]['username'])
+        self.assertTrue(u.validated)
+
     @mock.patch.object(premailer.Premailer, '_load_external',
                        side_effect=local_url_loader)
     def test_autologin_in_correct_creation(self, mock_method):
@@ -99,6 +115,21 @@ class TestCalendallUserCreation(TestCase):
             u = CalendallUser.objects.get(username=i['username'])
             self.assertEqual(response.client.session['_auth_user_id'], u.pk)
 
+    @mock.patch.object(premailer.Premailer, '_load_external',
+                       side_effect=local_url_loader)
+    def test_creation_hashes_password_once(self, mock_method):
+        c = Client()
+
+        with mock.patch('django.contrib.auth.models.make_password',
+                        wraps=make_password) as make, \
+                mock.patch('django.contrib.auth.models.check_password',
+                           wraps=check_password) as check:
+            c.post(self.url, self.users[0])
+
+        # No authenticate after the signup
+        self.assertEqual(make.call_count, 1)
+        self.assertEqual(check.call_count, 0)
+
     def test_required_fields(self):
         c = Client()
 
@@ -169,6 +200,16 @@ class TestCalendallUserCreation(TestCase):
         response = c.post(self.url, {'email': email})
         self.assertFormError(response, 'form', 'email', "already taken")
 
+    def test_exists_case_insensitive(self):
+        c = Client()
+
+        CalendallUser(username="batman", email="batman@gothamail.gt").save()
+
+        response = c.post(self.url, {'username': "BatMan",
+                                     'email': "BatMan@GothaMail.gt"})
+        self.assertFormError(response, 'form', 'username', "already taken")
+        self.assertFormError(response, 'form', 'email', "already taken")
+
     def test_valid_password(self):
 
         c = Client()
@@ -243,6 +284,19 @@ class TestLogin(TestCase):
         u = CalendallUser.objects.get(username=self.data['username'])
         self.assertEqual(response.client.session['_auth_user_id'], u.pk)
 
+    def test_email_login_case_insensitive(self):
+        c = Client()
+        data = {
+            'username': self.data['email'].upper(),
+            'password': self.data['password']
+        }
+
+        response = c.post(self.url, data)
+
+        self.assertRedirects(response, self.url)
+        u = CalendallUser.objects.get(username=self.data['username'])
+        self.assertEqual(response.client.session['_auth_user_id'], u.pk)
+
     def test_next_login_form_creation(self):
         c = Client()
         next_url = "/custom/url/for/testing"
@@ -366,19 +420,20 @@ class TestValidate(TestCase):
             'username': "batman",
             'email': "darkknight@gmail.com",
             'password': 'I\'mBatman123',
-            'validation_token': str(uuid.uuid4()).replace("-", "")
         }
 
         self.user = CalendallUser(**self.data)
         self.user.set_password(self.data['password'])
         self.user.save()
+        self.token = Token.objects.create_token(self.user,
+                                                Token.KIND_VALIDATION)
 
     def test_validate_ok(self):
         c = Client()
 
         data = {
             'username': self.user.username,
-            'token': self.user.validation_token,
+            'token': self.token,
         }
 
         url = reverse("profiles:validate", kwargs=data)
@@ -390,6 +445,24 @@ class TestValidate(TestCase):
         self.assertEqual(response.status_code, 301)
 
         self.assertTrue(CalendallUser.objects.get(id=self.user.id).validated)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+
+        # Second click of the link, the token is gone
+        response = c.get(url, follow=True)
+        self.assertEqual([m.message for m in response.context['messages']],
+                         [_("Account already validated")])
+
+    def test_validate_expired_token(self):
+        c = Client()
+        Token.objects.filter(user=self.user).update(expiration=timezone.now())
+
+        url = reverse("profiles:validate", kwargs={
+            'username': self.user.username,
+            'token': self.token,
+        })
+
+        c.get(url)
+        self.assertFalse(CalendallUser.objects.get(id=self.user.id).validated)
 
     def test_already_validated(self):
         c = Client()
@@ -399,7 +472,7 @@ class TestValidate(TestCase):
 
         data = {
             'username': self.user.username,
-            'token': self.user.validation_token,
+            'token': self.token,
         }
 
         url = reverse("profiles:validate", kwargs=data)
@@ -436,7 +509,7 @@ class TestValidate(TestCase):
 
         data = {
             'username': self.user.username + "a",
-            'token': self.user.validation_token,
+            'token': self.token,
         }
 
         url = reverse("profiles:validate", kwargs=data)
@@ -573,6 +646,14 @@ class TestProfileSettings(TestCase):
             response = self.c.post(self.url, {'timezone': t})
             self.assertFormError(response, 'form', 'timezone', error.format(t))
 
+    def test_timezones_grouped_by_region(self):
+        response = self.c.get(self.url)
+        self.assertContains(response, '<div class="header">Europe</div>')
+        self.assertContains(
+            response, '<div class="item" data-value="Europe/Madrid">Madrid')
+        self.assertContains(
+            response, '<div class="item active selected" data-value="UTC">')
+
     def test_enter_settings_not_logged(self):
 
         c = Client()
@@ -589,7 +670,7 @@ class TestProfileSettings(TestCase):
         self.assertRedirects(response, reverse("profiles:login")+query_string)
         self.assertEqual(response.status_code, 302)
 
-    def test_timezone_in_session(self):
+    def test_timezone_in_cookie(self):
         data = {
             "first_name": "Bruce",
             "last_name": "Wayne",
@@ -603,7 +684,13 @@ class TestProfileSettings(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertRedirects(response, self.url)
 
-        self.assertEqual(response.client.session['user-tz'], data['timezone'])
+        user = CalendallUser.objects.get(username=self.data['username'])
+        cookie = response.cookies[settings.TIMEZONE_COOKIE_NAME]
+        signer = signing.get_cookie_signer(
+            salt=settings.TIMEZONE_COOKIE_NAME + TIMEZONE_COOKIE_SALT)
+        self.assertEqual(signer.unsign(cookie.value),
+                         "{0}:{1}".format(user.pk, data['timezone']))
+        self.assertNotIn('user-tz', response.client.session)
 
 
 @override_settings(DEBUG=True)
@@ -31,8 +31,11 @@ def valid_password(password):
 
 
 def email_exists(email):
-    return CalendallUser.objects.filter(email=email).exists()
+    """Case insensitive, uses the lower(email) index"""
+    return CalendallUser.objects.filter(email__lower=email.lower()).exists()
 
 
 def username_exists(username):
-    return CalendallUser.objects.filter(username=username).exists()
+    """Case insensitive, uses the lower(username) index"""
+    return CalendallUser.objects.filter(
+        username__lower=username.lower()).exists()
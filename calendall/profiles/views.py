@@ -1,9 +1,7 @@
 import logging
-import uuid
 
 from django.conf import settings
-from django.contrib.auth import (authenticate, login, logout,
-                                 update_session_auth_hash)
+from django.contrib.auth import login, logout, update_session_auth_hash
 from django.contrib import messages
 from django.core.urlresolvers import reverse_lazy
 from django.utils.decorators import method_decorator
@@ -14,11 +12,12 @@ from django.views.decorators.csrf import csrf_protect
 from django.views.generic import CreateView, FormView, RedirectView
 from django.views.generic.edit import UpdateView
 
-from .models import CalendallUser
+from .models import CalendallUser, Token
 from .forms import (CalendallUserCreateForm, LoginForm, ProfileSettingsForm,
                     AccountSettingsForm)
 
 from core import utils
+from core.middleware import set_user_timezone
 from core.views import LoginRequiredMixin
 
 log = logging.getLogger(__name__)
@@ -31,24 +30,22 @@ class CalendallUserCreate(CreateView):
     template_name = "profiles/profiles_calendalluser_create.html"
     success_url = reverse_lazy('profiles:calendalluser_create')
 
-    # Auto generate the validation token
-    def form_valid(self, form):
-        form.instance.validation_token = str(uuid.uuid4()).replace("-", "")
-        return super().form_valid(form)
-
     def get_success_url(self):
-        # Auto log in process:
-        # Check password & user is ok (this isn't neccesary)
-        user = authenticate(username=self.request.POST['username'],
-                            password=self.request.POST['password'])
-        if user is not None:
-            if user.is_active:
-                log.debug("Auto login '{0}'".format(user))
-                login(self.request, user)
+        # Auto log in, the user has just been created with the form so
+        # authenticate (and hash the password again) is not needed
+        user = self.object
+        user.backend = settings.AUTHENTICATION_BACKENDS[0]
+        log.debug("Auto login '%s'", user)
+        login(self.request, user)
+
+        # Only the hash is stored, the raw token goes in the email
+        validation_token = Token.objects.create_token(
+            self.object, Token.KIND_VALIDATION)
+        context = self.get_context_data(validation_token=validation_token)
 
         # Send welcome email
         utils.send_templated_email("profiles/emails/profiles_email_welcome",
-                                   self.get_context_data(),
+                                   context,
                                    _("Welcome to Calendall"),
                                    settings.EMAIL_SUPPORT,
                                    (user.email,),
@@ -56,7 +53,7 @@ class CalendallUserCreate(CreateView):
 
         # Send validation email
         utils.send_templated_email("profiles/emails/profiles_email_validation",
-                                   self.get_context_data(),
+                                   context,
                                    _("Validate your Calendall account"),
                                    settings.EMAIL_NOREPLY,
                                    (user.email,),
@@ -80,8 +77,6 @@ class Login(FormView):
 
     def form_valid(self, form):
         login(self.request, form.get_user())
-        if self.request.session.test_cookie_worked():
-            self.request.session.delete_test_cookie()
         return super().form_valid(form)
 
     def get_success_url(self):
@@ -100,7 +95,6 @@ class Login(FormView):
     @method_decorator(csrf_protect)
     @method_decorator(never_cache)
     def dispatch(self, request, *args, **kwargs):
-        request.session.set_test_cookie()
         return super().dispatch(request, *args, **kwargs)
 
 
@@ -122,26 +116,34 @@ class Validate(RedirectView):
 
         # Check if the values is correct
         try:
-            u = CalendallUser.objects.get(username=self.kwargs['username'])
+            token = Token.objects.get_valid(Token.KIND_VALIDATION,
+                                            self.kwargs['token'])
+            u = token.user
+            if u.username != self.kwargs['username']:
+                raise Token.DoesNotExist()
 
             if u.validated:
-                log.debug("User '{0}' already validated".format(u))
+                log.debug("User '%s' already validated", u)
                 messages.info(request, _("Account already validated"))
-                error = False
-
-            elif u.validation_token == self.kwargs['token']:
+            else:
                 u.validated = True
-                u.save()
-                log.info("User '{0}' validated".format(u))
+                u.save(update_fields=["validated"])
+                log.info("User '%s' validated", u)
                 messages.success(request, _("successfuly account validated"))
+            u.tokens.filter(kind=Token.KIND_VALIDATION).delete()
+            error = False
+
+        except Token.DoesNotExist:
+            # Used tokens are deleted, a second click of the link
+            if CalendallUser.objects.filter(username=self.kwargs['username'],
+                                            validated=True).exists():
+                log.debug("User '%s' already validated",
+                          self.kwargs['username'])
+                messages.info(request, _("Account already validated"))
                 error = False
 
-        except CalendallUser.DoesNotExist:
-            pass  # This will be error
-
         if error:
-            log.debug(
-                "Error validating user '{0}'".format(self.kwargs['username']))
+            log.debug("Error validating user '%s'", self.kwargs['username'])
             messages.error(request, _("Error validating the account"))
 
         return super().get(request, *args, **kwargs)
@@ -158,8 +160,8 @@ class ProfileSettings(LoginRequiredMixin, UpdateView):
         return self.request.user
 
     def form_valid(self, form):
-        # Set the timezone of the user in the session
-        self.request.session['user-tz'] = form.cleaned_data['timezone']
+        # Refresh the timezone cookie of the user
+        set_user_timezone(self.request, form.cleaned_data['timezone'])
         return super().form_valid(form)
 
     def get_success_url(self):